@@ -1,30 +1,94 @@
+import os
 from datetime import timedelta, datetime, timezone
 from flask import Flask, request, jsonify, session, abort
+from flask.helpers import get_debug_flag
 from typing import Any
 
 from models.user import UserDB, Client, Management, serialize_furniture
-from models.inventory import Inventory
+from models.user import sqlite_backend as users_sqlite
+from models.inventory import Inventory, InsufficientStockError, SCHEMA
+from models.inventory import sqlite_backend as inventory_sqlite
 from models.order import OrderManager
+from models.order import sqlite_backend as orders_sqlite
 from models.cart import PaymentGateway
-from app.auth import require_auth, authenticate_user
+from models.hashing import HasherSaturatedError
+from models.holds import HoldManager
+from app.auth import (
+    require_auth,
+    lock_user,
+    authenticate_user,
+    issue_token,
+    current_user,
+    load_token_key,
+)
 
 app = Flask(__name__)
-app.secret_key = "your_secret_key"
+# Signs access tokens and session cookies, a missing TOKEN_SECRET fails here
+# unless FLASK_DEBUG is set
+app.config["TOKEN_KEY"] = load_token_key(debug=get_debug_flag())
+app.secret_key = app.config["TOKEN_KEY"]
 app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(hours=2)
+# When enabled, adding to cart holds the stock for a limited time. Holds live in
+# the memory of this process, so they can not be used with STORE_DB.
+app.config["CART_HOLDS"] = False
+
+# Path of a SQLite database storing all the data, the default files if not set.
+# Several worker processes (e.g. gunicorn -w 4) can share the database.
+STORE_DB = os.environ.get("STORE_DB")
 
 # Initialize Inventory, Order manger and UserDB for databases usage
-INVENTORY = Inventory()
-ORDER_MANGER = OrderManager()
-USER_DB = UserDB.get_instance()
+if STORE_DB:
+    INVENTORY = Inventory(backend=inventory_sqlite(STORE_DB))
+    ORDER_MANGER = OrderManager(backend=orders_sqlite(STORE_DB))
+    USER_DB = UserDB.configure(backend=users_sqlite(STORE_DB))
+else:
+    INVENTORY = Inventory()
+    ORDER_MANGER = OrderManager()
+    USER_DB = UserDB.get_instance()
+HOLDS = HoldManager(INVENTORY)
+
+
+def cart_holds_enabled() -> bool:
+    """
+    True if adding to cart holds the stock (the CART_HOLDS setting).
+
+    Holds are tracked in the memory of one process, another worker would neither
+    use them at checkout nor release them, so they are refused with STORE_DB.
+    """
+    if app.config["CART_HOLDS"] and STORE_DB:
+        raise RuntimeError("CART_HOLDS requires a single process, unset STORE_DB.")
+    return app.config["CART_HOLDS"]
 
 
 def helper_updating_DB() -> None:
     """
-    Updates databases to persist data changes.
+    Updates databases to persist data changes, stores without changes are skipped.
     """
-    INVENTORY.update_data()
-    ORDER_MANGER.save_orders()
-    USER_DB.save_users()
+    INVENTORY.flush()
+    ORDER_MANGER.flush()
+    USER_DB.flush()
+
+
+@app.before_request
+def load_shared_changes() -> None:
+    """
+    Loads the changes other worker processes made to shared storage, stores
+    without shared storage have nothing to load.
+    """
+    INVENTORY.refresh()
+    ORDER_MANGER.refresh()
+    USER_DB.refresh()
+
+
+@app.after_request
+def store_shared_changes(response: Any) -> Any:
+    """
+    Writes the changes of a request to shared storage before the next request,
+    which another worker process may serve.
+    """
+    if STORE_DB:
+        helper_updating_DB()
+    return response
 
 
 @app.before_request
@@ -49,6 +113,17 @@ def manage_session() -> None:
         session["last_activity"] = now
 
 
+@app.errorhandler(HasherSaturatedError)
+def password_workers_busy(error: HasherSaturatedError) -> Any:
+    """
+    Rejects password work with 503 while the password worker pool is saturated,
+    so clients back off instead of piling up on the request workers.
+    """
+    response = jsonify({"error": "Server busy, try again later"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 # ---------------------- User register ----------------------
 @app.route("/users", methods=["POST"])
 def register() -> Any:
@@ -61,13 +136,15 @@ def register() -> Any:
     Expected responses:
     201 - "message": "Registration successful!"
     400 - "error": "username already registered"
+    400 - "error": "email already registered"
     400 - "error": "roll undefined"
+    503 - "error": "Server busy, try again later"
     """
 
     data = request.json
     if data["kind"] == "Client":
         new_user = Client(
-            user_id=len(USER_DB.user_data) + 1,
+            user_id=None,
             username=data["username"],
             email=data["email"],
             password=data["password"],
@@ -75,7 +152,7 @@ def register() -> Any:
         )
     elif data["kind"] == "Management":
         new_user = Management(
-            user_id=len(USER_DB.user_data) + 1,
+            user_id=None,
             username=data["username"],
             email=data["email"],
             password=data["password"],
@@ -84,9 +161,12 @@ def register() -> Any:
         )
     else:
         return jsonify({"error": "role undefined"}), 400
+    # The database allocates the ID and rejects taken usernames and emails
     if not USER_DB.add_user(new_user):
-        return jsonify({"error": "username already registered"}), 400
-    USER_DB.save_users()
+        USER_DB.refresh()
+        taken = USER_DB.taken_field(new_user.username, new_user.email) or "username"
+        return jsonify({"error": f"{taken} already registered"}), 400
+    USER_DB.flush()
     return jsonify({"message": "Registration successful!"}), 201
 
 
@@ -94,31 +174,39 @@ def register() -> Any:
 @app.route("/auth/login", methods=["POST"])
 def login() -> Any:
     """
-    Logs in a user and initializes a session.
+    Logs in a user, initializes a session and issues an access token.
+
+    The password is verified only here, later requests are authenticated by the
+    session or by sending the token as "Authorization: Bearer <token>".
 
     Expected keys: "username", "password"
 
     Expected responses:
-    201 - "message": "Login successful!"
+    200 - "message": "Login successful!", "token": access token
     401 - "error": "Invalid credentials"
+    503 - "error": "Server busy, try again later"
     """
     data = request.json
     user = authenticate_user(data["username"], data["password"])
     if user:
         session["user_id"] = user.user_id
         session["role"] = user.type
-        return jsonify({"message": "Login successful!"}), 200
+        return jsonify({"message": "Login successful!", "token": issue_token(user)}), 200
     return jsonify({"error": "Invalid credentials"}), 401
 
 
 # ---------------------- Cart Management ----------------------
 @app.route("/cart/items", methods=["POST"])
 @require_auth
+@lock_user
 def add_to_cart() -> Any:
     """
     Adds an item to a user's shopping cart.
 
-    Expected keys: "username", "password", "name" (of product), "quantity" (optional, default=1)
+    With CART_HOLDS enabled the added units are held in the inventory until the
+    hold expires, the cart is checked out or the item is removed.
+
+    Expected keys: "name" (of product), "quantity" (optional, default=1)
 
     Expected responses:
     200 - "message":"Item added to cart"
@@ -128,11 +216,9 @@ def add_to_cart() -> Any:
     400 - "error": "Item insufficient stock"
     """
     data = request.json
-    user = authenticate_user(data["username"], data["password"])
+    user = current_user()
     if isinstance(user, Management):
         return jsonify({"error": "Request deny for Management user"}), 401
-    if not user:
-        return jsonify({"error": "Invalid credentials"}), 401
     cart = user.shopping_cart
 
     item_name = data.get("name")
@@ -143,27 +229,32 @@ def add_to_cart() -> Any:
         return jsonify(
             {"error": "Item not available or insufficient stock"}), 400
 
-    # Check if item already exist in User ShoppingCart
-
-    if items[0] in cart.items:
-        count = 0
-        for i in cart.items:
-            if items[0].name == i.name:
-                count += 1
-        if items[0].quantity <= quantity + count:
+    if cart_holds_enabled():
+        # Held units are already deducted from the stock checked above
+        try:
+            HOLDS.hold(str(user.user_id), items[0].serial_number, quantity)
+        except ValueError:
+            return jsonify({"error": "Item insufficient stock"}), 400
+        HOLDS.start()
+    else:
+        # Check if item already exist in User ShoppingCart
+        count = cart.quantity_of(items[0].serial_number)
+        if count and items[0].quantity <= quantity + count:
             return jsonify({"error": "Item insufficient stock"}), 400
 
     cart.add_item(items[0], quantity)
+    USER_DB.mark_dirty(user.user_id)
     return jsonify({"message": "Item added to cart"}), 200
 
 
 @app.route("/cart/items", methods=["DELETE"])
 @require_auth
+@lock_user
 def remove_from_cart() -> Any:
     """
     Removes an item from a user's shopping cart.
 
-    Expected keys: "username", "password", "name" (of product)
+    Expected keys: "name" (of product)
 
     Expected responses:
     200 - "message": "Item removed from cart"
@@ -172,16 +263,20 @@ def remove_from_cart() -> Any:
     404 - "error": "Item not exist in user's cart"
     """
     data = request.json
-    user = authenticate_user(data["username"], data["password"])
+    user = current_user()
     if isinstance(user, Management):
         return jsonify({"error": "Request deny for Management user"}), 401
-    if not user:
-        return jsonify({"error": "Invalid credentials"}), 401
     cart = user.shopping_cart
 
     item_name = data.get("name")
+    serials = [
+        serial for serial, line in cart.lines.items() if line.item.name == item_name
+    ]
 
     if cart.remove_item(item_name):
+        for serial in serials:
+            HOLDS.release(str(user.user_id), serial)
+        USER_DB.mark_dirty(user.user_id)
         return jsonify({"message": "Item removed from cart"}), 200
     else:
         return jsonify({"message": "Item not exist in user's cart"}), 404
@@ -190,46 +285,79 @@ def remove_from_cart() -> Any:
 # ---------------------- Checkout ----------------------
 @app.route("/orders", methods=["POST"])
 @require_auth
+@lock_user
 def checkout() -> Any:
     """
     Processes the user's shopping cart checkout.
 
-    Expected keys: "username", "password", "payment_info"
+    Expected keys: "payment_info"
 
     Expected responses:
     201 - "message": "Checkout successful"
+    401 - "error": "Request deny for Management user"
     401 - "error": "Invalid credentials"
     400 - "error": "Cart is empty"
-    400 - "error": "Some items are out of stock"
+    400 - "error": "Some items are out of stock", "shortfalls": serial number ->
+          {"requested", "available"} of the lines that cannot be supplied
     500 - "error": "Failed to calculate total price"
     500 - "error": "Payment processing failed"
     """
 
-    data = request.json
-    user = authenticate_user(data["username"], data["password"])
-    if not user:
-        return jsonify({"error": "Invalid credentials"}), 401
+    user = current_user()
+    if isinstance(user, Management):
+        return jsonify({"error": "Request deny for Management user"}), 401
     cart = user.shopping_cart
+    # Read the body before any stock is reserved
+    payment_info = (request.get_json(silent=True) or {}).get("payment_info")
 
-    if not cart.items:
+    if not cart.lines:
         return jsonify({"error": "Cart is empty"}), 400
 
-    if not cart.validate_cart(INVENTORY):
-        return jsonify({"error": "Some items are out of stock"}), 400
-
+    # Charge the current prices, they may have changed since the items were added
+    if cart.reprice(INVENTORY):
+        USER_DB.mark_dirty(user.user_id)
     total_price = cart.calculate_total()
     if total_price is None:
         return jsonify({"error": "Failed to calculate total price"}), 500
 
-    payment_info = request.json.get("payment_info")
-    payment_gateway = PaymentGateway()
-    if not payment_gateway.process_payment(payment_info, total_price):
-        return jsonify({"error": "Payment processing failed"}), 500
-
-    ORDER_MANGER.create_order(cart, payment_info, total_price)
-    for item in cart.items:
-        INVENTORY.update_quantity(item, item.quantity - 1)
+    # Units still held for the cart are already deducted, the rest of the stock
+    # of all the lines is deducted at once, so concurrent checkouts can not
+    # sell the same units twice
+    reservation_ids, held = HOLDS.take(str(user.user_id))
+    missing = {
+        serial: line.quantity - held.get(serial, 0)
+        for serial, line in cart.lines.items()
+        if line.quantity > held.get(serial, 0)
+    }
+    try:
+        if missing:
+            reservation_ids.append(INVENTORY.reserve(missing))
+    except InsufficientStockError as e:
+        INVENTORY.release_all(reservation_ids)
+        return jsonify(
+            {"error": "Some items are out of stock", "shortfalls": e.shortfalls}), 400
+
+    # Any failure before the reservations are committed returns their stock
+    try:
+        payment_gateway = PaymentGateway()
+        try:
+            payment_successful = payment_gateway.process_payment(
+                payment_info, total_price
+            )
+        except ValueError:
+            payment_successful = False
+        if not payment_successful:
+            INVENTORY.release_all(reservation_ids)
+            return jsonify({"error": "Payment processing failed"}), 500
+
+        ORDER_MANGER.create_order(cart, payment_info, total_price)
+    except Exception:
+        INVENTORY.release_all(reservation_ids)
+        raise
+    for reservation_id in reservation_ids:
+        INVENTORY.commit(reservation_id)
     user.shopping_cart.clear_cart()
+    USER_DB.mark_dirty(user.user_id)
 
     # Updating all DB after order made successfully
     helper_updating_DB()
@@ -238,28 +366,54 @@ def checkout() -> Any:
 
 
 # ---------------------- Search Inventory ----------------------
+def valid_attributes(attributes: Any) -> bool:
+    """
+    Checks the "attributes" filter of a search: an object mapping inventory
+    columns to a value, or to a list of accepted values.
+    """
+    scalars = (str, int, float, bool)
+    if not isinstance(attributes, dict):
+        return False
+    for column, value in attributes.items():
+        if column not in SCHEMA:
+            return False
+        values = value if isinstance(value, list) else [value]
+        if not all(isinstance(v, scalars) for v in values):
+            return False
+    return True
+
+
 @app.route("/inventory", methods=["GET"])
 @require_auth
 def search_product() -> Any:
     """
     Searches for products in the inventory.
 
-    Expected keys: "username", "password" (of user), optional: "name", "category", "min_price", "max_price" (of product)
+    Expected keys (all optional): "name", "category", "min_price", "max_price" (of product),
+    "limit", "offset" (paging, price range results are ordered by price),
+    "q" (free text over names and descriptions, results are ranked by relevance),
+    "attributes" (type-specific filters, e.g. {"has_wheels": true, "how_many_seats": [3, 4]})
 
     Expected responses:
     200 - products details
+    400 - "error": "Invalid attributes filter"
     401 - "error": "Invalid credentials"
     404 - "message": "No products found"
     """
 
-    data = request.json
-    if not (authenticate_user(data["username"], data["password"])):
-        return jsonify({"error": "Invalid credentials"}), 401
+    data = request.get_json(silent=True) or {}
 
     name = data.get("name")
     category = data.get("category")
     min_price = data.get("min_price")
     max_price = data.get("max_price")
+    text = data.get("q")
+    attributes = data.get("attributes")
+    limit = data.get("limit")
+    offset = int(data.get("offset", 0))
+
+    if attributes is not None and not valid_attributes(attributes):
+        return jsonify({"error": "Invalid attributes filter"}), 400
 
     if min_price is None or max_price is None:
         min_price = None
@@ -273,6 +427,10 @@ def search_product() -> Any:
             if min_price is not None and max_price is not None
             else None
         ),
+        limit=int(limit) if limit is not None else None,
+        offset=offset,
+        text=text,
+        attributes=attributes,
     )
 
     if not results:
@@ -1,36 +1,132 @@
+import os
+import secrets
+import jwt
+from datetime import datetime, timedelta, timezone
 from functools import wraps
-from flask import session, jsonify
+from flask import session, jsonify, request, g, current_app
 from typing import Callable, Optional
-from models.user import UserDB
+from models.user import UserDB, User
+
+# Signed access tokens issued on login
+TOKEN_ALGORITHM = "HS256"
+TOKEN_LIFETIME = timedelta(hours=2)
+# Environment variable holding the signing key, at least 32 bytes (RFC 7518)
+TOKEN_KEY_ENV = "TOKEN_SECRET"
+MIN_TOKEN_KEY_BYTES = 32
+
+
+def load_token_key(debug: bool = False) -> str:
+    """
+    Load the key signing access tokens from the TOKEN_SECRET environment variable.
+
+    In debug mode a missing key is replaced by a random one, tokens then stay
+    valid only until the process restarts.
+
+    raise:
+        RuntimeError: If the key is missing outside debug mode, or too short.
+    """
+    key = os.environ.get(TOKEN_KEY_ENV)
+    if not key:
+        if debug:
+            return secrets.token_hex(MIN_TOKEN_KEY_BYTES)
+        raise RuntimeError(f"Set {TOKEN_KEY_ENV} to the key signing access tokens.")
+    if len(key.encode()) < MIN_TOKEN_KEY_BYTES:
+        raise RuntimeError(
+            f"{TOKEN_KEY_ENV} must be at least {MIN_TOKEN_KEY_BYTES} bytes long."
+        )
+    return key
 
 
 def authenticate_user(username: str, password: str) -> Optional[UserDB]:
     """
     Authenticate a user by checking email and password.
     """
-    user_db = UserDB.get_instance()
-    user = next((u for u in user_db.user_data.values()
-                if u.username == username), None)
+    user = UserDB.get_instance().get_by_username(username)
 
     if user and user.verify_password(password):
         return user
     return None
 
 
+def issue_token(user: User) -> str:
+    """
+    Issue a signed access token for an authenticated user.
+    """
+    now = datetime.now(timezone.utc)
+    payload = {
+        "uid": user.user_id,
+        "role": user.type,
+        "iat": now,
+        "exp": now + TOKEN_LIFETIME,
+    }
+    return jwt.encode(
+        payload, current_app.config["TOKEN_KEY"], algorithm=TOKEN_ALGORITHM
+    )
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """
+    Verify an access token and return its claims, None if invalid or expired.
+    """
+    try:
+        return jwt.decode(
+            token, current_app.config["TOKEN_KEY"], algorithms=[TOKEN_ALGORITHM]
+        )
+    except jwt.InvalidTokenError:
+        return None
+
+
+def current_user() -> Optional[User]:
+    """
+    The user resolved by require_auth for the current request.
+    """
+    return g.get("current_user")
+
+
 def require_auth(func: Callable):
     """
-    Decorator to enforce authentication via session.
+    Decorator to enforce authentication via a bearer token or the session.
+
+    The resolved user is available through current_user(), so routes do not
+    need to verify the password again.
     """
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        if "user_id" not in session:
+        auth_header = request.headers.get("Authorization", "")
+        if auth_header.startswith("Bearer "):
+            claims = decode_token(auth_header[len("Bearer "):])
+            if claims is None:
+                return jsonify({"error": "Invalid or expired token"}), 401
+            user_id = claims["uid"]
+        elif "user_id" in session:
+            user_id = session["user_id"]
+        else:
             return jsonify({"error": "Authentication required"}), 401
+        user = UserDB.get_instance().get_user(user_id)
+        if user is None:
+            return jsonify({"error": "Invalid credentials"}), 401
+        g.current_user = user
         return func(*args, **kwargs)
 
     return wrapper
 
 
+def lock_user(func: Callable):
+    """
+    Decorator serializing the requests of the current user (used after
+    require_auth), so that concurrent requests of one user do not interleave
+    their changes to the shopping cart.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with UserDB.get_instance().user_lock(current_user().user_id):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
 def require_role(required_role: str):
     """
     Decorator to enforce role-based access control.
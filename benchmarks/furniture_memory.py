@@ -0,0 +1,88 @@
+"""
+Memory used by Furniture objects, in bytes per item.
+
+Items of all the types are created from freshly built strings, as they would be
+when parsed from a request or a file, so the cost of repeated dimensions and
+country strings is included.
+
+Usage:
+    python benchmarks/furniture_memory.py --items 1000000
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models.furniture import Bed, Chair, Closet, Sofa, Table  # noqa: E402
+
+COUNTRIES = ["Israel", "Germany", "Italy", "Sweden", "China", "Poland", "USA"]
+DIMENSIONS = ["50x50x100 cm", "200x90x100 cm", "160x200x40 cm", "120x80x75 cm"]
+SPECIFICS = {
+    Chair: {"has_wheels": True, "how_many_legs": 4},
+    Sofa: {"how_many_seats": 3, "can_turn_to_bed": False},
+    Table: {"expandable": True, "how_many_seats": 6, "can_fold": False},
+    Bed: {"has_storage": True, "has_back": True},
+    Closet: {"has_mirrors": True, "number_of_shelves": 4, "how_many_doors": 2},
+}
+
+
+def fresh(text: str) -> str:
+    """
+    A new string object equal to text.
+    """
+    return "".join(list(text))
+
+
+def build(items: int) -> list:
+    """
+    Create a mixed list of furniture items.
+    """
+    rng = random.Random(0)
+    classes = list(SPECIFICS)
+    result = []
+    for i in range(items):
+        cls = classes[i % len(classes)]
+        result.append(
+            cls(
+                name=f"{cls.__name__} {i}",
+                description=f"{cls.__name__} number {i}",
+                price=float(rng.randrange(50, 5000)),
+                dimensions=fresh(rng.choice(DIMENSIONS)),
+                serial_number=f"SN{i}",
+                quantity=rng.randrange(1, 100),
+                weight=float(rng.randrange(1, 80)),
+                manufacturing_country=fresh(rng.choice(COUNTRIES)),
+                **SPECIFICS[cls],
+            )
+        )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = build(args.items)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"items:          {len(items):,}")
+    print(f"total memory:   {used / 2 ** 20:,.1f} MiB")
+    print(f"bytes per item: {used / len(items):,.0f}")
+    print(f"build time:     {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
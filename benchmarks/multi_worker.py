@@ -0,0 +1,249 @@
+"""
+Throughput of the API with several worker processes sharing a SQLite database.
+
+Every worker process serves the app on its own port, and client processes
+spread their requests over the workers like a load balancer would. Clients
+mostly search the inventory, and every tenth iteration adds an item to the cart
+and checks out. After each run the stock sold is compared with the successful
+checkouts, so lost updates between workers show up as a mismatch.
+
+Usage:
+    python benchmarks/multi_worker.py --workers 1,2,4 --clients 16 --duration 5
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import secrets
+import sys
+import tempfile
+import time
+import warnings
+from typing import List, Tuple
+
+import bcrypt
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from models.inventory import Inventory  # noqa: E402
+from models.inventory import sqlite_backend as inventory_sqlite  # noqa: E402
+from models.user import USER_COLUMNS  # noqa: E402
+from models.user import sqlite_backend as users_sqlite  # noqa: E402
+
+PASSWORD = "benchmark"
+CATEGORIES = ["Chair", "Sofa", "Table", "Bed", "Closet"]
+SPECIFICS = {
+    "Chair": {"has_wheels": True, "how_many_legs": 4},
+    "Sofa": {"how_many_seats": 3, "can_turn_to_bed": False},
+    "Table": {"expandable": True, "how_many_seats": 6, "can_fold": False},
+    "Bed": {"has_storage": True, "has_back": True},
+    "Closet": {"has_mirrors": True, "number_of_shelves": 4, "how_many_doors": 2},
+}
+
+
+def seed(db_path: str, items: int, clients: int) -> int:
+    """
+    Store the inventory and client users, return the total stock.
+    """
+    inventory = Inventory(backend=inventory_sqlite(db_path))
+    with inventory.batch():
+        for i in range(items):
+            category = CATEGORIES[i % len(CATEGORIES)]
+            inventory.add_item(
+                {
+                    "type": category,
+                    "name": f"{category} {i}",
+                    "description": f"Benchmark {category.lower()} number {i}",
+                    "price": float(50 + i % 450),
+                    "dimensions": "100x50x80 cm",
+                    "serial_number": f"SN{i}",
+                    "quantity": 1000,
+                    "weight": 10.0,
+                    "manufacturing_country": "Israel",
+                    **SPECIFICS[category],
+                }
+            )
+    inventory.flush()
+
+    password = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(4)).decode()
+    users = pd.DataFrame(
+        [
+            {
+                "user_id": user_id,
+                "username": f"client{user_id}",
+                "email": f"client{user_id}@example.com",
+                "password": password,
+                "address": "",
+                "type": "Client",
+                "shopping_cart": [],
+            }
+            for user_id in range(1, clients + 1)
+        ],
+        columns=USER_COLUMNS,
+    )
+    users_sqlite(db_path).save(users)
+    return int(inventory.data["quantity"].sum())
+
+
+def serve(db_path: str, port: int, token_key: str) -> None:
+    """
+    Worker process serving the app on one port.
+    """
+    os.environ["STORE_DB"] = db_path
+    # All the workers accept the tokens any of them issued
+    os.environ["TOKEN_SECRET"] = token_key
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    warnings.simplefilter("ignore")
+    from werkzeug.serving import make_server
+
+    from app.APIroutes import app
+
+    make_server("127.0.0.1", port, app).serve_forever()
+
+
+def wait_ready(ports: List[int]) -> None:
+    """
+    Wait until every worker accepts requests.
+    """
+    import requests
+
+    for port in ports:
+        for _ in range(200):
+            try:
+                requests.get(f"http://127.0.0.1:{port}/inventory", timeout=1)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.05)
+
+
+def client(
+    user_id: int, ports: List[int], items: int, duration: float, start, results
+) -> None:
+    """
+    Client process sending requests for the duration, once all clients logged in.
+    """
+    import requests
+
+    session = requests.Session()
+    rng = random.Random(user_id)
+    response = session.post(
+        f"http://127.0.0.1:{ports[user_id % len(ports)]}/auth/login",
+        json={"username": f"client{user_id}", "password": PASSWORD},
+    )
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    requests_sent = checkouts = units = errors = 0
+    iteration = 0
+    start.wait()
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        iteration += 1
+        url = f"http://127.0.0.1:{ports[iteration % len(ports)]}"
+        if iteration % 10:
+            low = rng.randrange(50, 50 + min(items, 450))
+            response = session.get(
+                f"{url}/inventory",
+                json={
+                    "category": rng.choice(CATEGORIES),
+                    "min_price": low,
+                    "max_price": low + 50,
+                    "limit": 20,
+                },
+                headers=headers,
+            )
+            requests_sent += 1
+            errors += response.status_code not in (200, 404)
+            continue
+        i = rng.randrange(items)
+        category = CATEGORIES[i % len(CATEGORIES)]
+        response = session.post(
+            f"{url}/cart/items",
+            json={"name": f"{category} {i}", "quantity": 1},
+            headers=headers,
+        )
+        requests_sent += 1
+        errors += response.status_code != 200
+        # The checkout goes to the next worker, which must see the cart
+        url = f"http://127.0.0.1:{ports[(iteration + 1) % len(ports)]}"
+        response = session.post(
+            f"{url}/orders", json={"payment_info": "card"}, headers=headers
+        )
+        requests_sent += 1
+        if response.status_code == 201:
+            checkouts += 1
+            units += 1
+        else:
+            errors += 1
+    results.put((requests_sent, checkouts, units, errors))
+
+
+def run(workers: int, clients: int, items: int, duration: float) -> Tuple:
+    """
+    Run the benchmark with a number of worker processes.
+    """
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "store.db")
+        stock = seed(db_path, items, clients)
+        ports = [8100 + n for n in range(workers)]
+        token_key = secrets.token_hex(32)
+        servers = [
+            context.Process(
+                target=serve, args=(db_path, port, token_key), daemon=True
+            )
+            for port in ports
+        ]
+        for server in servers:
+            server.start()
+        try:
+            wait_ready(ports)
+            results = context.Queue()
+            start = context.Barrier(clients)
+            processes = [
+                context.Process(
+                    target=client,
+                    args=(user_id, ports, items, duration, start, results),
+                )
+                for user_id in range(1, clients + 1)
+            ]
+            for process in processes:
+                process.start()
+            totals = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+        finally:
+            for server in servers:
+                server.terminate()
+                server.join()
+        requests_sent, checkouts, units, errors = map(sum, zip(*totals))
+        remaining = int(
+            Inventory(backend=inventory_sqlite(db_path)).data["quantity"].sum()
+        )
+        consistent = stock - remaining == units
+    return requests_sent / duration, checkouts, errors, consistent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'checkouts':>10} "
+          f"{'errors':>7} {'stock ok':>9}")
+    baseline = None
+    for workers in [int(n) for n in args.workers.split(",")]:
+        rate, checkouts, errors, consistent = run(
+            workers, args.clients, args.items, args.duration
+        )
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10.0f} {rate / baseline:>8.2f} "
+              f"{checkouts:>10} {errors:>7} {str(consistent):>9}")
+
+
+if __name__ == "__main__":
+    main()
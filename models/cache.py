@@ -0,0 +1,128 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Default bounds of the search result cache
+DEFAULT_MAX_ENTRIES: int = 1024
+DEFAULT_MAX_BYTES: int = 16 * 1024 * 1024
+
+
+# -------- QueryCache CLASS -------- #
+class QueryCache:
+    """
+    LRU cache of query results, invalidated by a generation counter.
+
+    The owner of the cached data bumps its generation on every mutation and passes
+    it to get/put, once the cache sees a newer generation all entries are dropped,
+    so an entry is never served after the data it was computed from changed.
+    The cache can be shared between threads.
+    """
+
+    def __init__(
+        self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        """
+        Initialize an empty cache.
+
+        param:
+            max_entries: Maximum number of cached queries.
+            max_bytes: Memory bound, estimated from the size of keys and results.
+        """
+        if max_entries <= 0 or max_bytes <= 0:
+            raise ValueError("Cache bounds must be positive values.")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._generation = 0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sync_generation(self, generation: int) -> None:
+        """
+        Drop every entry if the data moved to a newer generation.
+        """
+        if generation != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self.clear()
+            self._generation = generation
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        """
+        Retrieve a cached result.
+
+        param:
+            key: Normalized query parameters.
+            generation: Current generation of the cached data.
+
+        return:
+            The cached result, or None on a miss.
+        """
+        with self._lock:
+            self._sync_generation(generation)
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """
+        Store a result, evicting the least recently used entries to stay in bounds.
+
+        param:
+            key: Normalized query parameters.
+            value: Result to cache.
+            generation: Generation of the data the result was computed from.
+        """
+        with self._lock:
+            self._sync_generation(generation)
+            size = sys.getsizeof(key) + sys.getsizeof(value)
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            while self._entries and (
+                len(self._entries) >= self.max_entries
+                or self._bytes + size > self.max_bytes
+            ):
+                old_key, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+
+    def clear(self) -> None:
+        """
+        Remove all the cached entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the cache counters.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
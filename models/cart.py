@@ -1,5 +1,6 @@
-from typing import List
+from typing import Dict, List, NamedTuple
 from models.furniture import Furniture
+from models.money import Cents, percent_factor, scale, to_amount, to_cents
 
 
 # -------- Helper Func -------- #
@@ -7,9 +8,16 @@ def calc_discount(price: float, discount_percentage: float) -> float:
     """
     Calculate the discounted price for a furniture item.
     """
+    return to_amount(discount_cents(to_cents(price), discount_percentage))
+
+
+def discount_cents(cents: Cents, discount_percentage: float) -> Cents:
+    """
+    Calculate a discounted amount in cents.
+    """
     if discount_percentage < 0 or discount_percentage > 100:
         raise ValueError("Discount percentage must be between 0 and 100.")
-    return round(price * (1 - discount_percentage / 100), 2)
+    return scale(cents, percent_factor(-discount_percentage))
 
 
 # -------- PaymentGateway CLASS -------- #
@@ -28,10 +36,30 @@ class PaymentGateway:
         return True
 
 
+# -------- CartLine CLASS -------- #
+class CartLine(NamedTuple):
+    """
+    One product in a shopping cart.
+
+    Attributes:
+        item (Furniture): The furniture item.
+        quantity (int): Number of units in the cart.
+        unit_cents (int): Price of one unit in cents when the line was last changed.
+    """
+
+    item: Furniture
+    quantity: int
+    unit_cents: Cents
+
+
 # -------- ShoppingCart CLASS -------- #
 class ShoppingCart:
     """
     Manages a user's shopping cart, including item addition, removal, and discount applications.
+
+    Products are kept as one line per serial number with its quantity, and the
+    subtotal is updated on every change so the total never rescans the cart.
+    Amounts are kept in whole cents, so totals are exact.
     """
 
     def __init__(self, user_id: str):
@@ -39,7 +67,25 @@ class ShoppingCart:
         Initializes a shopping cart for a user.
         """
         self.user_id = user_id
-        self.items: List[Furniture] = []
+        self.lines: Dict[str, CartLine] = {}
+        self._subtotal: Cents = 0
+
+    @property
+    def items(self) -> List[Furniture]:
+        """
+        The cart contents with every item repeated once per unit.
+        """
+        return [line.item for line in self.lines.values() for _ in range(line.quantity)]
+
+    @items.setter
+    def items(self, items: List[Furniture]) -> None:
+        """
+        Replaces the cart contents from a list holding one entry per unit.
+        """
+        self.lines = {}
+        self._subtotal = 0
+        for item in items:
+            self.add_item(item, 1)
 
     def get_cart(self) -> List[Furniture]:
         """
@@ -47,6 +93,32 @@ class ShoppingCart:
         """
         return self.items
 
+    def quantity_of(self, serial_number: str) -> int:
+        """
+        Returns the number of units of a product in the cart.
+        """
+        line = self.lines.get(serial_number)
+        return line.quantity if line else 0
+
+    def set_quantity(self, item: Furniture, quantity: int) -> bool:
+        """
+        Sets the number of units of a product in the cart, 0 removes it.
+
+        Returns:
+            bool: True if the quantity was set, False if it is not valid.
+        """
+        if quantity < 0:
+            print(f"Error: Item '{item.name}' quantity is not valid.")
+            return False
+        old_line = self.lines.pop(item.serial_number, None)
+        if old_line:
+            self._subtotal -= old_line.unit_cents * old_line.quantity
+        if quantity:
+            unit_cents = item.price_cents
+            self.lines[item.serial_number] = CartLine(item, quantity, unit_cents)
+            self._subtotal += unit_cents * quantity
+        return True
+
     def add_item(self, item: Furniture, quantity: int) -> bool:
         """
         Adds a Furniture item to the shopping cart.
@@ -55,9 +127,9 @@ class ShoppingCart:
             if quantity <= 0:
                 print(f"Error: Item '{item.name}' quantity is not valid.")
                 return False
-            for _ in range(quantity):
-                self.items.append(item)
-            return True
+            return self.set_quantity(
+                item, self.quantity_of(item.serial_number) + quantity
+            )
         except Exception as e:
             print(f"Error adding item to cart: {e}")
             return False
@@ -70,35 +142,63 @@ class ShoppingCart:
             bool: True if the item was removed, False if the item was not found or an error occurred.
         """
         try:
+            matches = [
+                line.item for line in self.lines.values() if line.item.name == item_name
+            ]
             # Check if the item exists in the cart
-            if not any(item.name == item_name for item in self.items):
+            if not matches:
                 print(f"Error: Item '{item_name}' not found in the cart.")
                 return False
 
             # Remove the item
-            self.items = [item for item in self.items if item.name != item_name]
+            for item in matches:
+                self.set_quantity(item, 0)
             return True
         except Exception as e:
             print(f"Error removing item: {e}")
             return False
 
+    def reprice(self, inventory) -> bool:
+        """
+        Updates the lines to the current items and prices of the inventory, so
+        the cart is charged what its items cost now and not when they were added.
+        Items no longer in the inventory are left as they are.
+
+        Returns:
+            bool: True if the price of a line changed.
+        """
+        changed = False
+        lines: Dict[str, CartLine] = {}
+        subtotal: Cents = 0
+        for serial, line in self.lines.items():
+            item = inventory.get_by_serial(serial)
+            if item is not None:
+                changed |= item.price_cents != line.unit_cents
+                line = CartLine(item, line.quantity, item.price_cents)
+            lines[serial] = line
+            subtotal += line.unit_cents * line.quantity
+        self.lines = lines
+        self._subtotal = subtotal
+        return changed
+
     def calculate_total(self) -> float:
         """
         Calculates the total cost of items in the cart.
         """
-        try:
-            return sum(item.price for item in self.items)
-        except Exception as e:
-            print(f"Error calculating total: {e}")
-            return 0.0
+        return to_amount(self._subtotal)
+
+    def total_cents(self) -> Cents:
+        """
+        Returns the total cost of items in the cart in cents.
+        """
+        return self._subtotal
 
     def apply_discount(self, discount_percentage: float) -> float:
         """
         Applies a discount to the total cart value.
         """
         try:
-            total = self.calculate_total()
-            return calc_discount(total, discount_percentage)
+            return to_amount(discount_cents(self._subtotal, discount_percentage))
         except Exception as e:
             print(f"Error applying discount: {e}")
             return 0.0
@@ -110,11 +210,7 @@ class ShoppingCart:
         try:
             if inventory is None:
                 return True
-            for item in self.items:
-                found_items = inventory.search_by(item.name)
-                if not found_items or found_items[0].quantity < 1:
-                    return False
-            return True
+            return not inventory.check_availability(self._stock_lines())
         except Exception as e:
             print(f"Error validating cart: {e}")
             return False
@@ -137,15 +233,26 @@ class ShoppingCart:
                     "OrderManager instance must be provided to record the order."
                 )
 
+            self.reprice(inventory)
             total_price = self.calculate_total()
-            payment_successful = payment_gateway.process_payment(
-                payment_info, total_price
-            )
+            # The stock is deducted before charging, and returned if the
+            # purchase does not complete
+            reservation_id = inventory.reserve(self._stock_lines())
+            try:
+                payment_successful = payment_gateway.process_payment(
+                    payment_info, total_price
+                )
+                if payment_successful:
+                    order_manager.create_order(self, payment_info, total_price)
+            except Exception:
+                inventory.release(reservation_id)
+                raise
 
             if payment_successful:
-                order_manager.create_order(self, payment_info, total_price)
-                self.update_inventory(inventory)
+                inventory.commit(reservation_id)
                 self.clear_cart()
+            else:
+                inventory.release(reservation_id)
             return True
         except Exception as e:
             print(f"Error processing purchase: {e}")
@@ -154,25 +261,33 @@ class ShoppingCart:
     def update_inventory(self, inventory=None) -> bool:
         """
         Updates inventory after checkout.
+
+        The quantities are deducted from the current stock of the inventory (not
+        from the items held by the cart), either for every line or for none.
         """
         try:
             if inventory is None:
                 return False
-            for item in self.items:
-                if item.quantity > 0:
-                    item.deduct_from_inventory(1)
-                    inventory.update_quantity(item, item.quantity)
+            if self.lines:
+                inventory.commit(inventory.reserve(self._stock_lines()))
             return True
         except Exception as e:
             print(f"Error updating inventory: {e}")
             return False
 
+    def _stock_lines(self) -> Dict[str, int]:
+        """
+        Returns the quantity of every product, by serial number.
+        """
+        return {serial: line.quantity for serial, line in self.lines.items()}
+
     def clear_cart(self) -> bool:
         """
         Clears all items from the shopping cart.
         """
         try:
-            self.items = []
+            self.lines = {}
+            self._subtotal = 0
             return True
         except Exception as e:
             print(f"Error clearing cart: {e}")
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional
+
+# Nullable pandas dtypes, stored as an array of values and a mask of missing values
+MASKED_DTYPES: Dict[str, type] = {"boolean": np.bool_, "Int64": np.int64}
+
+# Rows allocated for an empty store
+MIN_CAPACITY: int = 16
+
+
+# -------- ColumnStore CLASS -------- #
+class ColumnStore:
+    """
+    The typed columns of a table, held in preallocated arrays.
+
+    Rows are appended in place into the free capacity of the arrays, which double
+    when full, so an append costs amortized O(1) instead of rebuilding the table.
+    frame() wraps the stored rows in a DataFrame without copying them. Frames
+    built earlier keep their rows, appends only write past them and deletes
+    build new arrays, but in-place writes to a column (see column) show in every
+    frame sharing its array.
+    """
+
+    def __init__(self, schema: Dict[str, str], frame: Optional[pd.DataFrame] = None):
+        """
+        Initialize the store, with the rows of a table if given.
+
+        param:
+            schema: Column name -> pandas dtype.
+            frame: Table holding every schema column with its dtype.
+        """
+        self._schema = schema
+        self._size = 0 if frame is None else len(frame)
+        capacity = max(2 * self._size, MIN_CAPACITY)
+        self._values: Dict[str, np.ndarray] = {}
+        # Missing values of the nullable columns
+        self._masks: Dict[str, np.ndarray] = {}
+        for col, dtype in schema.items():
+            values = np.zeros(capacity, dtype=MASKED_DTYPES.get(dtype, dtype))
+            if dtype in MASKED_DTYPES:
+                mask = np.ones(capacity, dtype=bool)
+                if frame is not None:
+                    array = frame[col].array
+                    values[: self._size] = array.to_numpy(
+                        dtype=values.dtype, na_value=values.dtype.type(0)
+                    )
+                    mask[: self._size] = array.isna()
+                self._masks[col] = mask
+            elif frame is not None:
+                values[: self._size] = frame[col].to_numpy(dtype=values.dtype)
+            self._values[col] = values
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self) -> None:
+        """
+        Double the capacity of the arrays.
+        """
+        for arrays in (self._values, self._masks):
+            for col, array in arrays.items():
+                grown = np.zeros(2 * len(array), dtype=array.dtype)
+                grown[: self._size] = array[: self._size]
+                if arrays is self._masks:
+                    grown[self._size :] = True
+                arrays[col] = grown
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """
+        Append a row, missing columns are stored as missing values.
+
+        param:
+            record: Column -> value of the row.
+
+        return:
+            Position of the row.
+        """
+        position = self._size
+        if position == len(self._values[next(iter(self._values))]):
+            self._grow()
+        for col, values in self._values.items():
+            value = record.get(col)
+            if col in self._masks:
+                missing = value is None or pd.isna(value)
+                self._masks[col][position] = missing
+                values[position] = 0 if missing else value
+            else:
+                values[position] = value
+        self._size += 1
+        return position
+
+    def delete(self, position: int) -> None:
+        """
+        Delete a row, the later rows move up by one position.
+
+        param:
+            position: Position of the row.
+        """
+        for arrays in (self._values, self._masks):
+            for col, array in arrays.items():
+                arrays[col] = np.delete(array, position)
+        self._size -= 1
+
+    def column(self, col: str) -> np.ndarray:
+        """
+        Writable view of the stored values of a column that is not nullable.
+        """
+        return self._values[col][: self._size]
+
+    def replace(self, col: str, values: np.ndarray) -> None:
+        """
+        Store the values of a column that is not nullable in a new array, frames
+        built earlier keep the old one.
+
+        param:
+            col: Name of the column.
+            values: One value per row.
+        """
+        array = np.empty_like(self._values[col])
+        array[: self._size] = values
+        self._values[col] = array
+
+    def frame(self) -> pd.DataFrame:
+        """
+        The stored rows as a DataFrame sharing the arrays of the store.
+        """
+        index = pd.RangeIndex(self._size)
+        columns: Dict[str, Any] = {}
+        for col, dtype in self._schema.items():
+            values = self._values[col][: self._size]
+            if dtype == "boolean":
+                columns[col] = pd.arrays.BooleanArray(
+                    values, self._masks[col][: self._size], copy=False
+                )
+            elif dtype == "Int64":
+                columns[col] = pd.arrays.IntegerArray(
+                    values, self._masks[col][: self._size], copy=False
+                )
+            elif dtype == "object":
+                # Kept as objects, pandas would otherwise infer strings
+                columns[col] = pd.Series(values, index=index, dtype=object, copy=False)
+            else:
+                columns[col] = values
+        return pd.DataFrame(columns, index=index, copy=False)
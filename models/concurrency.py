@@ -0,0 +1,188 @@
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterable, Iterator, List
+
+# Default number of lock stripes, keys hash onto this many locks
+DEFAULT_STRIPES: int = 64
+
+
+# -------- LockStripes CLASS -------- #
+class LockStripes:
+    """
+    A fixed set of locks that keys (e.g. serial numbers) are hashed onto.
+
+    Operations on different keys mostly take different locks and run in
+    parallel, while memory stays bounded no matter how many keys exist. Several
+    keys are always locked in stripe order, so two callers locking overlapping
+    key sets cannot deadlock.
+    """
+
+    def __init__(self, stripes: int = DEFAULT_STRIPES) -> None:
+        """
+        Initialize the lock stripes.
+
+        param:
+            stripes: Number of locks.
+        """
+        if stripes <= 0:
+            raise ValueError("Number of lock stripes must be positive.")
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def stripes_for(self, keys: Iterable[str]) -> List[int]:
+        """
+        Return the sorted stripe numbers covering the given keys.
+        """
+        return sorted({zlib.crc32(key.encode()) % len(self._locks) for key in keys})
+
+    @contextmanager
+    def hold(self, keys: Iterable[str]) -> Iterator[None]:
+        """
+        Lock every stripe covering the given keys for the duration of the block.
+        """
+        stripes = self.stripes_for(keys)
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+
+    @contextmanager
+    def hold_all(self) -> Iterator[None]:
+        """
+        Lock every stripe for the duration of the block, excluding all the keys.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+# -------- RWLock CLASS -------- #
+class RWLock:
+    """
+    Reader-writer lock: any number of readers or a single writer.
+
+    Waiting writers block new readers so a stream of reads cannot starve them.
+    Both sides are reentrant for the thread holding them, and the thread holding
+    the write lock may also read. Upgrading a read lock to a write lock is not
+    supported.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None  # Thread ident of the writer
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    def acquire_read(self) -> None:
+        """
+        Acquire the lock for reading.
+        """
+        depth = getattr(self._local, "reads", 0)
+        with self._cond:
+            if not depth and self._writer != threading.get_ident():
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers += 1
+        self._local.reads = depth + 1
+
+    def release_read(self) -> None:
+        """
+        Release a read lock.
+        """
+        self._local.reads -= 1
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        """
+        Acquire the lock for writing.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if getattr(self._local, "reads", 0):
+                raise RuntimeError("Cannot upgrade a read lock to a write lock.")
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        """
+        Release a write lock.
+        """
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """
+        Hold the lock for reading for the duration of the block.
+        """
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """
+        Hold the lock for writing for the duration of the block.
+        """
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+# -------- Helper Func -------- #
+def read_locked(method: Callable) -> Callable:
+    """
+    Decorator running a method under the read side of the instance's _lock.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def write_locked(method: Callable) -> Callable:
+    """
+    Decorator running a method under the write side of the instance's _lock.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.write():
+            return method(self, *args, **kwargs)
+
+    return wrapper
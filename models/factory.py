@@ -1,10 +1,102 @@
 import sys
 import os
+from typing import Any, Callable, Dict
 from models.furniture import Chair, Sofa, Table, Bed, Closet
 from models.furniture import Furniture
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+# Attributes every furniture description must hold
+REQUIRED_ATTRIBUTES = (
+    "name",
+    "description",
+    "price",
+    "dimensions",
+    "serial_number",
+    "quantity",
+    "weight",
+    "manufacturing_country",
+)
+
+# Type-specific attributes each furniture type requires
+REQUIRED_SPECIFICS = {
+    "Sofa": ("how_many_seats", "can_turn_to_bed"),
+    "Table": ("expandable", "how_many_seats", "can_fold"),
+    "Closet": ("has_mirrors", "number_of_shelves", "how_many_doors"),
+    "Chair": ("has_wheels", "how_many_legs"),
+    "Bed": ("has_storage", "has_back"),
+}
+
+# Expected types of the attributes
+TYPE_VALIDATIONS = {
+    "price": float,
+    "quantity": int,
+    "weight": float,
+    "has_wheels": bool,
+    "how_many_legs": int,
+    "can_turn_to_bed": bool,
+    "how_many_seats": int,
+    "expandable": bool,
+    "can_fold": bool,
+    "has_storage": bool,
+    "has_back": bool,
+    "how_many_doors": int,
+    "has_mirrors": bool,
+    "number_of_shelves": int,
+}
+
+Validator = Callable[[Dict[str, Any]], None]
+
+
+# -------- Helper Func -------- #
+def compile_validator(furniture_type: str, cls: type) -> Validator:
+    """
+    Builds the validator of one furniture type, checking its required and
+    type-specific attributes and the types of its attributes.
+
+    :param furniture_type: The name of the furniture type.
+    :param cls: The class representing the furniture type.
+    :return: Function raising ValueError or TypeError for an invalid description.
+    """
+    required = frozenset(REQUIRED_ATTRIBUTES)
+    specifics = REQUIRED_SPECIFICS.get(furniture_type, ())
+    required_all = required.union(specifics)
+    # Only the attributes the class stores are checked, all of them for classes
+    # without declared fields
+    fields = getattr(cls, "_fields", None)
+    checks = tuple(
+        (attr, expected_type)
+        for attr, expected_type in TYPE_VALIDATIONS.items()
+        if fields is None or attr in fields
+    )
+
+    def validate(furniture_desc: Dict[str, Any]) -> None:
+        if not required_all <= furniture_desc.keys():
+            missing_attributes = [
+                attr for attr in REQUIRED_ATTRIBUTES if attr not in furniture_desc
+            ]
+            if missing_attributes:
+                raise ValueError(
+                    f"Missing required attributes: {', '.join(missing_attributes)}"
+                )
+            missing_specifics = [
+                attr for attr in specifics if attr not in furniture_desc
+            ]
+            raise ValueError(
+                f"{furniture_type} requires additional attributes: "
+                f"{', '.join(missing_specifics)}"
+            )
+        for attr, expected_type in checks:
+            if attr in furniture_desc and not isinstance(
+                furniture_desc[attr], expected_type
+            ):
+                raise TypeError(
+                    f"Invalid type for {attr}. Expected {expected_type.__name__}."
+                )
+
+    return validate
+
+
 # all the created furniture
 FURNITURE_CLASSES = {
     "Chair": Chair,
@@ -14,6 +106,11 @@ FURNITURE_CLASSES = {
     "Closet": Closet,
 }
 
+# Validator of each furniture type, compiled when the type is registered
+FURNITURE_VALIDATORS: Dict[str, Validator] = {
+    name: compile_validator(name, cls) for name, cls in FURNITURE_CLASSES.items()
+}
+
 
 class FurnitureFactory:
     """
@@ -33,6 +130,7 @@ class FurnitureFactory:
             raise ValueError("Furniture type name must be a non-empty string.")
         if not callable(cls):
             raise ValueError("The provided class must be callable.")
+        FURNITURE_VALIDATORS[name] = compile_validator(name, cls)
         FURNITURE_CLASSES[name] = cls
 
     @staticmethod
@@ -40,6 +138,9 @@ class FurnitureFactory:
         """
         Factory method to create furniture objects.
 
+        The description is checked by the validator compiled for its type, see
+        compile_validator.
+
         :param furniture_desc: Dictionary containing furniture attributes.
         :return: An instance of the specified furniture class.
         :raises ValueError: If furniture type is missing or unknown.
@@ -50,76 +151,15 @@ class FurnitureFactory:
         if not furniture_type:
             raise ValueError("Furniture type is required.")
 
-        if furniture_type not in FURNITURE_CLASSES:
+        validator = FURNITURE_VALIDATORS.get(furniture_type)
+        if validator is None:
             raise ValueError(f"Unknown furniture type: {furniture_type}")
 
         furniture_desc.pop("type")
-
-        required_attributes = [
-            "name", "description", "price", "dimensions",
-            "serial_number", "quantity", "weight", "manufacturing_country"
-        ]
-        missing_attributes = [
-            attr for attr in required_attributes if attr not in furniture_desc
-        ]
-        if missing_attributes:
-            raise ValueError(f"Missing required attributes: {', '.join(missing_attributes)}")
-
-        # Validate specific furniture attributes
-        FurnitureFactory._validate_furniture_specifics(furniture_type, furniture_desc)
-
-        # **New: Validate attribute types**
-        type_validations = {
-            "price": float,
-            "quantity": int,
-            "weight": float,
-            "has_wheels": bool,
-            "how_many_legs": int,
-            "can_turn_to_bed": bool,
-            "how_many_seats": int,
-            "expandable": bool,
-            "can_fold": bool,
-            "has_storage": bool,
-            "has_back": bool,
-            "how_many_doors": int,
-            "has_mirrors": bool,
-            "number_of_shelves": int,
-        }
-
-        for attr, expected_type in type_validations.items():
-            if attr in furniture_desc and not isinstance(furniture_desc[attr], expected_type):
-                raise TypeError(f"Invalid type for {attr}. Expected {expected_type.__name__}.")
+        validator(furniture_desc)
 
         # Try creating the furniture object
         try:
             return FURNITURE_CLASSES[furniture_type](**furniture_desc)
         except TypeError as e:
             raise TypeError(f"Failed to create furniture '{furniture_type}': {e}")
-
-    @staticmethod
-    def _validate_furniture_specifics(furniture_type, furniture_desc):
-        """
-        Ensures furniture-specific required attributes exist.
-
-        :param furniture_type: The type of furniture.
-        :param furniture_desc: The dictionary containing furniture attributes.
-        :raises ValueError: If required attributes for a specific furniture type are missing.
-        """
-        required_specifics = {
-            "Sofa": ["how_many_seats", "can_turn_to_bed"],
-            "Table": ["expandable", "how_many_seats", "can_fold"],
-            "Closet": ["has_mirrors", "number_of_shelves", "how_many_doors"],
-            "Chair": ["has_wheels", "how_many_legs"],
-            "Bed": ["has_storage", "has_back"],
-        }
-
-        missing_specifics = [
-            attr
-            for attr in required_specifics.get(furniture_type, [])
-            if attr not in furniture_desc
-        ]
-
-        if missing_specifics:
-            raise ValueError(
-                f"{furniture_type} requires additional attributes: {', '.join(missing_specifics)}"
-            )
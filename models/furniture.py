@@ -1,12 +1,57 @@
+import sys
 from abc import ABC
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+
+from models.money import Cents, percent_factor, rate_factor, scale, to_amount, to_cents
+
+# Low-cardinality text attributes shared by many items, interned so equal values
+# are stored once
+INTERNED_ATTRIBUTES = ("dimensions", "manufacturing_country")
+
+
+# -------- Helper Func -------- #
+def _slot_fields(cls: type) -> Tuple[str, ...]:
+    """
+    Public attribute names stored in the slots of a class and its bases, base
+    attributes first.
+    """
+    return tuple(
+        attr
+        for klass in reversed(cls.__mro__)
+        for attr in klass.__dict__.get("__slots__", ())
+        if not attr.startswith("_")
+    )
+
+
+def _intern(value: Any) -> Any:
+    """
+    Interns a string value, other values (e.g. None) are returned unchanged.
+    """
+    return sys.intern(value) if isinstance(value, str) else value
 
 
 class Furniture(ABC):
     """
     Abstract class representing a piece of furniture.
+
+    Items keep their attributes in slots instead of a per-instance dict, and share
+    the class default tax rate until a different rate is applied.
     """
 
+    __slots__ = (
+        "name",
+        "description",
+        "price",
+        "dimensions",
+        "serial_number",
+        "quantity",
+        "weight",
+        "manufacturing_country",
+        "_tax_rate",
+    )
+
+    TAX_RATE = 0.17  # Default tax rate
+
     def __init__(
         self,
         name: str,
@@ -25,12 +70,68 @@ class Furniture(ABC):
         self.name = name
         self.description = description
         self.price = price
-        self.dimensions = dimensions
+        self.dimensions = _intern(dimensions)
         self.serial_number = serial_number
         self.quantity = quantity
         self.weight = weight
-        self.manufacturing_country = manufacturing_country
-        self.tax_rate = 0.17  # Default tax rate
+        self.manufacturing_country = _intern(manufacturing_country)
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._fields = _slot_fields(cls)
+
+    def __setstate__(self, state: Any) -> None:
+        """
+        Restores a pickled object, including objects pickled before the slots
+        (e.g. in legacy inventory files) whose state is an attribute dict.
+        """
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
+    @property
+    def tax_rate(self) -> float:
+        return getattr(self, "_tax_rate", self.TAX_RATE)
+
+    @tax_rate.setter
+    def tax_rate(self, tax_rate: float) -> None:
+        self._tax_rate = tax_rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the attributes of the furniture object.
+
+        :return: Dictionary of attribute names and values, attributes that were
+                 never set are left out.
+        """
+        values = {
+            attr: getattr(self, attr) for attr in self._fields if hasattr(self, attr)
+        }
+        values["tax_rate"] = self.tax_rate
+        return values
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Furniture":
+        """
+        Rebuilds a furniture object from a stored inventory record.
+
+        Stored records were validated when they entered the inventory, and stock may
+        legitimately be 0, so the constructor checks are skipped here.
+
+        :param record: Dictionary of attribute names and values.
+        :return: An instance of cls holding the record values.
+        """
+        obj = cls.__new__(cls)
+        for attr, value in record.items():
+            if attr in INTERNED_ATTRIBUTES:
+                value = _intern(value)
+            setattr(obj, attr, value)
+        return obj
+
+    @property
+    def price_cents(self) -> Cents:
+        return to_cents(self.price)
 
     @property
     def item_desc(self) -> str:
@@ -53,14 +154,16 @@ class Furniture(ABC):
     def apply_discount(self, discount_percentage: float) -> float:
         if discount_percentage < 0 or discount_percentage > 100:
             raise ValueError("Discount percentage must be between 0 and 100.")
-        self.price = round(self.price * (1 - discount_percentage / 100), 2)
+        self.price = to_amount(
+            scale(self.price_cents, percent_factor(-discount_percentage))
+        )
         return self.price
 
     def apply_tax(self, tax_rate: Optional[float] = None) -> None:
         if tax_rate is not None:
             self._validate_positive_value(tax_rate, "Tax rate")
             self.tax_rate = tax_rate
-        self.price = round(self.price * (1 + self.tax_rate), 2)
+        self.price = to_amount(scale(self.price_cents, rate_factor(self.tax_rate)))
 
     @staticmethod
     def _validate_positive_value(value, field_name):
@@ -75,7 +178,12 @@ class Furniture(ABC):
             raise ValueError(f"{field_name} must be a positive value.")
 
 
+Furniture._fields = _slot_fields(Furniture)
+
+
 class Chair(Furniture):
+    __slots__ = ("has_wheels", "how_many_legs")
+
     def __init__(
         self, has_wheels: bool = False, how_many_legs: int = 4, **kwargs
     ) -> None:
@@ -85,6 +193,8 @@ class Chair(Furniture):
 
 
 class Sofa(Furniture):
+    __slots__ = ("how_many_seats", "can_turn_to_bed")
+
     def __init__(
         self, how_many_seats: int = 3, can_turn_to_bed: bool = False, **kwargs
     ) -> None:
@@ -94,6 +204,8 @@ class Sofa(Furniture):
 
 
 class Bed(Furniture):
+    __slots__ = ("has_storage", "has_back")
+
     def __init__(
         self, has_storage: bool = False, has_back: bool = False, **kwargs
     ) -> None:
@@ -103,6 +215,8 @@ class Bed(Furniture):
 
 
 class Table(Furniture):
+    __slots__ = ("expandable", "how_many_seats", "can_fold")
+
     def __init__(
         self,
         expandable: bool = False,
@@ -117,6 +231,8 @@ class Table(Furniture):
 
 
 class Closet(Furniture):
+    __slots__ = ("has_mirrors", "number_of_shelves", "how_many_doors")
+
     def __init__(
         self,
         has_mirrors: bool = False,
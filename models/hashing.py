@@ -0,0 +1,197 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Callable, Dict, Optional, TypeVar
+
+import bcrypt
+
+# Default sizing of the password worker pool. bcrypt releases the GIL while it
+# hashes, so a few threads run in parallel on separate cores.
+DEFAULT_MAX_WORKERS: int = 4
+# Jobs allowed to wait for a free worker before new ones are rejected
+DEFAULT_MAX_QUEUE: int = 32
+
+T = TypeVar("T")
+
+
+class HasherSaturatedError(RuntimeError):
+    """
+    Raised when the password worker pool and its queue are full, or a job does
+    not finish within the timeout of the pool.
+    """
+
+
+# -------- PasswordHasher CLASS -------- #
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded pool of worker threads.
+
+    At most max_workers jobs run at once and at most max_queue more wait for a
+    worker, a job submitted beyond that raises HasherSaturatedError right away
+    instead of stalling the calling request.
+    """
+
+    _instance: Optional["PasswordHasher"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the worker pool.
+
+        param:
+            max_workers: Number of threads running bcrypt.
+            max_queue: Number of jobs allowed to wait for a free thread.
+            timeout: Seconds a caller waits for its result, None waits forever.
+        """
+        if max_workers <= 0 or max_queue < 0:
+            raise ValueError("Invalid password worker pool size.")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+        self._max_wait = 0.0
+        self._max_run = 0.0
+
+    @classmethod
+    def get_instance(cls) -> "PasswordHasher":
+        """
+        Return the shared worker pool, created with the default sizing on first use.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def configure(
+        cls,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        timeout: Optional[float] = None,
+    ) -> "PasswordHasher":
+        """
+        Replace the shared worker pool with a new one of the given size.
+        """
+        hasher = cls(max_workers, max_queue, timeout)
+        with cls._instance_lock:
+            old, cls._instance = cls._instance, hasher
+        if old is not None:
+            old.shutdown()
+        return hasher
+
+    def _run(self, func: Callable[..., T], *args) -> T:
+        """
+        Run a job on the pool and wait for its result.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherSaturatedError("Password worker pool is saturated.")
+        with self._lock:
+            self._in_flight += 1
+        submitted = time.perf_counter()
+
+        def job() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._running -= 1
+                    self._in_flight -= 1
+                    self.completed += 1
+                    self._total_wait += started - submitted
+                    self._total_run += finished - started
+                    self._max_wait = max(self._max_wait, started - submitted)
+                    self._max_run = max(self._max_run, finished - started)
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(job)
+        except RuntimeError:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+            raise
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # A job still waiting for a worker is dropped, one already running
+            # finishes on its own and frees its slot then
+            if future.cancel():
+                with self._lock:
+                    self._in_flight -= 1
+                self._slots.release()
+            with self._lock:
+                self.rejected += 1
+            raise HasherSaturatedError("Password worker pool timed out.") from None
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password with bcrypt on the worker pool.
+
+        param:
+            password: The plain text password.
+
+        return:
+            The hashed password.
+        """
+        return self._run(
+            lambda: bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        )
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """
+        Check a password against a bcrypt hash on the worker pool.
+
+        param:
+            password: The plain text password.
+            hashed: The stored bcrypt hash.
+
+        return:
+            True if the password matches.
+        """
+        return self._run(lambda: bcrypt.checkpw(password.encode(), hashed.encode()))
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Return the pool counters, queue depth and latencies (in milliseconds).
+        """
+        with self._lock:
+            completed = self.completed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._in_flight - self._running,
+                "completed": completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": self._total_wait / completed * 1000 if completed else 0.0,
+                "avg_run_ms": self._total_run / completed * 1000 if completed else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+                "max_run_ms": self._max_run * 1000,
+            }
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker threads once the queued jobs are done.
+        """
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,209 @@
+import heapq
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Default lifetime of a stock hold and interval of the background sweeper (seconds)
+DEFAULT_HOLD_TTL: float = 15 * 60
+DEFAULT_SWEEP_INTERVAL: float = 5.0
+
+
+class Hold(NamedTuple):
+    """
+    Stock held for one cart line.
+
+    Attributes:
+        owner: The owner of the hold (e.g. the user ID of the cart).
+        serial_number: Serial number of the held item.
+        quantity: Number of units held.
+        expires_at: Clock time after which the hold is released.
+    """
+
+    owner: str
+    serial_number: str
+    quantity: int
+    expires_at: float
+
+
+# -------- HoldManager CLASS -------- #
+class HoldManager:
+    """
+    Time-limited stock holds for items sitting in shopping carts.
+
+    Every hold is an inventory reservation that is released automatically once
+    its TTL passes. Expiry times are kept in a min-heap, so a sweep only looks at
+    the holds that expired (released or taken holds are skipped lazily when they
+    reach the top of the heap), and all expired holds are released in one batch.
+    """
+
+    def __init__(
+        self,
+        inventory,
+        ttl: float = DEFAULT_HOLD_TTL,
+        sweep_interval: float = DEFAULT_SWEEP_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize the hold manager.
+
+        param:
+            inventory: The Inventory the stock is held in.
+            ttl: Seconds a hold lasts.
+            sweep_interval: Seconds between two sweeps of the background thread.
+            clock: Time source, monotonic by default.
+        """
+        if ttl <= 0 or sweep_interval <= 0:
+            raise ValueError("Hold TTL and sweep interval must be positive values.")
+        self.inventory = inventory
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        # reservation_id -> hold
+        self._holds: Dict[str, Hold] = {}
+        self._by_owner: Dict[str, Set[str]] = {}
+        # (expires_at, reservation_id), may hold entries of released holds
+        self._heap: List[Tuple[float, str]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._holds)
+
+    def hold(self, owner: str, serial_number: str, quantity: int) -> str:
+        """
+        Hold stock of an item for an owner.
+
+        param:
+            owner: The owner of the hold.
+            serial_number: Serial number of the item.
+            quantity: Number of units to hold.
+
+        return:
+            The reservation ID of the hold.
+
+        raise:
+            InsufficientStockError: If the stock can not be held.
+        """
+        reservation_id = self.inventory.reserve({serial_number: quantity})
+        expires_at = self._clock() + self.ttl
+        with self._lock:
+            self._holds[reservation_id] = Hold(
+                owner, serial_number, quantity, expires_at
+            )
+            self._by_owner.setdefault(owner, set()).add(reservation_id)
+            heapq.heappush(self._heap, (expires_at, reservation_id))
+        return reservation_id
+
+    def held(self, owner: str) -> Dict[str, int]:
+        """
+        Return the quantities held for an owner per serial number.
+        """
+        with self._lock:
+            quantities: Dict[str, int] = {}
+            for reservation_id in self._by_owner.get(owner, ()):
+                hold = self._holds[reservation_id]
+                quantities[hold.serial_number] = (
+                    quantities.get(hold.serial_number, 0) + hold.quantity
+                )
+            return quantities
+
+    def _detach(self, owner: str, serial_number: Optional[str] = None) -> List[str]:
+        """
+        Stop tracking the holds of an owner (of one item, or all), the caller
+        decides whether their reservations are committed or released.
+        """
+        with self._lock:
+            reservation_ids = [
+                reservation_id
+                for reservation_id in self._by_owner.get(owner, ())
+                if serial_number is None
+                or self._holds[reservation_id].serial_number == serial_number
+            ]
+            for reservation_id in reservation_ids:
+                del self._holds[reservation_id]
+                self._by_owner[owner].discard(reservation_id)
+            if not self._by_owner.get(owner, True):
+                del self._by_owner[owner]
+        return reservation_ids
+
+    def release(self, owner: str, serial_number: Optional[str] = None) -> int:
+        """
+        Release the holds of an owner, on one item or on all of them.
+
+        return:
+            Number of holds released.
+        """
+        reservation_ids = self._detach(owner, serial_number)
+        return self.inventory.release_all(reservation_ids)
+
+    def take(self, owner: str) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Hand the holds of an owner over to the caller, e.g. at checkout.
+
+        The holds stop expiring, and the caller commits or releases the
+        returned reservations.
+
+        return:
+            The reservation IDs of the holds and the quantities they hold per
+            serial number.
+        """
+        quantities = self.held(owner)
+        return self._detach(owner), quantities
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Release every hold whose TTL has passed.
+
+        param:
+            now: Current clock time, read from the clock if None.
+
+        return:
+            Number of holds released.
+        """
+        now = self._clock() if now is None else now
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, reservation_id = heapq.heappop(self._heap)
+                hold = self._holds.pop(reservation_id, None)
+                if hold is None:
+                    continue  # Already released or taken
+                owner_holds = self._by_owner[hold.owner]
+                owner_holds.discard(reservation_id)
+                if not owner_holds:
+                    del self._by_owner[hold.owner]
+                expired.append(reservation_id)
+        return self.inventory.release_all(expired) if expired else 0
+
+    def _run(self) -> None:
+        """
+        Body of the background sweeper thread.
+        """
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Failed to release expired stock holds: {e}")
+
+    def start(self) -> None:
+        """
+        Start the background sweeper thread if it is not running.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="stock-hold-sweeper", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background sweeper thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,502 @@
+import re
+from bisect import bisect_left, bisect_right
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Tokens are lower-cased runs of letters and digits
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Ranking weights - a hit in the name counts more than a hit in the description,
+# and a prefix hit counts less than a whole-token hit
+NAME_WEIGHT: float = 2.0
+DESCRIPTION_WEIGHT: float = 1.0
+PREFIX_FACTOR: float = 0.5
+
+
+# -------- Helper Func -------- #
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into lower-cased alphanumeric tokens.
+    """
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+# -------- PriceIndex CLASS -------- #
+class PriceIndex:
+    """
+    Keeps serial numbers sorted by price so that price-range queries are answered
+    with binary search instead of a scan over the whole inventory.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[float, str]] = ()) -> None:
+        """
+        Initialize the index from (price, serial_number) pairs.
+
+        param:
+            entries: Pairs of price and serial number to index.
+        """
+        ordered = sorted(entries)
+        self._prices: List[float] = [price for price, _ in ordered]
+        self._serials: List[str] = [serial for _, serial in ordered]
+        # True while the arrays are shared with a copy
+        self._shared = False
+
+    def __len__(self) -> int:
+        return len(self._serials)
+
+    def copy(self) -> "PriceIndex":
+        """
+        Return an independent copy of the index. The arrays are shared until
+        either index changes, which copies them first.
+        """
+        clone = PriceIndex.__new__(PriceIndex)
+        clone._prices = self._prices
+        clone._serials = self._serials
+        clone._shared = self._shared = True
+        return clone
+
+    def _own(self) -> None:
+        """
+        Copy the arrays shared with a copy before changing them.
+        """
+        if self._shared:
+            self._prices = self._prices.copy()
+            self._serials = self._serials.copy()
+            self._shared = False
+
+    def add(self, serial_number: str, price: float) -> None:
+        """
+        Insert an item, keeping the arrays sorted by price.
+
+        param:
+            serial_number: Serial number of the item.
+            price: Price of the item.
+        """
+        self._own()
+        pos = bisect_right(self._prices, price)
+        self._prices.insert(pos, price)
+        self._serials.insert(pos, serial_number)
+
+    def remove(self, serial_number: str, price: float) -> bool:
+        """
+        Remove an item from the index.
+
+        param:
+            serial_number: Serial number of the item.
+            price: Price the item was indexed with.
+
+        return:
+            True if the item was removed and False if it was not indexed.
+        """
+        lo = bisect_left(self._prices, price)
+        hi = bisect_right(self._prices, price)
+        for pos in range(lo, hi):
+            if self._serials[pos] == serial_number:
+                self._own()
+                del self._prices[pos]
+                del self._serials[pos]
+                return True
+        return False
+
+    def range(self, min_price: float, max_price: float) -> List[str]:
+        """
+        Return the serial numbers priced between min_price and max_price (inclusive),
+        ordered from the cheapest item.
+
+        param:
+            min_price: Lower bound of the range.
+            max_price: Upper bound of the range.
+
+        return:
+            List of serial numbers in price order.
+        """
+        lo = bisect_left(self._prices, min_price)
+        hi = bisect_right(self._prices, max_price)
+        return self._serials[lo:hi]
+
+
+# -------- PrefixTrie CLASS -------- #
+class PrefixTrie:
+    """
+    Character trie over the indexed tokens, used to expand a prefix to all the
+    tokens starting with it.
+
+    Copies share their nodes. Changes use path copying: the nodes on the path of
+    the changed token are copied unless this trie created them, so a change
+    costs O(token length) whatever the size of the trie.
+    """
+
+    _END = "$"  # Key marking that a whole token ends at this node
+
+    def __init__(self) -> None:
+        self._root: Dict[str, dict] = {}
+        # id -> node of the nodes only this trie holds, None while it shares none
+        self._owned: Optional[Dict[int, dict]] = None
+
+    def copy(self) -> "PrefixTrie":
+        """
+        Return an independent copy of the trie, sharing all the nodes.
+        """
+        clone = PrefixTrie.__new__(PrefixTrie)
+        clone._root = self._root
+        clone._owned = {}
+        self._owned = {}
+        return clone
+
+    def _own_node(self, node: Optional[dict] = None) -> dict:
+        """
+        Return a node this trie may change: the node itself if the trie created
+        it, else a copy of it (a new node if None).
+        """
+        if node is not None and (
+            self._owned is None or self._owned.get(id(node)) is node
+        ):
+            return node
+        node = {} if node is None else dict(node)
+        if self._owned is not None:
+            self._owned[id(node)] = node
+        return node
+
+    def insert(self, token: str) -> None:
+        """
+        Add a token to the trie.
+        """
+        node = self._root = self._own_node(self._root)
+        for char in token:
+            node[char] = self._own_node(node.get(char))
+            node = node[char]
+        node[self._END] = {}
+
+    def remove(self, token: str) -> None:
+        """
+        Remove a token from the trie, pruning branches left empty.
+        """
+        node = self._root
+        for char in token:
+            if char not in node:
+                return
+            node = node[char]
+        path = []
+        node = self._root = self._own_node(self._root)
+        for char in token:
+            path.append((node, char))
+            node[char] = self._own_node(node[char])
+            node = node[char]
+        node.pop(self._END, None)
+        for parent, char in reversed(path):
+            if parent[char]:
+                break
+            del parent[char]
+
+    def tokens_with_prefix(self, prefix: str) -> List[str]:
+        """
+        Return all the tokens in the trie that start with prefix.
+        """
+        node = self._root
+        for char in prefix:
+            if char not in node:
+                return []
+            node = node[char]
+        tokens = []
+        stack = [(node, prefix)]
+        while stack:
+            node, token = stack.pop()
+            for char, child in node.items():
+                if char == self._END:
+                    tokens.append(token)
+                else:
+                    stack.append((child, token + char))
+        return tokens
+
+
+# -------- TextIndex CLASS -------- #
+class TextIndex:
+    """
+    Inverted index over furniture names and descriptions supporting token and
+    prefix search with ranked results.
+    """
+
+    def __init__(self) -> None:
+        # token -> {serial_number: weight}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        # serial_number -> indexed tokens, used for removal
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        self._trie = PrefixTrie()
+        # True while the tables above are shared with a copy, and the tokens
+        # whose postings only this index holds (None while it shares none)
+        self._shared = False
+        self._owned: Optional[Set[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def copy(self) -> "TextIndex":
+        """
+        Return an independent copy of the index. Both share the tables until
+        they change, then only the postings of the changed tokens are copied.
+        """
+        clone = TextIndex.__new__(TextIndex)
+        clone._postings = self._postings
+        # Token sets are replaced, never changed in place, so they can be shared
+        clone._doc_tokens = self._doc_tokens
+        clone._trie = self._trie.copy()
+        for index in (self, clone):
+            index._shared = True
+            index._owned = set()
+        return clone
+
+    def _own(self) -> None:
+        """
+        Copy the tables shared with a copy before changing them.
+        """
+        if self._shared:
+            self._postings = dict(self._postings)
+            self._doc_tokens = dict(self._doc_tokens)
+            self._shared = False
+
+    def _own_postings(self, token: str) -> Dict[str, float]:
+        """
+        The postings of a token, copied first if shared with a copy, or created
+        (and added to the trie) for a new token.
+        """
+        postings = self._postings.get(token)
+        if postings is None:
+            postings = self._postings[token] = {}
+            self._trie.insert(token)
+        elif self._owned is not None and token not in self._owned:
+            postings = self._postings[token] = dict(postings)
+        else:
+            return postings
+        if self._owned is not None:
+            self._owned.add(token)
+        return postings
+
+    def add(self, serial_number: str, name: str, description: str) -> None:
+        """
+        Index the name and description of an item.
+
+        param:
+            serial_number: Serial number of the item.
+            name: Name of the item.
+            description: Description of the item.
+        """
+        weights: Dict[str, float] = {}
+        for token in tokenize(name):
+            weights[token] = weights.get(token, 0.0) + NAME_WEIGHT
+        for token in tokenize(description):
+            weights[token] = weights.get(token, 0.0) + DESCRIPTION_WEIGHT
+        self._own()
+        for token, weight in weights.items():
+            self._own_postings(token)[serial_number] = weight
+        self._doc_tokens[serial_number] = set(weights)
+
+    def remove(self, serial_number: str) -> bool:
+        """
+        Remove an item from the index.
+
+        return:
+            True if the item was removed and False if it was not indexed.
+        """
+        if serial_number not in self._doc_tokens:
+            return False
+        self._own()
+        for token in self._doc_tokens.pop(serial_number):
+            postings = self._own_postings(token)
+            del postings[serial_number]
+            if not postings:
+                del self._postings[token]
+                self._owned and self._owned.discard(token)
+                self._trie.remove(token)
+        return True
+
+    def search(self, query: str) -> List[str]:
+        """
+        Find the items matching every token of the query, either as a whole token
+        or as a prefix of an indexed token.
+
+        param:
+            query: Free text query.
+
+        return:
+            Serial numbers ordered from the best match.
+        """
+        scores: Dict[str, float] = {}
+        for position, query_token in enumerate(dict.fromkeys(tokenize(query))):
+            token_scores: Dict[str, float] = {}
+            for token in self._trie.tokens_with_prefix(query_token):
+                factor = 1.0 if token == query_token else PREFIX_FACTOR
+                for serial, weight in self._postings[token].items():
+                    score = weight * factor
+                    if score > token_scores.get(serial, 0.0):
+                        token_scores[serial] = score
+            if position == 0:
+                scores = token_scores
+            else:
+                scores = {
+                    serial: score + token_scores[serial]
+                    for serial, score in scores.items()
+                    if serial in token_scores
+                }
+            if not scores:
+                return []
+        return sorted(scores, key=lambda serial: (-scores[serial], serial))
+
+
+# -------- BitmapIndex CLASS -------- #
+class BitmapIndex:
+    """
+    Bitmap indexes over low-cardinality attributes (flags, small counts).
+
+    The index is aligned with the rows of a table: each (attribute, value) pair
+    keeps a numpy boolean array marking the row positions holding that value, so
+    combining several predicates is a vectorized AND. Values are keyed with
+    their type, e.g. 1 does not match True.
+    """
+
+    def __init__(self) -> None:
+        # Number of indexed rows, the arrays may be longer (free capacity) or
+        # shorter (no later row holds the value)
+        self._size = 0
+        # attribute -> (type, value) -> boolean array over the rows
+        self._bitmaps: Dict[str, Dict[Tuple[type, Any], np.ndarray]] = {}
+        # The attributes whose arrays only this index holds (None while it
+        # shares none with a copy)
+        self._owned: Optional[Set[str]] = None
+
+    @classmethod
+    def from_masks(
+        cls, size: int, masks: Dict[str, Dict[Any, np.ndarray]]
+    ) -> "BitmapIndex":
+        """
+        Build the index of a whole table at once.
+
+        param:
+            size: Number of rows of the table.
+            masks: Attribute -> value -> boolean array of the rows holding it.
+        """
+        index = cls()
+        index._size = size
+        for attribute, by_value in masks.items():
+            bitmaps = index._bitmaps.setdefault(attribute, {})
+            for value, mask in by_value.items():
+                bitmaps[cls._key(value)] = np.asarray(mask, dtype=bool)
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, attribute: str) -> bool:
+        return attribute in self._bitmaps
+
+    @staticmethod
+    def _key(value: Any) -> Tuple[type, Any]:
+        """
+        The key of a value, numpy scalars are keyed as the Python value.
+        """
+        if isinstance(value, np.generic):
+            value = value.item()
+        return type(value), value
+
+    def copy(self) -> "BitmapIndex":
+        """
+        Return an independent copy of the index. Both share the arrays until
+        they change, then only the arrays of the changed attributes are copied.
+        """
+        clone = BitmapIndex.__new__(BitmapIndex)
+        clone._size = self._size
+        clone._bitmaps = {k: dict(v) for k, v in self._bitmaps.items()}
+        for index in (self, clone):
+            index._owned = set()
+        return clone
+
+    def _own_bitmaps(self, attribute: str) -> Dict[Tuple[type, Any], np.ndarray]:
+        """
+        The (type, value) -> array table of an attribute, with its arrays copied
+        first if shared with a copy.
+        """
+        by_value = self._bitmaps.setdefault(attribute, {})
+        if self._owned is not None and attribute not in self._owned:
+            for key, bitmap in by_value.items():
+                by_value[key] = bitmap.copy()
+            self._owned.add(attribute)
+        return by_value
+
+    def add(self, attributes: Dict[str, Any]) -> int:
+        """
+        Index the attribute values of a row appended to the table.
+
+        param:
+            attributes: Attribute values of the row (None values are skipped).
+
+        return:
+            Position of the row.
+        """
+        position = self._size
+        for attribute, value in attributes.items():
+            if value is None:
+                continue
+            by_value = self._own_bitmaps(attribute)
+            key = self._key(value)
+            bitmap = by_value.get(key)
+            if bitmap is None or len(bitmap) <= position:
+                # Grow by doubling so appends cost amortized O(1)
+                grown = np.zeros(max(2 * position, 16), dtype=bool)
+                if bitmap is not None:
+                    grown[: len(bitmap)] = bitmap
+                bitmap = by_value[key] = grown
+            bitmap[position] = True
+        self._size += 1
+        return position
+
+    def remove(self, position: int) -> bool:
+        """
+        Remove a row from the index, the later rows move up by one position.
+
+        return:
+            True if the row was removed and False if it was not indexed.
+        """
+        if not 0 <= position < self._size:
+            return False
+        self._size -= 1
+        for attribute in list(self._bitmaps):
+            by_value = self._own_bitmaps(attribute)
+            for key, bitmap in list(by_value.items()):
+                if len(bitmap) > position:
+                    bitmap = by_value[key] = np.delete(bitmap, position)
+                if not bitmap[: self._size].any():
+                    del by_value[key]
+            if not by_value:
+                del self._bitmaps[attribute]
+                if self._owned:
+                    self._owned.discard(attribute)
+        return True
+
+    def _bitmap(self, attribute: str, value: Any) -> np.ndarray:
+        """
+        The rows holding a value, or one of a list/tuple/set of values.
+        """
+        by_value = self._bitmaps.get(attribute, {})
+        values = value if isinstance(value, (list, tuple, set)) else (value,)
+        bitmap = np.zeros(self._size, dtype=bool)
+        for value in values:
+            rows = by_value.get(self._key(value))
+            if rows is not None:
+                end = min(len(rows), self._size)
+                bitmap[:end] |= rows[:end]
+        return bitmap
+
+    def match(self, predicates: Dict[str, Any]) -> np.ndarray:
+        """
+        Build the bitmap of the rows satisfying all the predicates.
+
+        param:
+            predicates: Attribute -> required value, or a list/tuple/set of
+            accepted values.
+
+        return:
+            Boolean array over the rows.
+        """
+        result = np.ones(self._size, dtype=bool)
+        for attribute, expected in predicates.items():
+            result &= self._bitmap(attribute, expected)
+        return result
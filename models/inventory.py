@@ -1,9 +1,34 @@
 import sys
 import os
+import uuid
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
-from typing import Optional, Dict, List, Tuple, Union
-from models.factory import FurnitureFactory
+from typing import (
+    Optional,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Set,
+    Tuple,
+    Union,
+    Any,
+)
+from models.factory import FurnitureFactory, FURNITURE_CLASSES
 from models.furniture import Furniture
+from models.indexes import BitmapIndex, PriceIndex, TextIndex, tokenize
+from models.cache import QueryCache
+from models.columns import ColumnStore
+from models.concurrency import LockStripes, RWLock, write_locked
+from models.money import percent_factor, scale, to_amount, to_cents, to_cents_array
+from models.storage import (
+    NegativeValueError,
+    PickleBackend,
+    SQLiteBackend,
+    StorageBackend,
+)
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -13,35 +38,200 @@ INVEN_FILE: str = os.path.join(
     os.path.join(os.path.dirname(__file__), ".."), "data/inventory.pkl"
 )
 
+# Columnar schema of the inventory table - one row per furniture item
+BASE_COLUMNS: Dict[str, str] = {
+    "serial_number": "object",
+    "type": "object",
+    "name": "object",
+    "description": "object",
+    "price": "float64",
+    "dimensions": "object",
+    "quantity": "int64",
+    "weight": "float64",
+    "manufacturing_country": "object",
+}
+
+# Type-specific attributes, nullable since each applies to some categories only
+ATTRIBUTE_COLUMNS: Dict[str, str] = {
+    "has_wheels": "boolean",
+    "how_many_legs": "Int64",
+    "can_turn_to_bed": "boolean",
+    "how_many_seats": "Int64",
+    "expandable": "boolean",
+    "can_fold": "boolean",
+    "has_storage": "boolean",
+    "has_back": "boolean",
+    "has_mirrors": "boolean",
+    "number_of_shelves": "Int64",
+    "how_many_doors": "Int64",
+}
+
+SCHEMA: Dict[str, str] = {**BASE_COLUMNS, **ATTRIBUTE_COLUMNS}
+
+# Columns written in place without a new layout (stock changes), searches
+# filtering on them are not cached
+VOLATILE_COLUMNS = ("quantity",)
+
+# Attributes that are kept on Furniture objects but not stored as columns
+NON_STORED_ATTRIBUTES = ("tax_rate",)
+
+
+# -------- Helper Func -------- #
+def sqlite_backend(db_path: str) -> SQLiteBackend:
+    """
+    SQLite storage for the inventory, indexed by category and price.
+
+    param:
+    db_path: Path to the database file.
+
+    return:
+    Backend to pass to Inventory.
+    """
+    return SQLiteBackend(
+        db_path, "inventory", "serial_number", SCHEMA, ["type", "price"]
+    )
+
+
+class InsufficientStockError(ValueError):
+    """
+    Raised when a reservation asks for more stock than is available.
+
+    Attributes:
+        shortfalls: Serial number -> {"requested", "available"} of the lines
+        that cannot be supplied.
+    """
+
+    def __init__(self, shortfalls: Dict[str, Dict[str, int]]) -> None:
+        super().__init__(
+            "Insufficient stock for: " + ", ".join(sorted(shortfalls))
+        )
+        self.shortfalls = shortfalls
+
+
+class PriceChange(NamedTuple):
+    """
+    New price of an item changed (or previewed) by Inventory.reprice.
+    """
+
+    serial_number: str
+    old_price: float
+    new_price: float
+
+
+class InventorySnapshot(NamedTuple):
+    """
+    Immutable version of the inventory published by its writers.
+
+    Attributes:
+        version: Number of the version, increased on every publication.
+        layout: Changes only when items are added, removed or repriced, i.e.
+        when row positions or the order of price-range results change.
+        frame: The inventory table. Its stock column is changed in place by
+        reservations, unless the snapshot was taken with Inventory.snapshot().
+        serial_index: serial_number -> row position, items added later may show
+        at positions past the table.
+        price_index: Sorted price indexes per category.
+        all_prices: Sorted price index of the whole inventory.
+        text_index: Inverted index over names and descriptions.
+        attribute_index: Bitmap indexes over the type-specific attributes.
+    """
+
+    version: int
+    layout: int
+    frame: pd.DataFrame
+    serial_index: Dict[str, int]
+    price_index: Dict[str, PriceIndex]
+    all_prices: PriceIndex
+    text_index: TextIndex
+    attribute_index: BitmapIndex
+
 
 class Inventory:
     """
     Class Inventory to manage available furniture items.
 
+    Items are stored in a columnar DataFrame (one row per item, typed columns),
+    and Furniture objects are only created when results are returned to callers.
+
     Features:
     - Add, remove, and update the quantity of furniture items.
     - Search for furniture items by attributes such as name, category, and price range.
+    - Price-range searches use sorted price indexes (per category and global).
+    - Free-text search over names and descriptions uses an inverted index.
+    - Type-specific attribute filters use bitmap indexes.
+    - Search results are cached until items are added or removed.
+    - Safe to share between threads. Writers are exclusive and publish an
+      immutable InventorySnapshot when they are done, readers use the latest
+      snapshot without taking any lock, so they never wait for writers and
+      always see a consistent catalog. Old snapshots are freed once no reader
+      holds them anymore.
+    - Reservations change the stock in place under per-item locks, so checkouts
+      of different items run in parallel.
     """
 
-    def __init__(self, file_path: str = INVEN_FILE) -> None:
+    def __init__(
+        self,
+        file_path: str = INVEN_FILE,
+        query_cache: Optional[QueryCache] = None,
+        backend: Optional[StorageBackend] = None,
+    ) -> None:
         """
         Initialize the Inventory class with the given file path.
 
         Parameters:
         file_path: Path to the pickle file containing inventory data.
+        query_cache: Cache for search results, a default sized one if None.
+        backend: Storage of the inventory, the pickle file if None.
         """
         self.file_path = file_path
+        self.backend = (
+            backend if backend is not None else PickleBackend(file_path, "serial_number")
+        )
+        # Writers hold the write side, readers only use the published snapshot
+        self._lock = RWLock()
+        self.query_cache = query_cache if query_cache is not None else QueryCache()
+        # Bumped when items are added, removed or repriced, invalidates the
+        # cached search results (row positions), stock changes keep them valid
+        self._generation = 0
+        self._version = 0
+        # Nested batch() blocks, publication waits for the outermost one
+        self._batch_depth = 0
+        # Serial numbers changed since the last save, see flush()
+        self._dirty_serials: Set[str] = set()
+        self._dirty = False
+        # Columns of the inventory table, new items are appended in place
+        self._table = ColumnStore(SCHEMA)
+        # The table wrapping the columns, rebuilt after rows were added or
+        # removed (see _consolidate)
+        self._frame: pd.DataFrame = self._table.frame()
+        self._frame_stale = False
+        # Hash index of serial_number -> row position for O(1) lookups. Added
+        # items are inserted in place, the snapshots sharing it skip positions
+        # past their table, removals build a new one.
+        self._serial_index: Dict[str, int] = {}
+        # Sorted price indexes per category and for the whole inventory
+        self._price_index: Dict[str, PriceIndex] = {}
+        self._all_prices = PriceIndex()
+        # Inverted index over names and descriptions for free-text search
+        self._text_index = TextIndex()
+        # Bitmap indexes over the type-specific attributes
+        self._attribute_index = BitmapIndex()
+        # The table and indexes above are the writers' working copy. Once
+        # published they are shared with the snapshot, the indexes and the stock
+        # column are copied (lazily, see _own_indexes) before the next change.
+        self._indexes_shared = False
+        self._stock_shared = False
+        # Per serial number locks of the stock changed in place (see
+        # _stock_lock), and the stock column of the snapshot last taken with
+        # snapshot(), which must not change anymore
+        self._stock_locks = LockStripes()
+        self._pinned_stock: Optional[np.ndarray] = None
+        # Open reservations (reservation_id -> serial_number -> quantity)
+        self._reservations: Dict[str, Dict[str, int]] = {}
+        self._publish()
         try:
-            # Check if file exists , if not create new one
-            if not os.path.exists(file_path):
-                data = {
-                    "Chair": [[]],
-                    "Sofa": [[]],
-                    "Table": [[]],
-                    "Bed": [[]],
-                    "Closet": [[]],
-                }
-                self.data = pd.DataFrame(data)
+            # Check if the inventory was stored, if not store an empty one
+            if not self.backend.exists():
                 self.update_data()
                 return
             self._load_data()
@@ -50,34 +240,621 @@ class Inventory:
                 "Failed to create Inventory object.\nChenk path to data file."
             )
 
+    @property
+    def data(self) -> pd.DataFrame:
+        """
+        The inventory table, one row per furniture item.
+        """
+        return self._snapshot.frame
+
+    def snapshot(self) -> InventorySnapshot:
+        """
+        The latest published version of the inventory, for several reads that
+        must see the same catalog. Its stock is not changed anymore, the next
+        reservation copies the stock column first.
+        """
+        with self._stock_locks.hold_all():
+            snapshot = self._snapshot
+            self._pinned_stock = snapshot.frame["quantity"].to_numpy()
+        return snapshot
+
+    def _publish(self) -> None:
+        """
+        Publish the working table and indexes as the new snapshot.
+        """
+        if self._batch_depth:
+            return
+        self._consolidate()
+        self._version += 1
+        self._snapshot = InventorySnapshot(
+            self._version,
+            self._generation,
+            self._frame,
+            self._serial_index,
+            self._price_index,
+            self._all_prices,
+            self._text_index,
+            self._attribute_index,
+        )
+        self._indexes_shared = True
+        self._stock_shared = True
+
+    def _own_indexes(self) -> None:
+        """
+        Copy the indexes shared with the published snapshot before changing them.
+
+        The index copies share their contents with the snapshot and only copy
+        the parts a change touches (the trie nodes on the path of a token, the
+        postings of a token, the bitmaps of an attribute). The serial index is
+        not copied (see __init__). The top-level tables of the text index and
+        the price arrays of a category are still copied whole, so bulk changes
+        should use batch(), which copies and publishes once.
+        """
+        if not self._indexes_shared:
+            return
+        self._price_index = {k: v.copy() for k, v in self._price_index.items()}
+        self._all_prices = self._all_prices.copy()
+        self._text_index = self._text_index.copy()
+        self._attribute_index = self._attribute_index.copy()
+        self._indexes_shared = False
+
+    def _own_stock(self) -> None:
+        """
+        Copy the stock column shared with the published snapshot before writing
+        to it in place.
+        """
+        if self._stock_shared:
+            self._table.replace("quantity", self._table.column("quantity"))
+            self._frame_stale = True
+            self._stock_shared = False
+        self._consolidate()
+
+    def _stock_pinned(self) -> bool:
+        """
+        True if a snapshot taken with snapshot() shares the stock column.
+        """
+        return self._pinned_stock is not None and np.may_share_memory(
+            self._pinned_stock, self._table.column("quantity")
+        )
+
+    def _unpin_stock(self) -> None:
+        """
+        Copy the stock column shared with a snapshot taken with snapshot(), and
+        publish the copy for the in-place changes.
+        """
+        with self._stock_locks.hold_all():
+            if self._stock_pinned():
+                self._table.replace("quantity", self._table.column("quantity"))
+                self._frame_stale = True
+                self._pinned_stock = None
+                self._publish()
+
+    @contextmanager
+    def _stock_lock(self, serials: Iterable[str]) -> Iterator[None]:
+        """
+        Lock the stock of items for a change made in place, visible to readers
+        at once.
+
+        The read lock keeps writers from moving rows, and the stripes of the
+        serial numbers serialize the changes of the same items, so changes of
+        different items run in parallel. The stock column is only copied when a
+        snapshot taken with snapshot() holds it, or inside a batch, which keeps
+        its changes private until it ends.
+        """
+        with self._lock.read():
+            if self._batch_depth:
+                # Only the thread running the batch can hold the read lock
+                self._own_stock()
+                yield
+                return
+            while True:
+                if self._stock_pinned():
+                    self._unpin_stock()
+                with self._stock_locks.hold(serials):
+                    # Pinned again meanwhile, the column must be copied again
+                    if not self._stock_pinned():
+                        yield
+                        return
+
+    @contextmanager
+    def batch(self) -> Iterator["Inventory"]:
+        """
+        Group several changes (e.g. a bulk restock) into one published version.
+
+        Readers keep seeing the previous version until the block ends, and the
+        indexes are copied at most once for the whole batch.
+        """
+        with self._lock.write():
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                self._publish()
+
+    @staticmethod
+    def _empty_frame() -> pd.DataFrame:
+        """
+        Create an empty inventory table with the typed columns of the schema.
+        """
+        return pd.DataFrame(
+            {col: pd.Series(dtype=dtype) for col, dtype in SCHEMA.items()}
+        )
+
+    @staticmethod
+    def _apply_schema(frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Make sure a table holds all schema columns with their declared types.
+        """
+        for col, dtype in SCHEMA.items():
+            if col not in frame.columns:
+                frame[col] = pd.Series(dtype=dtype, index=frame.index)
+        return frame.astype(SCHEMA)
+
+    @staticmethod
+    def _from_legacy(legacy: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert the old one-row table holding lists of Furniture objects per
+        category to the columnar layout.
+        """
+        rows = [
+            Inventory._to_record(obj)
+            for class_name in legacy.columns
+            for obj in legacy[class_name][0]
+        ]
+        return pd.DataFrame(rows) if rows else Inventory._empty_frame()
+
+    @staticmethod
+    def _to_record(furniture_obj: Furniture) -> Dict[str, Any]:
+        """
+        Convert a Furniture object to an inventory row.
+        """
+        record = {
+            k: v for k, v in furniture_obj.to_dict().items()
+            if k not in NON_STORED_ATTRIBUTES
+        }
+        record["type"] = type(furniture_obj).__name__
+        return record
+
+    @staticmethod
+    def _to_furniture(record: Dict[str, Any]) -> Furniture:
+        """
+        Materialize an inventory row as a Furniture object.
+        """
+        furniture_type = record.pop("type")
+        values = {k: v for k, v in record.items() if not pd.isna(v)}
+        return FURNITURE_CLASSES[furniture_type].from_record(values)
+
+    def _materialize(self, rows: pd.DataFrame) -> List[Furniture]:
+        """
+        Materialize the given table rows as a list of Furniture objects.
+        """
+        return [self._to_furniture(r) for r in rows.to_dict(orient="records")]
+
+    def _consolidate(self) -> None:
+        """
+        Wrap the current columns in the working table after rows were added or
+        removed, without copying them.
+        """
+        if self._frame_stale:
+            self._frame = self._table.frame()
+            self._frame_stale = False
+
+    def _build_serial_index(self) -> None:
+        """
+        Rebuild the serial_number index from the current inventory table.
+        """
+        serials = self._table.column("serial_number").tolist()
+        self._serial_index = dict(zip(serials, range(len(serials))))
+
+    def _build_price_index(self) -> None:
+        """
+        Rebuild the sorted price indexes from the current inventory table.
+        """
+        self._price_index, self._all_prices = self._price_indexes(
+            self._frame, self._frame["price"].tolist()
+        )
+
+    @staticmethod
+    def _price_indexes(
+        frame: pd.DataFrame, prices: List[float]
+    ) -> Tuple[Dict[str, PriceIndex], PriceIndex]:
+        """
+        Build the sorted price indexes per category and for the whole table, for
+        the given price of each row.
+        """
+        serials = frame["serial_number"].tolist()
+        types = frame["type"].tolist()
+        per_category: Dict[str, List[Tuple[float, str]]] = {}
+        for price, serial, furniture_type in zip(prices, serials, types):
+            per_category.setdefault(furniture_type, []).append((price, serial))
+        price_index = {
+            furniture_type: PriceIndex(entries)
+            for furniture_type, entries in per_category.items()
+        }
+        return price_index, PriceIndex(zip(prices, serials))
+
+    def _build_text_index(self) -> None:
+        """
+        Rebuild the free-text index from the current inventory table.
+        """
+        self._text_index = TextIndex()
+        for serial, name, description in zip(
+            self._frame["serial_number"],
+            self._frame["name"],
+            self._frame["description"],
+        ):
+            self._text_index.add(serial, name, description)
+
+    def _build_attribute_index(self) -> None:
+        """
+        Rebuild the attribute bitmap indexes from the current inventory table.
+        """
+        masks: Dict[str, Dict[Any, np.ndarray]] = {}
+        for attr in ATTRIBUTE_COLUMNS:
+            column = self._frame[attr]
+            masks[attr] = {
+                value: (column == value).to_numpy(dtype=bool, na_value=False)
+                for value in column.dropna().unique().tolist()
+            }
+        self._attribute_index = BitmapIndex.from_masks(len(self._frame), masks)
+
+    def _row_position(self, furniture_atr: Furniture) -> Optional[int]:
+        """
+        Find the row of a furniture object, matching both serial number and type.
+        """
+        pos = self._serial_index.get(furniture_atr.serial_number)
+        if pos is None:
+            return None
+        if self._table.column("type")[pos] != type(furniture_atr).__name__:
+            return None
+        return pos
+
+    @write_locked
     def _load_data(self) -> bool:
         """
-        Load inventory data from a pickle file.
+        Load inventory data from the backend.
 
         return:
         True if data uploaded and False if not.
         """
         try:
-            self.data = pd.read_pickle(self.file_path)
+            frame = self.backend.load()
+            if "serial_number" not in frame.columns:
+                frame = self._from_legacy(frame)
+            self._table = ColumnStore(
+                SCHEMA, self._apply_schema(frame.reset_index(drop=True))
+            )
+            self._frame_stale = True
+            self._consolidate()
+            self._stock_shared = False
+            self._build_serial_index()
+            self._build_price_index()
+            self._build_text_index()
+            self._build_attribute_index()
+            self._indexes_shared = False
+            self._generation += 1
+            self._mark_clean()
+            self._publish()
             return True
         except BaseException:
-            print("Failed to upload data to pickle file, check file path")
+            print("Failed to upload inventory data, check file path")
             return False
 
+    def _mark_dirty(self, serial_number: str) -> None:
+        """
+        Record that an item changed since the last save.
+        """
+        self._dirty = True
+        self._dirty_serials.add(serial_number)
+
+    def _mark_clean(self) -> None:
+        """
+        Record that the stored file matches the inventory.
+        """
+        self._dirty = False
+        self._dirty_serials = set()
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        True if the inventory changed since it was last saved.
+        """
+        return self._dirty
+
+    @property
+    def dirty_serials(self) -> Set[str]:
+        """
+        Serial numbers of the items added, removed or updated since the last save.
+        """
+        return set(self._dirty_serials)
+
+    def get_by_serial(self, serial_number: str) -> Optional[Furniture]:
+        """
+        Retrieve a furniture item by its serial number.
+
+        param:
+        serial_number: Serial number of the furniture item.
+
+        return:
+        The furniture object if found, None otherwise.
+        """
+        snapshot = self._snapshot
+        pos = snapshot.serial_index.get(serial_number)
+        if pos is None or pos >= len(snapshot.frame):
+            return None
+        return self._materialize(snapshot.frame.iloc[[pos]])[0]
+
+    def check_availability(
+        self, lines: Union[Dict[str, int], Iterable[Tuple[str, int]]]
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Check the stock of several items at once.
+
+        All the lines are checked in one pass over the stock column of the latest
+        snapshot, the cost depends on the number of lines and not on the
+        inventory size.
+
+        param:
+        lines: Serial number -> requested quantity, or (serial number, quantity) pairs.
+
+        return:
+        Serial number -> {"requested", "available"} for every line that cannot be
+        fully supplied, an empty dict if all of them can.
+        """
+        snapshot = self._snapshot
+        return self._shortfalls(
+            snapshot.frame, snapshot.serial_index, self._merge_lines(lines)
+        )
+
+    @staticmethod
+    def _merge_lines(
+        lines: Union[Dict[str, int], Iterable[Tuple[str, int]]]
+    ) -> Dict[str, int]:
+        """
+        Sum the requested quantities per serial number.
+        """
+        requested: Dict[str, int] = {}
+        for serial, quantity in lines.items() if isinstance(lines, dict) else lines:
+            requested[serial] = requested.get(serial, 0) + quantity
+        return requested
+
+    @staticmethod
+    def _shortfalls(
+        frame: pd.DataFrame, serial_index: Dict[str, int], requested: Dict[str, int]
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Compare requested quantities with the stock column of a table.
+        """
+        stock = frame["quantity"].to_numpy()
+        shortfalls = {}
+        for serial, quantity in requested.items():
+            pos = serial_index.get(serial)
+            available = 0 if pos is None or pos >= len(stock) else int(stock[pos])
+            if available < quantity:
+                shortfalls[serial] = {"requested": quantity, "available": available}
+        return shortfalls
+
+    def _add_stock(self, lines: Dict[str, int], sign: int) -> None:
+        """
+        Add (sign=1) or deduct (sign=-1) quantities from the stock column, with
+        the stock of the items locked (see _stock_lock).
+
+        A shared backend changes the stored stock first, in one transaction, so
+        other processes selling the same items can not oversell them.
+
+        raise:
+        NegativeValueError: If the stored stock of a shared backend is too low.
+        """
+        if self.backend.shared:
+            self._set_stock(
+                self.backend.adjust(
+                    "quantity", {s: sign * q for s, q in lines.items()}
+                )
+            )
+            return
+        stock = self._table.column("quantity")
+        for serial, quantity in lines.items():
+            pos = self._serial_index.get(serial)
+            if pos is None:
+                continue
+            stock[pos] += sign * quantity
+            self._mark_dirty(serial)
+
+    def _set_stock(self, quantities: Dict[str, int]) -> None:
+        """
+        Set the stock of items to their stored quantities, with the stock of the
+        items locked or the stock column owned (see _own_stock).
+        """
+        stock = self._table.column("quantity")
+        for serial, quantity in quantities.items():
+            pos = self._serial_index.get(serial)
+            if pos is not None:
+                stock[pos] = quantity
+
+    def reserve(
+        self, lines: Union[Dict[str, int], Iterable[Tuple[str, int]]]
+    ) -> str:
+        """
+        Atomically deduct the stock of several items for a pending purchase.
+
+        The lines are first checked against the latest snapshot without locking,
+        so a conflict fails fast, then checked again and deducted with the stock
+        of the items locked: either every line is deducted or none is.
+        Reservations of different items do not wait for each other. The stock
+        stays deducted until the reservation is committed (kept) or released
+        (returned to stock).
+
+        param:
+        lines: Serial number -> quantity, or (serial number, quantity) pairs.
+
+        return:
+        The reservation ID.
+
+        raise:
+        InsufficientStockError: If a line cannot be supplied, listing all of them.
+        """
+        requested = self._merge_lines(lines)
+        if any(quantity <= 0 for quantity in requested.values()):
+            raise ValueError("Reserved quantities must be positive values.")
+        snapshot = self._snapshot
+        shortfalls = self._shortfalls(snapshot.frame, snapshot.serial_index, requested)
+        if shortfalls:
+            raise InsufficientStockError(shortfalls)
+        with self._stock_lock(requested):
+            shortfalls = self._shortfalls(self._frame, self._serial_index, requested)
+            if shortfalls:
+                raise InsufficientStockError(shortfalls)
+            try:
+                self._add_stock(requested, -1)
+            except NegativeValueError as e:
+                # Another process sold the stock first, keep its stored quantities
+                self._set_stock(e.current)
+                raise InsufficientStockError(
+                    {
+                        serial: {"requested": quantity, "available": available}
+                        for serial, quantity in requested.items()
+                        if (available := e.current.get(serial, 0)) < quantity
+                    }
+                )
+            reservation_id = str(uuid.uuid4())
+            self._reservations[reservation_id] = requested
+        return reservation_id
+
+    def commit(self, reservation_id: str) -> bool:
+        """
+        Finalize a reservation, its stock stays deducted.
+
+        return:
+        True if the reservation existed and False if not.
+        """
+        with self._lock.read():
+            lines = self._reservations.pop(reservation_id, None)
+            if lines is None:
+                return False
+            if not self.backend.shared:
+                # Saves made while the reservation was open counted its stock
+                for serial in lines:
+                    self._mark_dirty(serial)
+        return True
+
+    def release(self, reservation_id: str) -> bool:
+        """
+        Cancel a reservation and return its stock to the inventory.
+
+        return:
+        True if the reservation existed and False if not.
+        """
+        return self.release_all([reservation_id]) == 1
+
+    def release_all(self, reservation_ids: Iterable[str]) -> int:
+        """
+        Cancel several reservations at once, their stock is returned in one batch.
+
+        return:
+        Number of reservations released.
+        """
+        lines: Dict[str, int] = {}
+        released = 0
+        with self._lock.read():
+            for reservation_id in reservation_ids:
+                reserved = self._reservations.pop(reservation_id, None)
+                if reserved is None:
+                    continue
+                released += 1
+                for serial, quantity in reserved.items():
+                    lines[serial] = lines.get(serial, 0) + quantity
+            if lines:
+                with self._stock_lock(lines):
+                    self._add_stock(lines, 1)
+        return released
+
+    @write_locked
     def update_data(self) -> bool:
         """
-        Save the current inventory data to a pickle file.
+        Save the current inventory data to the backend, backends storing single
+        rows (e.g. SQLite) only write the items changed since the last save.
 
         return:
         True if data updated and False if not.
         """
         try:
-            self.data.to_pickle(self.file_path)
+            self._consolidate()
+            frame = self._frame
+            if self._reservations and not self.backend.shared:
+                # Open reservations live in memory only, the file keeps their
+                # stock so nothing is lost if they are never committed
+                frame = frame.copy()
+                column = frame.columns.get_loc("quantity")
+                for lines in list(self._reservations.values()):
+                    for serial, quantity in lines.items():
+                        pos = self._serial_index.get(serial)
+                        if pos is not None:
+                            frame.iat[pos, column] += quantity
+            self.backend.save(frame, self._dirty_serials)
+            self._mark_clean()
             return True
         except BaseException:
-            print("Failed to update data to pickle file, check file path")
+            print("Failed to update inventory data, check file path")
             return False
 
+    @write_locked
+    def refresh(self) -> bool:
+        """
+        Load the changes other processes made to a shared inventory.
+
+        Stock changes of known items are applied in place, anything else (items
+        added, removed or edited) reloads the whole inventory.
+
+        return:
+        True if the inventory changed.
+        """
+        changed = self.backend.poll()
+        if not changed and changed is not None:
+            return False
+        if self._dirty:
+            self.update_data()
+        if changed is not None:
+            stock = self._stock_changes(self.backend.fetch(changed), changed)
+            if stock is not None:
+                self._own_stock()
+                self._set_stock(stock)
+                self._publish()
+                return True
+        return self._load_data()
+
+    def _stock_changes(
+        self, rows: pd.DataFrame, serials: Set[str]
+    ) -> Optional[Dict[str, int]]:
+        """
+        The stored quantities of changed items, None if anything but their stock
+        changed.
+        """
+        self._consolidate()
+        if len(rows) != len(serials) or not serials.issubset(self._serial_index):
+            return None
+        rows = self._apply_schema(rows.reset_index(drop=True))
+        current = self._frame.iloc[
+            [self._serial_index[serial] for serial in rows["serial_number"]]
+        ].reset_index(drop=True)
+        columns = [col for col in SCHEMA if col != "quantity"]
+        if not current[columns].equals(rows[columns]):
+            return None
+        return dict(zip(rows["serial_number"], rows["quantity"].tolist()))
+
+    @write_locked
+    def flush(self) -> bool:
+        """
+        Save the inventory only if it changed since the last save.
+
+        return:
+        True if the file is up to date and False if saving failed.
+        """
+        if not self._dirty:
+            return True
+        return self.update_data()
+
+    @write_locked
     def add_item(self, furniture_desc: Dict[str, Union[str, int, float]]) -> bool:
         """
         Add a new furniture item to the inventory.
@@ -90,10 +867,36 @@ class Inventory:
         """
         # Creates furniture attribute
         if "type" in furniture_desc.keys():
-            furniture_type = furniture_desc["type"]
             furniture_instance = FurnitureFactory.create_furniture(furniture_desc)
-            if furniture_instance and self.data is not None:
-                self.data.at[0, furniture_type].append(furniture_instance)
+            if furniture_instance:
+                serial = furniture_instance.serial_number
+                if serial in self._serial_index:
+                    print("Serial number already exists in inventory.")
+                    return False
+                self._own_indexes()
+                self._serial_index[serial] = self._table.append(
+                    self._to_record(furniture_instance)
+                )
+                self._frame_stale = True
+                self._generation += 1
+                self._mark_dirty(serial)
+                price = furniture_instance.price
+                furniture_type = type(furniture_instance).__name__
+                self._price_index.setdefault(furniture_type, PriceIndex()).add(
+                    serial, price
+                )
+                self._all_prices.add(serial, price)
+                self._text_index.add(
+                    serial, furniture_instance.name, furniture_instance.description
+                )
+                self._attribute_index.add(
+                    {
+                        attr: getattr(furniture_instance, attr)
+                        for attr in ATTRIBUTE_COLUMNS
+                        if hasattr(furniture_instance, attr)
+                    }
+                )
+                self._publish()
             else:
                 print("Failed to create Furniture object.")
                 return False
@@ -102,6 +905,7 @@ class Inventory:
             return False
         return True
 
+    @write_locked
     def remove_item(
         self,
         furniture_atr: Optional[Furniture] = None,
@@ -124,18 +928,29 @@ class Inventory:
                 print("Basic attributes missing fail to create furniture object.")
                 return False
         if furniture_atr and isinstance(furniture_atr, Furniture):
-            class_name = type(furniture_atr).__name__
-            pd_spec_class = self.data[class_name][0]
-            try:
-                pd_spec_class.remove(furniture_atr)
-            except ValueError:
+            pos = self._row_position(furniture_atr)
+            if pos is None:
                 return False
-            self.data.loc[0, class_name] = pd_spec_class
+            price = self._table.column("price")[pos]
+            self._own_indexes()
+            self._price_index[type(furniture_atr).__name__].remove(
+                furniture_atr.serial_number, price
+            )
+            self._all_prices.remove(furniture_atr.serial_number, price)
+            self._text_index.remove(furniture_atr.serial_number)
+            self._attribute_index.remove(pos)
+            self._table.delete(pos)
+            self._frame_stale = True
+            self._build_serial_index()
+            self._generation += 1
+            self._mark_dirty(furniture_atr.serial_number)
+            self._publish()
             return True
 
         print("No furniture object or furniture data delivered.")
         return False
 
+    @write_locked
     def update_quantity(self, furniture_atr: Furniture, new_q: int) -> bool:
         """
         Update the quantity of an existing furniture item.
@@ -147,27 +962,142 @@ class Inventory:
         return:
         True if quantity updated and False if not.
         """
-        # Find the furniture_atr in the data frame
+        # Find the furniture_atr row through the serial number index
         if furniture_atr and isinstance(furniture_atr, Furniture):
-            class_name = type(furniture_atr).__name__
-            pd_spec_class = self.data[class_name][0]
-            item_id = furniture_atr.serial_number
-            flag = False
-            for obj in pd_spec_class:
-                if obj.serial_number == item_id:
-                    obj.quantity = new_q
-                    flag = True
-                    break
-            if not flag:
+            pos = self._row_position(furniture_atr)
+            if pos is None:
                 return False
-            self.data.loc[0, class_name] = pd_spec_class
+            self._own_stock()
+            self._table.column("quantity")[pos] = new_q
+            self._mark_dirty(furniture_atr.serial_number)
+            self._publish()
+            # Keep the caller's copy in sync with the stored row
+            furniture_atr.quantity = new_q
             return True
+        return False
+
+    def reprice(
+        self,
+        percent: float = 0.0,
+        amount: float = 0.0,
+        name: Optional[str] = None,
+        category: Optional[str] = None,
+        price_range: Optional[Tuple[float, float]] = None,
+        text: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        country: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> List[PriceChange]:
+        """
+        Change the price of every item matching a search (e.g. a sale on a
+        category), new price = price * (1 + percent / 100) + amount, rounded to
+        cents.
+
+        The matches and new prices are computed from the published snapshot
+        without holding the lock, the write lock is only held to swap in the
+        new price column and indexes. All the changed items are saved in one
+        write.
+
+        Parameters:
+        percent: Percentage change, e.g. -20 for a 20% discount.
+        amount: Absolute change added after the percentage.
+        name, category, price_range, text, attributes: Filters as in search_by,
+        all the items if none is given.
+        country: Manufacturing country of the items.
+        dry_run: Only preview the changes, nothing is changed or saved.
+
+        return:
+        The price changes, in the order of the search results.
+
+        raises:
+        ValueError: If a new price would not be positive, nothing is changed.
+        """
+        if country is not None:
+            attributes = {**(attributes or {}), "manufacturing_country": country}
+        query = (name, category, price_range, text, attributes)
+        snapshot = self._snapshot
+        changes, prices = self._reprice_plan(snapshot, percent, amount, *query)
+        if dry_run or not changes:
+            return changes
+        indexes = self._price_indexes(snapshot.frame, prices.tolist())
+        with self._lock.write():
+            if self._generation != snapshot.layout:
+                # Items were added, removed or repriced since the plan was
+                # made, plan again on the current table
+                self._consolidate()
+                snapshot = snapshot._replace(
+                    layout=self._generation,
+                    frame=self._frame,
+                    serial_index=self._serial_index,
+                    price_index=self._price_index,
+                    all_prices=self._all_prices,
+                    text_index=self._text_index,
+                    attribute_index=self._attribute_index,
+                )
+                changes, prices = self._reprice_plan(
+                    snapshot, percent, amount, *query
+                )
+                if not changes:
+                    return changes
+                indexes = self._price_indexes(snapshot.frame, prices.tolist())
+            self._table.replace("price", prices)
+            self._frame_stale = True
+            self._price_index, self._all_prices = indexes
+            self._generation += 1
+            self._dirty = True
+            self._dirty_serials.update(change.serial_number for change in changes)
+            self._publish()
+            self.update_data()
+        return changes
+
+    def _reprice_plan(
+        self,
+        snapshot: InventorySnapshot,
+        percent: float,
+        amount: float,
+        name: Optional[str],
+        category: Optional[str],
+        price_range: Optional[Tuple[float, float]],
+        text: Optional[str],
+        attributes: Optional[Dict[str, Any]],
+    ) -> Tuple[List[PriceChange], np.ndarray]:
+        """
+        Compute a repricing on a snapshot: the price changes and the new price
+        column of the table.
+        """
+        positions = np.array(
+            self._search_positions(
+                snapshot, name, category, price_range, None, 0, text, attributes
+            ),
+            dtype=np.int64,
+        )
+        old = snapshot.frame["price"].to_numpy(dtype=np.float64)
+        cents = scale(to_cents_array(old[positions]), percent_factor(percent))
+        new = to_amount(cents + to_cents(amount))
+        if (new <= 0).any():
+            raise ValueError("Price must be a positive value.")
+        changed = new != old[positions]
+        positions, new = positions[changed], new[changed]
+        serials = snapshot.frame["serial_number"].to_numpy()[positions]
+        changes = [
+            PriceChange(serial, old_price, new_price)
+            for serial, old_price, new_price in zip(
+                serials.tolist(), old[positions].tolist(), new.tolist()
+            )
+        ]
+        prices = old.copy()
+        prices[positions] = new
+        return changes, prices
 
     def search_by(
         self,
         name: Optional[str] = None,
         category: Optional[str] = None,
         price_range: Optional[Tuple[float, float]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        text: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
     ) -> List[Furniture]:
         """
         Search for furniture items based on attributes, if no
@@ -176,78 +1106,153 @@ class Inventory:
         Parameters:
         name: Name of the furniture item.
         category: Category of the furniture item.
-        price_range: Tuple specifying min and max price range.
+        price_range: Tuple specifying min and max price range, results come back
+        ordered by price.
+        limit: Maximum number of items to return (all matches if None).
+        offset: Number of matching items to skip.
+        text: Free text matched against words (or word prefixes) of names and
+        descriptions, results come back ranked by relevance.
+        attributes: Attribute predicates such as {"has_wheels": True}, a list of
+        values matches any of them.
 
         Outputs:
         List of furniture items that match the search criteria.
         """
+        snapshot = self._snapshot
+        if any(attr in VOLATILE_COLUMNS for attr in attributes or {}):
+            positions = self._search_positions(
+                snapshot, name, category, price_range, limit, offset, text, attributes
+            )
+        else:
+            key = self._query_key(
+                name, category, price_range, limit, offset, text, attributes
+            )
+            positions = self.query_cache.get(key, snapshot.layout)
+            if positions is None:
+                positions = self._search_positions(
+                    snapshot,
+                    name,
+                    category,
+                    price_range,
+                    limit,
+                    offset,
+                    text,
+                    attributes,
+                )
+                self.query_cache.put(key, positions, snapshot.layout)
+        if not positions:
+            return []
+        return self._materialize(snapshot.frame.iloc[list(positions)])
 
-        def match_price_range(item: Furniture) -> bool:
-            """Check if the item's price is within the specified range."""
-            if not hasattr(item, "price"):
-                return False
-            min_price, max_price = price_range
-            return min_price <= item.price <= max_price
+    @staticmethod
+    def _query_key(
+        name: Optional[str],
+        category: Optional[str],
+        price_range: Optional[Tuple[float, float]],
+        limit: Optional[int],
+        offset: int,
+        text: Optional[str],
+        attributes: Optional[Dict[str, Any]],
+    ) -> Tuple:
+        """
+        Normalize search parameters into a hashable cache key, so that equivalent
+        queries share one cache entry.
+        """
+        # Values are keyed with their type, as in the attribute bitmaps 1 is not True
+        normalized_attributes = tuple(
+            sorted(
+                (
+                    attr,
+                    (
+                        tuple(sorted({(type(v), v) for v in value}, key=repr))
+                        if isinstance(value, (list, tuple, set))
+                        else (type(value), value)
+                    ),
+                )
+                for attr, value in (attributes or {}).items()
+            )
+        )
+        return (
+            name or None,
+            category or None,
+            tuple(float(p) for p in price_range) if price_range else None,
+            limit,
+            offset,
+            " ".join(tokenize(text)) if text else None,
+            normalized_attributes,
+        )
 
-        def match_name(item: Furniture) -> bool:
-            """Check if the item's name matches the given name."""
-            if not hasattr(item, "name") or getattr(item, "name") != name:
-                return False
-            return True
+    @staticmethod
+    def _search_positions(
+        snapshot: InventorySnapshot,
+        name: Optional[str],
+        category: Optional[str],
+        price_range: Optional[Tuple[float, float]],
+        limit: Optional[int],
+        offset: int,
+        text: Optional[str],
+        attributes: Optional[Dict[str, Any]],
+    ) -> Tuple[int, ...]:
+        """
+        Run a search (see search_by) on a snapshot and return the row positions
+        of the results.
+        """
+        frame = snapshot.frame
+        if frame.empty:
+            return ()
+        stop = None if limit is None else offset + limit
+        attributes = attributes or {}
+        if any(attr not in frame.columns for attr in attributes):
+            return ()
 
-        furniture_classes = ["Chair", "Sofa", "Table", "Bed", "Closet"]
-        result = None
+        # Candidates (in result order) come from the most selective index:
+        # free text ranks by relevance, price ranges sort by price
+        candidates: Optional[List[str]] = None
+        if text:
+            candidates = snapshot.text_index.search(text)
+        elif price_range:
+            if category:
+                if category not in snapshot.price_index:
+                    return ()
+                candidates = snapshot.price_index[category].range(*price_range)
+            else:
+                candidates = snapshot.all_prices.range(*price_range)
 
-        # Ensure `self.data` is properly initialized
-        if not hasattr(self, "data") or self.data.empty:
-            return []
+        # Indexed attribute predicates are combined as bitmaps over the rows
+        attribute_index = snapshot.attribute_index
+        indexed = {k: v for k, v in attributes.items() if k in attribute_index}
+        bitmap = attribute_index.match(indexed) if indexed else None
 
-        # Returning all furniture objects in list
-        if not (price_range or name or category):
-            result = pd.DataFrame()
-            for fc in furniture_classes:
-                category_data = self.data.get(fc, pd.DataFrame())
-                if not category_data.empty:
-                    temp_df = pd.DataFrame({"object": category_data.iloc[0]})
-                    result = pd.concat([result, temp_df], ignore_index=True)
+        if candidates is None:
+            rows = frame
+            mask = np.ones(len(rows), dtype=bool) if bitmap is None else bitmap
+        else:
+            positions = np.fromiter(
+                (snapshot.serial_index[s] for s in candidates),
+                dtype=np.intp,
+                count=len(candidates),
+            )
+            if bitmap is not None:
+                positions = positions[bitmap[positions]]
+            rows = frame.iloc[positions]
+            mask = np.ones(len(rows), dtype=bool)
 
-        # Handling specific category of furniture
+        # Vectorized filtering over the typed columns of the remaining rows
         if category:
-            category_data = self.data.get(category, pd.DataFrame())
-            if not category_data.empty:
-                result = pd.DataFrame({"object": category_data.iloc[0]})
-
-        # Handling specific name of furniture
+            mask &= rows["type"].to_numpy() == category
         if name:
-            if result is None:
-                result = pd.DataFrame()
-                for fc in furniture_classes:
-                    category_data = self.data.get(fc, pd.DataFrame())
-                    if not category_data.empty:
-                        temp_df = pd.DataFrame({"object": category_data.iloc[0]})
-                        filtered_data = temp_df["object"].apply(match_name)
-                        temp_df = temp_df[filtered_data]
-                        result = pd.concat([result, temp_df], ignore_index=True)
+            mask &= rows["name"].to_numpy() == name
+        if price_range and text:
+            prices = rows["price"].to_numpy()
+            mask &= (prices >= price_range[0]) & (prices <= price_range[1])
+        for attr, expected in attributes.items():
+            if attr in indexed:
+                continue
+            column = rows[attr]
+            if isinstance(expected, (list, tuple, set)):
+                mask &= column.isin(list(expected)).to_numpy(dtype=bool)
             else:
-                filtered_data = result["object"].apply(match_name)
-                result = result[filtered_data]
-
-        # Handling price range of furniture
-        if price_range:
-            if result is None:
-                result = pd.DataFrame()
-                for fc in furniture_classes:
-                    category_data = self.data.get(fc, pd.DataFrame())
-                    if not category_data.empty:
-                        temp_df = pd.DataFrame({"object": category_data.iloc[0]})
-                        filtered_data = temp_df["object"].apply(match_price_range)
-                        temp_df = temp_df[filtered_data]
-                        result = pd.concat([result, temp_df], ignore_index=True)
-            else:
-                filtered_data = result["object"].apply(match_price_range)
-                result = result[filtered_data]
-
-        if result is None or result.empty:
-            return []
+                mask &= (column == expected).fillna(False).to_numpy(dtype=bool)
 
-        return result["object"].tolist()
+        # The table keeps a RangeIndex, so row labels are row positions
+        return tuple(rows.index[mask][offset:stop].tolist())
@@ -0,0 +1,89 @@
+from decimal import ROUND_HALF_UP, Decimal
+from fractions import Fraction
+from functools import lru_cache
+from typing import TypeVar, Union
+
+import numpy as np
+
+# Money amounts are handled internally as whole cents (int, or int64 arrays),
+# prices are converted to and from float amounts only where they enter or leave
+# the models (requests, JSON responses and stored records).
+Cents = int
+
+# Largest denominator of a percentage or rate factor, e.g. -100/3 percent is
+# kept as 2/3 instead of the 16 digit fraction of its float representation
+MAX_DENOMINATOR = 10**6
+# Intermediate products above this are computed with Python ints, int64 would
+# silently overflow
+INT64_SAFE = 2**62
+
+CentsOrArray = TypeVar("CentsOrArray", int, np.ndarray)
+
+
+# -------- Helper Func -------- #
+def to_cents(amount: Union[float, int, str]) -> Cents:
+    """
+    Convert an amount to cents, rounding half a cent up.
+
+    param:
+    amount: Amount in currency units, e.g. 19.99.
+
+    return:
+    The amount in cents, e.g. 1999.
+    """
+    cents = (Decimal(str(amount)) * 100).quantize(Decimal(1), ROUND_HALF_UP)
+    return int(cents)
+
+
+def to_amount(cents: CentsOrArray) -> Union[float, np.ndarray]:
+    """
+    Convert cents (or an array of cents) back to an amount in currency units.
+    """
+    return cents / 100
+
+
+def to_cents_array(amounts: np.ndarray) -> np.ndarray:
+    """
+    Convert an array of amounts, already rounded to cents, to int64 cents.
+    """
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+# The few distinct rates and percentages in use are parsed once
+@lru_cache(maxsize=256)
+def percent_factor(percent: float) -> Fraction:
+    """
+    Exact multiplier of a percentage change, e.g. -15 -> 17/20.
+    """
+    return 1 + Fraction(str(percent)).limit_denominator(MAX_DENOMINATOR) / 100
+
+
+@lru_cache(maxsize=256)
+def rate_factor(rate: float) -> Fraction:
+    """
+    Exact multiplier of adding a rate, e.g. a 0.17 tax rate -> 117/100.
+    """
+    return 1 + Fraction(str(rate)).limit_denominator(MAX_DENOMINATOR)
+
+
+def scale(cents: CentsOrArray, factor: Fraction) -> CentsOrArray:
+    """
+    Multiply cents (or an int64 array of cents) by an exact factor, rounding
+    half a cent up, using integer arithmetic only.
+
+    param:
+    cents: Amount(s) in cents, not negative.
+    factor: Multiplier, see percent_factor and rate_factor.
+
+    return:
+    The scaled amount(s) in cents.
+    """
+    numerator, denominator = factor.numerator, factor.denominator
+    if isinstance(cents, np.ndarray) and cents.size:
+        largest = int(np.abs(cents).max())
+        if 2 * largest * abs(numerator) + denominator >= INT64_SAFE:
+            exact = (2 * cents.astype(object) * numerator + denominator) // (
+                2 * denominator
+            )
+            return exact.astype(np.int64)
+    return (2 * cents * numerator + denominator) // (2 * denominator)
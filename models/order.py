@@ -3,9 +3,18 @@ import os
 import json
 import uuid
 import sys
+import threading
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Set, Any
 from models.cart import ShoppingCart
+from models.concurrency import RWLock, read_locked, write_locked
+from models.money import to_amount, to_cents
+from models.storage import (
+    COMPACT_EVERY,
+    JournaledPickleBackend,
+    SQLiteBackend,
+    StorageBackend,
+)
 
 
 # Ensure the parent directory is in the import path
@@ -14,77 +23,292 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 # Define the default orders DB path
 ORDER_STORAGE_FILE = os.path.join(os.path.dirname(__file__), "..", "data/orders.pkl")
 
+ORDER_COLUMNS = [
+    "order_id",
+    "client_id",
+    "items",
+    "total_price",
+    "payment_info",
+    "status",
+    "order_date",
+]
+
+
+# -------- Helper Func -------- #
+def sqlite_backend(db_path: str) -> SQLiteBackend:
+    """
+    SQLite storage for the orders, indexed by client.
+
+    param:
+        db_path: Path to the database file.
+
+    return:
+        SQLiteBackend: Backend to pass to OrderManager.
+    """
+    return SQLiteBackend(db_path, "orders", "order_id", ORDER_COLUMNS, ["client_id"])
+
 
 # -------- OrderManager CLASS -------- #
 class OrderManager:
     """
     Manages orders in the system, including creation, updates, cancellations, and retrieval.
+
+    Orders are persisted by a storage backend, by default a pickle snapshot plus an
+    append-only journal: every create, status update or cancel appends one record
+    to the journal, and the journal is periodically compacted into the snapshot.
+    On startup the journal is replayed on top of the snapshot. Backends storing
+    single rows (e.g. SQLite) write each change directly instead.
+
+    The manager can be shared between threads: lookups run in parallel and
+    changes are exclusive.
     """
 
-    def __init__(self, file_path=ORDER_STORAGE_FILE):
+    def __init__(
+        self,
+        file_path=ORDER_STORAGE_FILE,
+        compact_every: int = COMPACT_EVERY,
+        fsync: bool = True,
+        backend: Optional[StorageBackend] = None,
+    ):
         """
-        Initializes the OrderManager, ensuring a valid pickle file is set up.
+        Initializes the OrderManager, ensuring valid order storage is set up.
+
+        Args:
+            file_path (str): Path to the orders snapshot file.
+            compact_every (int): Journal records written before compacting.
+            fsync (bool): Force every journal record to disk before returning.
+            backend (StorageBackend): Storage of the orders, the snapshot file and
+                its journal if None.
         """
         self.file_path = file_path
+        # Lookups share the read side, changes take the write side, and
+        # _frame_lock guards folding the pending orders into the DataFrame
+        self._lock = RWLock()
+        self._frame_lock = threading.RLock()
+        self.backend = (
+            backend
+            if backend is not None
+            else JournaledPickleBackend(file_path, "order_id", compact_every, fsync)
+        )
+        self._frame = pd.DataFrame(columns=ORDER_COLUMNS)
+        # Orders created since the last consolidation of the DataFrame
+        self._pending: List[Dict[str, Any]] = []
+        # Hash indexes: order_id -> row position, client_id -> row positions
+        self._id_index: Dict[str, int] = {}
+        self._client_index: Dict[Any, List[int]] = {}
+        # Orders changed since the last snapshot, see flush()
+        self._dirty_orders: Set[str] = set()
+        self._dirty = False
 
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-
-        # Check if the file exists; if not, create an empty one with predefined
-        # columns
-        if not os.path.exists(self.file_path):
-            self.orders = pd.DataFrame(
-                columns=[
-                    "order_id",
-                    "client_id",
-                    "items",
-                    "total_price",
-                    "payment_info",
-                    "status",
-                    "order_date",
-                ]
-            )
+        # Check if the orders were stored; if not, store an empty table with
+        # predefined columns
+        if not self.backend.exists():
             self.save_orders()
         else:
-            self.orders = self.load_orders()
+            self._frame = self.load_orders().reset_index(drop=True)
+        self._build_indexes()
+        self._replay_journal()
+
+    @property
+    def journal_path(self) -> Optional[str]:
+        """
+        Path to the order journal, None if the backend keeps no journal.
+        """
+        return getattr(self.backend, "journal_path", None)
+
+    @property
+    def orders(self) -> pd.DataFrame:
+        """
+        All the orders as a DataFrame.
+        """
+        with self._frame_lock:
+            if self._pending:
+                new_orders = pd.DataFrame(self._pending, columns=ORDER_COLUMNS)
+                if self._frame.empty:
+                    self._frame = new_orders
+                else:
+                    self._frame = pd.concat(
+                        [self._frame, new_orders], ignore_index=True
+                    )
+                self._pending = []
+            return self._frame
 
+    @orders.setter
+    @write_locked
+    def orders(self, orders: pd.DataFrame) -> None:
+        """
+        Replaces all the orders, the stored history is rewritten by the next save.
+        """
+        self._frame = orders.reset_index(drop=True)
+        self._pending = []
+        self._build_indexes()
+        self._dirty = True
+
+    @write_locked
     def save_orders(self) -> None:
         """
-        Saves the orders DataFrame to a pickle file.
+        Saves the orders DataFrame to the backend (emptying the journal).
         """
         try:
-            self.orders.to_pickle(self.file_path)
+            # Journaled or directly stored changes are already durable, only
+            # orders replaced wholesale need the whole table written
+            self.backend.save(self.orders, None if self._dirty else ())
+            self._dirty = False
+            self._dirty_orders = set()
         except Exception as e:
-            print(f"Failed to save orders to pickle file: {e}")
+            print(f"Failed to save orders: {e}")
 
     def load_orders(self) -> pd.DataFrame:
         """
-        Loads the orders DataFrame from a pickle file if it exists, otherwise returns an empty DataFrame.
+        Loads the orders DataFrame from the backend if stored, otherwise returns an empty DataFrame.
         """
         try:
-            if os.path.exists(self.file_path):
-                return pd.read_pickle(self.file_path)
+            if self.backend.exists():
+                return self.backend.load()
         except Exception as e:
-            print(f"Failed to load orders from pickle file: {e}")
+            print(f"Failed to load orders: {e}")
 
         # Ensure a new empty DataFrame if the file is missing or unreadable
-        return pd.DataFrame(
-            columns=[
-                "order_id",
-                "client_id",
-                "items",
-                "total_price",
-                "payment_info",
-                "status",
-                "order_date",
-            ]
-        )
+        return pd.DataFrame(columns=ORDER_COLUMNS)
+
+    def _build_indexes(self) -> None:
+        """
+        Rebuilds the order_id and client_id indexes from the orders DataFrame.
+        """
+        self._id_index = {}
+        self._client_index = {}
+        for pos, (order_id, client_id) in enumerate(
+            zip(self._frame["order_id"], self._frame["client_id"])
+        ):
+            self._index_order(pos, order_id, client_id)
+
+    def _index_order(self, pos: int, order_id: str, client_id: Any) -> None:
+        """
+        Adds an order at row position pos to the indexes.
+        """
+        self._id_index[order_id] = pos
+        self._client_index.setdefault(client_id, []).append(pos)
+
+    def _add_order(self, order_data: Dict[str, Any]) -> None:
+        """
+        Adds a new order row in memory and indexes it.
+        """
+        pos = len(self._frame) + len(self._pending)
+        self._pending.append(order_data)
+        self._index_order(pos, order_data["order_id"], order_data["client_id"])
+
+    def _get_row(self, pos: int) -> Dict[str, Any]:
+        """
+        Returns a copy of the order at row position pos.
+        """
+        with self._frame_lock:
+            if pos < len(self._frame):
+                return self._frame.iloc[[pos]].to_dict(orient="records")[0]
+            return dict(self._pending[pos - len(self._frame)])
 
+    def _store_change(self, op: str, *args: Any) -> None:
+        """
+        Stores a change through the backend ("insert" an order or "update" its
+        values), saving the orders when the backend asks for it (e.g. to compact
+        its journal).
+        """
+        if self._dirty:
+            # The stored orders no longer match the in-memory ones, saving the
+            # whole table (which includes this change) replaces them
+            self.save_orders()
+            return
+        if getattr(self.backend, op)(*args):
+            self.save_orders()
+
+    def _replay_journal(self) -> None:
+        """
+        Applies the changes journaled by the backend on top of the loaded snapshot.
+        """
+        for change in self.backend.changes():
+            if change["op"] == "insert":
+                order_id = change["record"]["order_id"]
+                if order_id in self._id_index:
+                    # Already in the snapshot, a crash after saving it kept the
+                    # journal that was about to be emptied
+                    continue
+                self._add_order(change["record"])
+            else:
+                order_id = change["key"]
+                self._apply_status(order_id, change["values"]["status"])
+            self._dirty_orders.add(order_id)
+
+    def _apply_status(self, order_id: str, status: str) -> bool:
+        """
+        Sets the status of an order in memory.
+
+        Returns:
+            bool: True if the order exists.
+        """
+        pos = self._id_index.get(order_id)
+        if pos is None:
+            return False
+        if pos < len(self._frame):
+            self._frame.iat[pos, self._frame.columns.get_loc("status")] = status
+        else:
+            self._pending[pos - len(self._frame)]["status"] = status
+        return True
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        True if orders changed since they were last saved.
+
+        Journaled changes are already durable, only replacing the orders wholesale
+        leaves them dirty.
+        """
+        return self._dirty
+
+    @property
+    def dirty_orders(self) -> Set[str]:
+        """
+        IDs of the orders created or updated since the last snapshot.
+        """
+        return set(self._dirty_orders)
+
+    @write_locked
+    def refresh(self) -> bool:
+        """
+        Loads the orders other processes created or updated in shared storage.
+
+        Returns:
+            bool: True if the orders changed.
+        """
+        changed = self.backend.poll()
+        if not changed and changed is not None:
+            return False
+        if self._dirty:
+            self.save_orders()
+        if changed is None:
+            self._frame = self.load_orders().reset_index(drop=True)
+            self._pending = []
+            self._build_indexes()
+            return True
+        for order in self.backend.fetch(changed).to_dict(orient="records"):
+            if order["order_id"] in self._id_index:
+                self._apply_status(order["order_id"], order["status"])
+            else:
+                self._add_order(order)
+        return True
+
+    @write_locked
+    def flush(self) -> None:
+        """
+        Saves the orders only if they changed since the last save.
+        """
+        if self._dirty:
+            self.save_orders()
+
+    @write_locked
     def create_order(
         self, cart: ShoppingCart, payment_info: str, total_price: float
     ) -> None:
         """
-        Creates a new order and appends it to the DataFrame, then saves it.
+        Creates a new order and stores it (appends it to the order journal by default).
 
         Args:
             cart (ShoppingCart): The shopping cart associated with the client.
@@ -95,26 +319,29 @@ class OrderManager:
         order_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         serialized_items = json.dumps(
-            [{"name": i.name, "quantity": i.quantity} for i in cart.items], default=str
+            [
+                {"name": line.item.name, "quantity": line.quantity}
+                for line in cart.lines.values()
+            ],
+            default=str,
         )
 
         order_data = {
             "order_id": order_id,
             "client_id": int(cart.user_id),
             "items": serialized_items,
-            "total_price": total_price,
+            # Stored as an amount, rounded to whole cents
+            "total_price": to_amount(to_cents(total_price)),
             "payment_info": payment_info,
             "status": "Processing",
             "order_date": order_date,
         }
 
-        new_order_df = pd.DataFrame([order_data])
-        if not new_order_df.dropna(axis=1, how="all").empty:
-            new_order_df = new_order_df.dropna(axis=1, how="all")
-            self.orders = pd.concat([self.orders, new_order_df], ignore_index=True)
-
-        self.save_orders()
+        self._add_order(order_data)
+        self._dirty_orders.add(order_id)
+        self._store_change("insert", order_data)
 
+    @read_locked
     def get_order(self, order_id: str, client_id: str) -> Optional[Dict]:
         """
         Retrieves the details of an order for a given client.
@@ -126,37 +353,38 @@ class OrderManager:
         Returns:
             Optional[Dict]: A dictionary containing the order details if found, else None.
         """
-        order = self.orders[
-            (self.orders["order_id"] == order_id)
-            & (self.orders["client_id"] == client_id)
-        ]
-        if not order.empty:
-            return order.to_dict(orient="records")[0]
-        return None
+        pos = self._id_index.get(order_id)
+        if pos is None:
+            return None
+        order = self._get_row(pos)
+        if order["client_id"] != client_id:
+            return None
+        return order
 
+    @write_locked
     def update_order_status(self, order_id: str, status: str) -> None:
         """
-        Updates the status of an order and saves the change.
+        Updates the status of an order and stores the change.
 
         Args:
             order_id (str): The unique ID of the order.
             status (str): The new status of the order.
         """
-        if order_id in self.orders["order_id"].values:
-            self.orders.loc[self.orders["order_id"] == order_id, "status"] = status
-            self.save_orders()
+        if self._apply_status(order_id, status):
+            self._dirty_orders.add(order_id)
+            self._store_change("update", order_id, {"status": status})
 
+    @write_locked
     def cancel_order(self, order_id: str) -> None:
         """
-        Cancels an order by updating its status to 'Cancelled' and saves the change.
+        Cancels an order by updating its status to 'Cancelled' and stores the change.
 
         Args:
             order_id (str): The unique ID of the order.
         """
-        if order_id in self.orders["order_id"].values:
-            self.orders.loc[self.orders["order_id"] == order_id, "status"] = "Cancelled"
-            self.save_orders()
+        self.update_order_status(order_id, "Cancelled")
 
+    @read_locked
     def get_order_history(self, client_id: str) -> List[Dict]:
         """
         Retrieves the order history for a specific client.
@@ -167,5 +395,7 @@ class OrderManager:
         Returns:
             List[Dict]: A list of dictionaries containing the client's order history.
         """
-        history = self.orders[self.orders["client_id"] == client_id]
-        return history.to_dict(orient="records") if not history.empty else []
+        positions = self._client_index.get(client_id)
+        if not positions:
+            return []
+        return self.orders.iloc[positions].to_dict(orient="records")
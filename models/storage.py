@@ -0,0 +1,705 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+# The order journal lives next to the snapshot file
+JOURNAL_SUFFIX: str = ".journal"
+
+# Number of journal records after which the journal is compacted into the snapshot
+COMPACT_EVERY: int = 1000
+
+# Seconds a SQLite connection waits for another writer before failing
+SQLITE_TIMEOUT: float = 30.0
+
+# Table of the SQLite database logging the keys changed by every write
+CHANGES_TABLE: str = "store_changes"
+
+# Change log entries kept for processes catching up, older ones are pruned
+# every PRUNE_EVERY writes of a backend
+KEEP_CHANGES: int = 10000
+PRUNE_EVERY: int = 100
+
+# Keys read per statement when fetching records, below the SQLite variable limit
+FETCH_CHUNK: int = 500
+
+
+# -------- Helper Func -------- #
+def is_missing(value: Any) -> bool:
+    """
+    True for the values standing for a missing field (None, NaN, pd.NA).
+    """
+    return (
+        value is None
+        or value is pd.NA
+        or (isinstance(value, float) and math.isnan(value))
+    )
+
+
+class NegativeValueError(ValueError):
+    """
+    Raised when an adjustment would take a value below zero, nothing was changed.
+    """
+
+    def __init__(self, current: Dict[Any, int]) -> None:
+        """
+        param:
+            current: Key -> current value of every adjusted record.
+        """
+        super().__init__(f"Values can not go below zero: {current}")
+        self.current = current
+
+
+class DuplicateKeyError(ValueError):
+    """
+    Raised when a record would repeat the value of a unique column of another
+    record, nothing was changed.
+    """
+
+    def __init__(self, column: str) -> None:
+        """
+        param:
+            column: Name of the repeated column.
+        """
+        super().__init__(f"Another record has the same {column}.")
+        self.column = column
+
+
+# -------- StorageBackend CLASS -------- #
+class StorageBackend(ABC):
+    """
+    Where one table of records (the inventory, the orders or the users) is stored.
+
+    Records are rows of a DataFrame identified by their key column. Backends able
+    to write single rows only write the changed ones, the others rewrite the
+    whole table on every save.
+
+    Shared backends may be written by several processes at once: they report
+    the records changed by the others (poll()), and adjust counters in place
+    instead of overwriting them (adjust()).
+    """
+
+    # True if other processes may write the stored table
+    shared: bool = False
+
+    def __init__(self, key: str) -> None:
+        """
+        Initialize the backend.
+
+        param:
+            key: Name of the column identifying a record.
+        """
+        self.key = key
+
+    @abstractmethod
+    def exists(self) -> bool:
+        """
+        True if the table was stored before.
+        """
+
+    @abstractmethod
+    def load(self) -> pd.DataFrame:
+        """
+        Read the stored table.
+        """
+
+    @abstractmethod
+    def save(self, frame: pd.DataFrame, changed: Optional[Iterable] = None) -> None:
+        """
+        Store the table.
+
+        param:
+            frame: The whole table.
+            changed: Keys of the records added, updated or deleted since the last
+            save, None if unknown (the whole table is written).
+        """
+
+    def insert(self, record: Dict[str, Any]) -> bool:
+        """
+        Store one new record.
+
+        return:
+            True if the record is only stored by the next save().
+        """
+        return True
+
+    def update(self, key: Any, values: Dict[str, Any]) -> bool:
+        """
+        Store new values of some fields of one record.
+
+        return:
+            True if the change is only stored by the next save().
+        """
+        return True
+
+    def insert_next(self, record: Dict[str, Any]) -> int:
+        """
+        Atomically store one new record under the next free integer key (the
+        largest stored key + 1), so processes sharing the table never hand out
+        the same key. Only shared backends support it.
+
+        param:
+            record: The record, its key is ignored.
+
+        return:
+            The key of the stored record.
+
+        raise:
+            DuplicateKeyError: If the record repeats a unique column.
+        """
+        raise NotImplementedError(f"{type(self).__name__} can not allocate keys.")
+
+    def changes(self) -> Iterator[Dict[str, Any]]:
+        """
+        Changes stored after the table by insert() and update(), to apply on top
+        of load(). Each one is {"op": "insert", "record": ...} or
+        {"op": "update", "key": ..., "values": ...}.
+        """
+        return iter(())
+
+    def poll(self) -> Optional[Set[Any]]:
+        """
+        Keys of the records other processes changed since the last poll or load.
+
+        return:
+            The keys (an empty set if none), None if the whole table has to be
+            loaded again.
+        """
+        return set()
+
+    def fetch(self, keys: Iterable) -> pd.DataFrame:
+        """
+        Read the stored records with the given keys, deleted ones are missing.
+        """
+        frame = self.load()
+        return frame[frame[self.key].isin(set(keys))]
+
+    def adjust(self, column: str, deltas: Dict[Any, int]) -> Dict[Any, int]:
+        """
+        Atomically add deltas to an integer column of several records, either
+        all of them change or none does. Only shared backends support it, and
+        records that do not exist are skipped.
+
+        param:
+            column: Name of the column.
+            deltas: Key -> amount to add (negative to subtract).
+
+        return:
+            Key -> new value of every adjusted record.
+
+        raise:
+            NegativeValueError: If a value would go below zero, or a record to
+            subtract from does not exist.
+        """
+        raise NotImplementedError(f"{type(self).__name__} can not adjust values.")
+
+
+# -------- FileBackend CLASSES -------- #
+class FileBackend(StorageBackend):
+    """
+    The whole table in one file, replaced atomically on every save.
+    """
+
+    def __init__(self, path: str, key: str) -> None:
+        """
+        Initialize the backend.
+
+        param:
+            path: Path to the file.
+            key: Name of the column identifying a record.
+        """
+        super().__init__(key)
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> pd.DataFrame:
+        return self._read()
+
+    def save(self, frame: pd.DataFrame, changed: Optional[Iterable] = None) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        self._write(frame, tmp_path)
+        os.replace(tmp_path, self.path)
+
+    @abstractmethod
+    def _read(self) -> pd.DataFrame:
+        """
+        Read the table from the file.
+        """
+
+    @abstractmethod
+    def _write(self, frame: pd.DataFrame, path: str) -> None:
+        """
+        Write the table to a file.
+        """
+
+
+class PickleBackend(FileBackend):
+    """
+    The table as a pickled DataFrame.
+    """
+
+    def _read(self) -> pd.DataFrame:
+        return pd.read_pickle(self.path)
+
+    def _write(self, frame: pd.DataFrame, path: str) -> None:
+        frame.to_pickle(path)
+
+
+class JSONBackend(FileBackend):
+    """
+    The table as a JSON object of records by key, missing fields are left out.
+    """
+
+    def _read(self) -> pd.DataFrame:
+        with open(self.path, "r") as file:
+            data = json.load(file)
+        return pd.DataFrame(list(data.values()) if data else [])
+
+    def _write(self, frame: pd.DataFrame, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(
+                {
+                    record[self.key]: {
+                        k: v for k, v in record.items() if not is_missing(v)
+                    }
+                    for record in frame.to_dict(orient="records")
+                },
+                file,
+                indent=4,
+                default=str,
+            )
+
+
+class JournaledPickleBackend(PickleBackend):
+    """
+    A pickled snapshot of the table plus an append-only journal of the changes.
+
+    insert() and update() append one JSON line to the journal, save() writes a
+    new snapshot and empties the journal. A record cut short by a crash ends the
+    replay of the journal, which is truncated back to the last complete record.
+    A crash between writing the snapshot and emptying the journal replays changes
+    the snapshot already holds, so they must be applied idempotently.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        key: str,
+        compact_every: int = COMPACT_EVERY,
+        fsync: bool = True,
+    ) -> None:
+        """
+        Initialize the backend.
+
+        param:
+            path: Path to the snapshot file, the journal is stored next to it.
+            key: Name of the column identifying a record.
+            compact_every: Journal records written before a save is due.
+            fsync: Force every journal record to disk before returning.
+        """
+        super().__init__(path, key)
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.journal_records = 0
+
+    def save(self, frame: pd.DataFrame, changed: Optional[Iterable] = None) -> None:
+        super().save(frame, changed)
+        # The snapshot now holds every journaled change
+        open(self.journal_path, "w").close()
+        self.journal_records = 0
+
+    def insert(self, record: Dict[str, Any]) -> bool:
+        return self._append({"op": "insert", "record": record})
+
+    def update(self, key: Any, values: Dict[str, Any]) -> bool:
+        return self._append({"op": "update", "key": key, "values": values})
+
+    def _append(self, change: Dict[str, Any]) -> bool:
+        """
+        Append one change to the journal.
+
+        return:
+            True once the journal is long enough to be compacted by a save.
+        """
+        with open(self.journal_path, "a") as journal:
+            journal.write(json.dumps(change, default=str) + "\n")
+            journal.flush()
+            if self.fsync:
+                os.fsync(journal.fileno())
+        self.journal_records += 1
+        return self.journal_records >= self.compact_every
+
+    def changes(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.journal_path):
+            return
+        valid_size = 0
+        with open(self.journal_path, "rb") as journal:
+            for line in journal:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Incomplete journal record")
+                    change = json.loads(line)
+                except ValueError:
+                    print("Ignoring incomplete record at the end of the journal")
+                    break
+                self.journal_records += 1
+                valid_size += len(line)
+                yield change
+        if valid_size < os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as journal:
+                journal.truncate(valid_size)
+
+
+# -------- SQLiteBackend CLASS -------- #
+class SQLiteBackend(StorageBackend):
+    """
+    The table in a SQLite database, several tables can share one database file.
+
+    The database runs in WAL mode, so readers in other threads and processes do
+    not block the writer. Every save only upserts and deletes the changed
+    records, with the same parameterized statements (prepared once and cached
+    per connection). Each thread uses its own connection.
+
+    The database can be shared by several processes (e.g. gunicorn workers).
+    Every write also logs the keys it changed in the same transaction, so a
+    process reloads only the records the others changed (see poll()).
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        path: str,
+        table: str,
+        key: str,
+        columns: Iterable[str],
+        indexes: Iterable[str] = (),
+        json_columns: Iterable[str] = (),
+        unique: Iterable[str] = (),
+    ) -> None:
+        """
+        Initialize the backend and create the table if it does not exist.
+
+        param:
+            path: Path to the database file.
+            table: Name of the table.
+            key: Name of the column identifying a record, the primary key.
+            columns: Names of all the columns, including the key.
+            indexes: Columns to index for lookups.
+            json_columns: Columns holding lists or dicts, stored as JSON text.
+            unique: Columns no two records may share, indexed for lookups.
+        """
+        super().__init__(key)
+        self.path = path
+        self.table = table
+        self.columns: List[str] = list(columns)
+        if key not in self.columns:
+            raise ValueError(f"Key column {key} is not one of the columns.")
+        self.json_columns = set(json_columns)
+        self._local = threading.local()
+        # Identifies the writes of this backend in the change log
+        self._writer = uuid.uuid4().hex
+        # Last change log entry loaded or polled
+        self._seen = 0
+        self._seen_lock = threading.Lock()
+        self._writes = 0
+
+        names = ", ".join(f'"{col}"' for col in self.columns)
+        self._select_sql = f'SELECT {names} FROM "{table}"'
+        self._upsert_sql = (
+            f'INSERT INTO "{table}" ({names}) '
+            f'VALUES ({", ".join("?" for _ in self.columns)}) '
+            f'ON CONFLICT("{key}") DO UPDATE SET '
+            + ", ".join(
+                f'"{col}" = excluded."{col}"' for col in self.columns if col != key
+            )
+        )
+        self._delete_sql = f'DELETE FROM "{table}" WHERE "{key}" = ?'
+        self._log_sql = (
+            f'INSERT INTO "{CHANGES_TABLE}" (name, key, writer) VALUES (?, ?, ?)'
+        )
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self.connection()
+        with connection:
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{table}" ('
+                + ", ".join(
+                    f'"{col}" PRIMARY KEY' if col == key else f'"{col}"'
+                    for col in self.columns
+                )
+                + ")"
+            )
+            for col in indexes:
+                connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{table}_{col}" '
+                    f'ON "{table}" ("{col}")'
+                )
+            for col in unique:
+                connection.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS "{table}_{col}_unique" '
+                    f'ON "{table}" ("{col}")'
+                )
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{CHANGES_TABLE}" ('
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "name TEXT NOT NULL, key, writer TEXT NOT NULL)"
+            )
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        The database connection of the calling thread, opened on first use.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Safe in WAL mode, a power loss may only drop the last commits
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def close(self) -> None:
+        """
+        Close the database connection of the calling thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _to_sql(self, col: str, value: Any) -> Any:
+        """
+        Convert a field to a value SQLite can store.
+        """
+        if col in self.json_columns:
+            return None if value is None else json.dumps(value, default=str)
+        if is_missing(value):
+            return None
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    def _duplicate(self, error: sqlite3.IntegrityError) -> DuplicateKeyError:
+        """
+        The error for a write rejected by a unique index, e.g. "UNIQUE constraint
+        failed: users.email" names the column.
+        """
+        return DuplicateKeyError(str(error).rsplit(".", 1)[-1])
+
+    def _rows(self, frame: pd.DataFrame) -> Iterator[tuple]:
+        """
+        The records of a table as statement parameters.
+        """
+        frame = frame.reindex(columns=self.columns)
+        for row in frame.itertuples(index=False, name=None):
+            yield tuple(self._to_sql(col, v) for col, v in zip(self.columns, row))
+
+    def _decode(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Parse the JSON columns of the records read.
+        """
+        for col in self.json_columns:
+            frame[col] = frame[col].map(
+                lambda v: json.loads(v) if isinstance(v, str) else v
+            )
+        return frame
+
+    def _log(self, connection: sqlite3.Connection, keys: Optional[Iterable]) -> None:
+        """
+        Log the keys changed by a write, inside its transaction. None logs a
+        change of the whole table.
+        """
+        keys = [None] if keys is None else keys
+        connection.executemany(
+            self._log_sql,
+            ((self.table, self._to_sql(self.key, k), self._writer) for k in keys),
+        )
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            connection.execute(
+                f'DELETE FROM "{CHANGES_TABLE}" WHERE seq <= '
+                f'(SELECT MAX(seq) FROM "{CHANGES_TABLE}") - ?',
+                (KEEP_CHANGES,),
+            )
+
+    def poll(self) -> Optional[Set[Any]]:
+        connection = self.connection()
+        # Changes only when another connection committed, skips the log queries
+        # while nothing happened
+        data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == getattr(self._local, "data_version", None):
+            return set()
+        self._local.data_version = data_version
+        with self._seen_lock:
+            first = connection.execute(
+                f'SELECT MIN(seq) FROM "{CHANGES_TABLE}"'
+            ).fetchone()[0]
+            rows = connection.execute(
+                f'SELECT seq, key, writer FROM "{CHANGES_TABLE}" '
+                "WHERE seq > ? AND name = ?",
+                (self._seen, self.table),
+            ).fetchall()
+            lagging = first is not None and first > self._seen + 1 and self._seen
+            if rows:
+                self._seen = rows[-1][0]
+        if lagging:
+            # Entries this process did not see yet were pruned
+            return None
+        keys = set()
+        for _, key, writer in rows:
+            if writer == self._writer:
+                continue
+            if key is None:
+                return None
+            keys.add(key)
+        return keys
+
+    def exists(self) -> bool:
+        return True
+
+    def load(self) -> pd.DataFrame:
+        connection = self.connection()
+        # One read transaction, so the change log matches the records read
+        connection.execute("BEGIN")
+        try:
+            seen = connection.execute(
+                f'SELECT MAX(seq) FROM "{CHANGES_TABLE}"'
+            ).fetchone()[0]
+            frame = pd.read_sql_query(self._select_sql, connection)
+        finally:
+            connection.execute("COMMIT")
+        with self._seen_lock:
+            self._seen = seen or 0
+        return self._decode(frame)
+
+    def fetch(self, keys: Iterable) -> pd.DataFrame:
+        keys = list(keys)
+        frames = [
+            pd.read_sql_query(
+                f'{self._select_sql} WHERE "{self.key}" IN '
+                f'({", ".join("?" for _ in chunk)})',
+                self.connection(),
+                params=chunk,
+            )
+            for chunk in (
+                keys[i : i + FETCH_CHUNK] for i in range(0, len(keys), FETCH_CHUNK)
+            )
+        ]
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return self._decode(pd.concat(frames, ignore_index=True))
+
+    def save(self, frame: pd.DataFrame, changed: Optional[Iterable] = None) -> None:
+        connection = self.connection()
+        if changed is None:
+            try:
+                with connection:
+                    connection.execute(f'DELETE FROM "{self.table}"')
+                    connection.executemany(self._upsert_sql, self._rows(frame))
+                    self._log(connection, None)
+            except sqlite3.IntegrityError as e:
+                raise self._duplicate(e) from e
+            return
+        changed = set(changed)
+        if not changed:
+            return
+        rows = frame[frame[self.key].isin(changed)]
+        deleted = changed.difference(rows[self.key])
+        try:
+            with connection:
+                connection.executemany(self._delete_sql, ((k,) for k in deleted))
+                connection.executemany(self._upsert_sql, self._rows(rows))
+                self._log(connection, changed)
+        except sqlite3.IntegrityError as e:
+            raise self._duplicate(e) from e
+
+    def insert(self, record: Dict[str, Any]) -> bool:
+        connection = self.connection()
+        try:
+            with connection:
+                connection.execute(
+                    self._upsert_sql,
+                    tuple(self._to_sql(col, record.get(col)) for col in self.columns),
+                )
+                self._log(connection, [record[self.key]])
+        except sqlite3.IntegrityError as e:
+            raise self._duplicate(e) from e
+        return False
+
+    def insert_next(self, record: Dict[str, Any]) -> int:
+        connection = self.connection()
+        try:
+            with connection:
+                # Takes the write lock, no other process stores a key in between
+                connection.execute("BEGIN IMMEDIATE")
+                key = connection.execute(
+                    f'SELECT COALESCE(MAX(CAST("{self.key}" AS INTEGER)), 0) + 1 '
+                    f'FROM "{self.table}"'
+                ).fetchone()[0]
+                record = {**record, self.key: key}
+                connection.execute(
+                    self._upsert_sql,
+                    tuple(self._to_sql(col, record.get(col)) for col in self.columns),
+                )
+                self._log(connection, [key])
+        except sqlite3.IntegrityError as e:
+            raise self._duplicate(e) from e
+        return key
+
+    def update(self, key: Any, values: Dict[str, Any]) -> bool:
+        columns = [col for col in self.columns if col in values and col != self.key]
+        if not columns:
+            return False
+        connection = self.connection()
+        with connection:
+            connection.execute(
+                f'UPDATE "{self.table}" SET '
+                + ", ".join(f'"{col}" = ?' for col in columns)
+                + f' WHERE "{self.key}" = ?',
+                [self._to_sql(col, values[col]) for col in columns] + [key],
+            )
+            self._log(connection, [key])
+        return False
+
+    def adjust(self, column: str, deltas: Dict[Any, int]) -> Dict[Any, int]:
+        if column not in self.columns or column == self.key:
+            raise ValueError(f"Can not adjust column {column}.")
+        keys = list(deltas)
+        select_sql = (
+            f'SELECT "{self.key}", "{column}" FROM "{self.table}" '
+            f'WHERE "{self.key}" IN ({", ".join("?" for _ in keys)})'
+        )
+        connection = self.connection()
+        with connection:
+            # Takes the write lock, the check and updates below are atomic
+            connection.execute("BEGIN IMMEDIATE")
+            current = dict(connection.execute(select_sql, keys).fetchall())
+            if any(
+                deltas[k] < 0 and (k not in current or current[k] + deltas[k] < 0)
+                for k in keys
+            ):
+                raise NegativeValueError({k: current.get(k, 0) for k in keys})
+            keys = [k for k in keys if k in current]
+            connection.executemany(
+                f'UPDATE "{self.table}" SET "{column}" = "{column}" + ? '
+                f'WHERE "{self.key}" = ?',
+                ((deltas[k], k) for k in keys),
+            )
+            self._log(connection, keys)
+        return {k: current[k] + deltas[k] for k in keys}
@@ -1,12 +1,21 @@
-import json
 import os
 import sys
-import bcrypt
+import threading
+import pandas as pd
 from abc import ABC
-from typing import Dict, Optional
+from typing import ContextManager, Dict, Optional, Set
 from models.cart import ShoppingCart
+from models.concurrency import LockStripes, RWLock, read_locked, write_locked
 from models.furniture import Furniture
 from models.factory import FurnitureFactory
+from models.hashing import PasswordHasher
+from models.storage import (
+    DuplicateKeyError,
+    JSONBackend,
+    SQLiteBackend,
+    StorageBackend,
+    is_missing,
+)
 
 # Ensure the parent directory is in the import path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -24,7 +33,7 @@ def serialize_furniture(furniture_obj):
         dict: Dictionary representation of the furniture object.
     """
     if isinstance(furniture_obj, Furniture):
-        furniture_dict = vars(furniture_obj)
+        furniture_dict = furniture_obj.to_dict()
         furniture_dict["type"] = type(
             furniture_obj
         ).__name__  # Store type for deserialization
@@ -82,6 +91,38 @@ USER_FILE = os.path.join(
     os.path.join(os.path.dirname(__file__), ".."), "data/users.json"
 )
 
+# Stored fields of a user
+USER_COLUMNS = [
+    "user_id",
+    "username",
+    "email",
+    "password",
+    "address",
+    "type",
+    "role",
+    "shopping_cart",
+]
+
+
+def sqlite_backend(db_path: str) -> SQLiteBackend:
+    """
+    SQLite storage for the users, usernames and emails are unique.
+
+    param:
+        db_path (str): Path to the database file.
+
+    return:
+        SQLiteBackend: Backend to pass to UserDB.configure().
+    """
+    return SQLiteBackend(
+        db_path,
+        "users",
+        "user_id",
+        USER_COLUMNS,
+        json_columns=["shopping_cart"],
+        unique=["username", "email"],
+    )
+
 
 # -------- USER CLASSES {User,Client,Manager}-------- #
 class User(ABC):
@@ -103,7 +144,7 @@ class User(ABC):
         Initialize a User object.
 
         param:
-            user_id (int): The ID of the user.
+            user_id (int): The ID of the user, None to get one from UserDB.add_user.
             username (str): The unique username of the user.
             email (str): The email address of the user.
             password (str): The user's password (hashed if not already): bytes
@@ -122,15 +163,18 @@ class User(ABC):
     @staticmethod
     def hash_password(password: str) -> str:
         """
-        Hashes the password using bcrypt.
+        Hashes the password using bcrypt on the shared password worker pool.
 
         param:
             password (str): The plain text password.
 
         return:
             str: The hashed password.
+
+        raise:
+            HasherSaturatedError: If the password worker pool is saturated.
         """
-        return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        return PasswordHasher.get_instance().hash(password)
 
     def verify_password(self, password: str) -> bool:
         """
@@ -142,8 +186,10 @@ class User(ABC):
         return:
             bool: True if password matches.
 
+        raise:
+            HasherSaturatedError: If the password worker pool is saturated.
         """
-        return bcrypt.checkpw(password.encode(), self.password.encode())
+        return PasswordHasher.get_instance().verify(password, self.password)
 
     def change_password(self, new_password: str) -> None:
         """
@@ -157,6 +203,7 @@ class User(ABC):
         user_db = UserDB.get_instance()
         if self.user_id in user_db.user_data:
             user_db.user_data[self.user_id] = self
+            user_db.mark_dirty(self.user_id)
             user_db.save_users()
 
     def edit_info(
@@ -164,14 +211,36 @@ class User(ABC):
         username: Optional[str] = None,
         email: Optional[str] = None,
         address: Optional[str] = None,
-    ) -> None:
+    ) -> bool:
         """
-        Edits the user's information.
+        Edits the user's information, a user stored in the UserDB is edited
+        through UserDB.edit_user.
 
         param:
                username (str, optional): New username.
                email (str, optional): New email address.
                address (str, optional): New address.
+
+        return:
+            True if the information was changed, False if the username or email
+            belongs to another user.
+        """
+        user_db = UserDB.get_instance()
+        if user_db.get_user(self.user_id) is self:
+            return user_db.edit_user(
+                self.user_id, username=username, email=email, address=address
+            )
+        self._set_info(username, email, address)
+        return True
+
+    def _set_info(
+        self,
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+        address: Optional[str] = None,
+    ) -> None:
+        """
+        Sets the given fields of the user's information.
         """
         if username:
             self.username = username
@@ -179,10 +248,6 @@ class User(ABC):
             self.email = email
         if address:
             self.address = address
-        user_db = UserDB.get_instance()
-        if self.user_id in user_db.user_data:
-            user_db.user_data[self.user_id] = self
-            user_db.save_users()
 
 
 class Client(User):
@@ -252,6 +317,7 @@ class Management(User):
         user_db = UserDB.get_instance()
         if self.user_id in user_db.user_data:
             user_db.user_data[self.user_id] = self
+            user_db.mark_dirty(self.user_id)
             user_db.save_users()
 
 
@@ -259,9 +325,15 @@ class Management(User):
 class UserDB:
     """
     Singleton class to manage user data storage and retrieval.
+
+    Users are stored by a storage backend, by default a JSON file.
+
+    The database can be shared between threads: lookups run in parallel and
+    changes are exclusive.
     """
 
     _instance = None  # Singleton
+    _instance_lock = threading.Lock()
 
     @staticmethod
     def get_instance():
@@ -273,86 +345,314 @@ class UserDB:
         """
 
         if UserDB._instance is None:
-            UserDB._instance = UserDB()
+            with UserDB._instance_lock:
+                if UserDB._instance is None:
+                    UserDB._instance = UserDB()
+        return UserDB._instance
+
+    @staticmethod
+    def configure(
+        file_path: str = USER_FILE, backend: Optional[StorageBackend] = None
+    ):
+        """
+        Replaces the single instance of UserDB with one using the given storage.
+
+        param:
+            file_path (str): Path to the user database file.
+            backend (StorageBackend): Storage of the users (e.g. SQLite), the
+                JSON file if None.
+
+        return:
+            UserDB: The new singleton instance of UserDB.
+        """
+        with UserDB._instance_lock:
+            UserDB._instance = None
+            UserDB._instance = UserDB(file_path, backend)
         return UserDB._instance
 
-    def __init__(self, file_path: str = USER_FILE) -> None:
+    def __init__(
+        self, file_path: str = USER_FILE, backend: Optional[StorageBackend] = None
+    ) -> None:
         """
         Initialize the UserDB and ensure only one instance exists.
 
         param:
               file_path (str): Path to the user database file.
+              backend (StorageBackend): Storage of the users, the JSON file if None.
         """
 
         if UserDB._instance is not None:
             raise Exception(
                 "Use UserDB.get_instance() instead of creating a new instance."
             )
+        # Lookups share the read side, changes take the write side. Requests
+        # changing one user's shopping cart serialize on that user's lock stripe.
+        self._lock = RWLock()
+        self._user_locks = LockStripes()
+        # Also sets the JSON file backend
         self.file_path = file_path
+        if backend is not None:
+            self.backend = backend
+        # Also resets the username -> user_id and email -> user_id indexes
         self.user_data: dict[int, User] = {}
+        # Users changed since the last save, see flush()
+        self._dirty_users: Set[int] = set()
+        self._dirty = False
         self.load_users()
 
-    def load_users(self) -> None:
-        """Loads users from the JSON file and converts stored furniture dictionaries back into objects."""
+    @property
+    def file_path(self) -> str:
+        """
+        Path to the JSON file of the default backend.
+        """
+        return self._file_path
+
+    @file_path.setter
+    def file_path(self, file_path: str) -> None:
+        """
+        Stores the users in a JSON file at the given path.
+        """
+        self._file_path = file_path
+        self.backend: StorageBackend = JSONBackend(file_path, "user_id")
 
-        directory = os.path.dirname(self.file_path)
+    @property
+    def user_data(self) -> dict:
+        """
+        Users stored in the database by user ID.
+        """
+        return self._user_data
 
-        if not os.path.exists(directory):  # Ensure the 'data' directory exists
-            os.makedirs(directory)  # Create the missing directory
+    @user_data.setter
+    @write_locked
+    def user_data(self, user_data: dict) -> None:
+        """
+        Replaces all the users and rebuilds the lookup indexes.
+        """
+        self._user_data = user_data
+        # The stored users no longer match, the next save writes them all
+        self._replaced = True
+        # Indexes of username -> user_id and email -> user_id for O(1) lookups
+        self._username_index: dict[str, int] = {}
+        self._email_index: dict[str, int] = {}
+        for user_id, user in user_data.items():
+            self._username_index[user.username] = user_id
+            self._email_index[user.email] = user_id
+
+    @write_locked
+    def update_user_index(
+        self, user: User, old_username: str, old_email: str
+    ) -> None:
+        """
+        Updates the lookup indexes after a user's username or email changed.
 
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, "w") as file:
-                json.dump({}, file, indent=4)
-            return
+        param:
+            user (User): The edited user.
+            old_username (str): The username before the edit.
+            old_email (str): The email before the edit.
+        """
+        if self._username_index.get(old_username) == user.user_id:
+            del self._username_index[old_username]
+        if self._email_index.get(old_email) == user.user_id:
+            del self._email_index[old_email]
+        self._username_index[user.username] = user.user_id
+        self._email_index[user.email] = user.user_id
+
+    def user_lock(self, user_id: int) -> ContextManager[None]:
+        """
+        Lock guarding the changes of one user, e.g. to the shopping cart.
+
+        param:
+            user_id (int): The ID of the user.
+
+        return:
+            Context manager holding the user's lock.
+        """
+        return self._user_locks.hold([str(user_id)])
+
+    @read_locked
+    def get_by_username(self, username: str) -> Optional[User]:
+        """
+        Retrieve a user by username.
+
+        param:
+            username (str): The username of the user.
+
+        return:
+            User: The user object if found, None otherwise.
+        """
+        user_id = self._username_index.get(username)
+        return None if user_id is None else self._user_data.get(user_id)
+
+    @read_locked
+    def get_by_email(self, email: str) -> Optional[User]:
+        """
+        Retrieve a user by email address.
+
+        param:
+            email (str): The email address of the user.
 
-        with open(self.file_path, "r") as file:
-            data = json.load(file)
+        return:
+            User: The user object if found, None otherwise.
+        """
+        user_id = self._email_index.get(email)
+        return None if user_id is None else self._user_data.get(user_id)
+
+    def _store_user(self, user_id: int, user: User) -> None:
+        """
+        Stores a user and indexes its username and email.
+        """
+        self._user_data[user_id] = user
+        self._username_index[user.username] = user_id
+        self._email_index[user.email] = user_id
+
+    @write_locked
+    def load_users(self) -> None:
+        """Loads users from the backend and converts stored furniture dictionaries back into objects."""
 
-        if not data:
+        if not self.backend.exists():
+            self.save_users()
             return
 
-        for user_id, user in data.items():
+        self._load_records(self.backend.load())
+        self._replaced = False
+
+    def _load_records(self, frame: pd.DataFrame) -> None:
+        """
+        Creates and stores the users of stored records.
+        """
+        for record in frame.to_dict(orient="records"):
+            # Fields a user type does not have are stored as missing values
+            user = {k: v for k, v in record.items() if not is_missing(v)}
+            user_id = user["user_id"]
             type_user = user.pop("type")
             shopping_cart_items = user.pop("shopping_cart", [])
 
             if type_user == "Client":
                 client = Client(**user)
-                client.shopping_cart.items = [
+                for line in shopping_cart_items:
+                    client.shopping_cart.add_item(
+                        deserialize_furniture(line["item"]), line["quantity"]
+                    )
+                self._store_user(user_id, client)
+            else:
+                self._store_user(user_id, Management(**user))
+
+    def _drop_user(self, user_id: int) -> Optional[User]:
+        """
+        Removes a user and its index entries.
+        """
+        user = self._user_data.pop(user_id, None)
+        if user is None:
+            return None
+        if self._username_index.get(user.username) == user_id:
+            del self._username_index[user.username]
+        if self._email_index.get(user.email) == user_id:
+            del self._email_index[user.email]
+        return user
+
+    @write_locked
+    def refresh(self) -> bool:
+        """
+        Loads the users other processes added, changed or deleted in shared storage.
+
+        return:
+            True if the users changed.
+        """
+        changed = self.backend.poll()
+        if not changed and changed is not None:
+            return False
+        if self._dirty:
+            self.save_users()
+        if changed is None:
+            self.user_data = {}
+            self.load_users()
+            return True
+        for user_id in changed:
+            self._drop_user(user_id)
+        self._load_records(self.backend.fetch(changed))
+        return True
+
+    @staticmethod
+    def _user_record(user: User) -> Dict:
+        """
+        The stored record of a user, with the shopping cart serialized.
+        """
+        return {
+            **vars(user),
+            "shopping_cart": (
+                [
                     {
-                        "item": deserialize_furniture(i["item"]),
-                        "quantity": i["quantity"],
+                        "item": serialize_furniture(line.item),
+                        "quantity": line.quantity,
                     }
-                    for i in shopping_cart_items
+                    for line in user.shopping_cart.lines.values()
                 ]
-                self.user_data[user_id] = client
-            else:
-                self.user_data[user_id] = Management(**user)
+                if hasattr(user, "shopping_cart")
+                else None
+            ),
+        }
 
+    @write_locked
     def save_users(self) -> None:
-        """Saves users to the JSON file, ensuring furniture objects are serializable."""
-        with open(self.file_path, "w") as file:
-            json.dump(
-                {
-                    user_id: {
-                        **vars(user),
-                        "shopping_cart": (
-                            [
-                                {
-                                    "item": serialize_furniture(i["item"]),
-                                    "quantity": i["quantity"],
-                                }
-                                for i in user.shopping_cart.items
-                            ]
-                            if hasattr(user, "shopping_cart")
-                            else None
-                        ),
-                    }
-                    for user_id, user in self.user_data.items()
-                },
-                file,
-                indent=4,
-            )
+        """
+        Saves users to the backend, ensuring furniture objects are serializable.
+
+        Backends storing single rows (e.g. SQLite) only write the users changed
+        since the last save.
+        """
+        records = [self._user_record(user) for user in self.user_data.values()]
+        self.backend.save(
+            pd.DataFrame(records, columns=USER_COLUMNS),
+            None if self._replaced else self._dirty_users,
+        )
+        self._replaced = False
+        self._dirty = False
+        self._dirty_users = set()
+
+    @write_locked
+    def mark_dirty(self, user_id: int) -> None:
+        """
+        Records that a user (or the user's shopping cart) changed since the last save.
+
+        param:
+            user_id (int): The ID of the changed user.
+        """
+        self._dirty = True
+        self._dirty_users.add(user_id)
+
+    def _clear_dirty(self, user_id: int) -> None:
+        """
+        Forgets the change of a user that was undone before it was saved.
 
+        param:
+            user_id (int): The ID of the user.
+        """
+        self._dirty_users.discard(user_id)
+        self._dirty = self._replaced or bool(self._dirty_users)
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        True if users changed since they were last saved.
+        """
+        return self._dirty
+
+    @property
+    def dirty_users(self) -> Set[int]:
+        """
+        IDs of the users added, edited or deleted since the last save.
+        """
+        return set(self._dirty_users)
+
+    @write_locked
+    def flush(self) -> None:
+        """
+        Saves the users only if they changed since the last save.
+        """
+        if self._dirty:
+            self.save_users()
+
+    @read_locked
     def get_user(self, user_id: int) -> Optional[User]:
         """
         Retrieve a user by ID.
@@ -365,26 +665,99 @@ class UserDB:
         """
         return self.user_data.get(user_id)
 
+    @write_locked
     def add_user(self, user: User) -> bool:
         """
         Adds a new user to the database.
 
+        A user without an ID (None) gets the next free one. Shared storage
+        allocates it in the same transaction that stores the user, so worker
+        processes never hand out the same ID, and it rejects usernames and
+        emails another process already registered.
+
         param:
             user (User): The user object to add.
 
         return:
             True if user added and False if not.
         """
-        for temp_user in self.user_data.values():
-            if user.username == temp_user.username:
-                print("User name already exists in UserDB")
-                return False
+        taken = self.taken_field(user.username, user.email)
+        if taken:
+            print(f"The {taken} is already registered in UserDB")
+            return False
 
-        self.user_data[user.user_id] = user  # Store as string key
-        self.save_users()
+        if user.user_id is None and self.backend.shared:
+            try:
+                user_id = self.backend.insert_next(self._user_record(user))
+            except DuplicateKeyError as e:
+                print(f"The {e.column} is already registered in UserDB")
+                return False
+            self._assign_id(user, user_id)
+            self._store_user(user_id, user)
+            print("User successfully added!")
+            return True
+
+        if user.user_id is None:
+            self._assign_id(user, self._next_user_id())
+        self._store_user(user.user_id, user)
+        self.mark_dirty(user.user_id)
+        try:
+            self.save_users()
+        except DuplicateKeyError as e:
+            self._drop_user(user.user_id)
+            self._clear_dirty(user.user_id)
+            print(f"The {e.column} is already registered in UserDB")
+            return False
         print("User successfully added!")
         return True
 
+    @read_locked
+    def taken_field(
+        self,
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        Finds which of a username and an email belongs to another user.
+
+        param:
+            username (str, optional): The username to check.
+            email (str, optional): The email to check.
+            user_id (int, optional): The user allowed to hold them, e.g. the
+                edited user.
+
+        return:
+            "username" or "email" if taken by another user, None if both are free.
+        """
+        for field, index, value in (
+            ("username", self._username_index, username),
+            ("email", self._email_index, email),
+        ):
+            owner = index.get(value) if value else None
+            if owner is not None and owner != user_id:
+                return field
+        return None
+
+    def _next_user_id(self) -> int:
+        """
+        The ID after the largest numeric ID in use.
+        """
+        return 1 + max(
+            (int(user_id) for user_id in self._user_data if str(user_id).isdigit()),
+            default=0,
+        )
+
+    @staticmethod
+    def _assign_id(user: User, user_id: int) -> None:
+        """
+        Sets the ID of a new user and of its shopping cart.
+        """
+        user.user_id = user_id
+        if hasattr(user, "shopping_cart"):
+            user.shopping_cart.user_id = str(user_id)
+
+    @write_locked
     def delete_user(self, user_id: int) -> bool:
         """
         Deletes a user from the database.
@@ -398,11 +771,13 @@ class UserDB:
         if user_id not in self.user_data:
             print("User not found. Cannot delete.")
             return False
-        del self.user_data[user_id]
+        self._drop_user(user_id)
+        self.mark_dirty(user_id)
         self.save_users()
         print("User successfully deleted.")
         return True
 
+    @write_locked
     def edit_user(self, user_id: int, **kwargs) -> bool:
         """
         Edits an existing user's details.
@@ -419,13 +794,27 @@ class UserDB:
             print("User not found. Please check the ID and try again.")
             return False
 
-        if "username" in kwargs:
-            for temp_user in self.user_data.values():
-                if kwargs["username"] == temp_user.username:
-                    print("User name already exists in UserDB")
-                    return False
+        # Checked before any change, the user may keep its own username and email
+        taken = self.taken_field(kwargs.get("username"), kwargs.get("email"), user_id)
+        if taken:
+            print(f"The {taken} is already registered in UserDB")
+            return False
 
-        user.edit_info(**kwargs)
-        self.save_users()
+        old_info = (user.username, user.email, user.address)
+        was_dirty = user_id in self._dirty_users
+        user._set_info(**kwargs)
+        self.update_user_index(user, *old_info[:2])
+        self.mark_dirty(user_id)
+        try:
+            self.save_users()
+        except DuplicateKeyError as e:
+            # Another process registered the username or email meanwhile
+            new_username, new_email = user.username, user.email
+            user.username, user.email, user.address = old_info
+            self.update_user_index(user, new_username, new_email)
+            if not was_dirty:
+                self._clear_dirty(user_id)
+            print(f"The {e.column} is already registered in UserDB")
+            return False
         print("User information updated successfully.")
         return True
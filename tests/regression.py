@@ -28,7 +28,7 @@ def setup_system() -> Tuple[UserDB, Inventory, OrderManager]:
         os.makedirs(DATA_DIR)
 
     # Remove old test files
-    for file_path in [USER_FILE, INVEN_FILE, ORDER_FILE]:
+    for file_path in [USER_FILE, INVEN_FILE, ORDER_FILE, ORDER_FILE + ".journal"]:
         if os.path.exists(file_path):
             os.remove(file_path)
 
@@ -211,7 +211,7 @@ def check_other_inventory_unchanged(
     for furniture_item in original_inventory:
         if furniture_item.name not in modified_items:
             updated_item = updated_inventory.search_by(name=furniture_item.name)[0]
-            if updated_item != furniture_item:
+            if updated_item.to_dict() != furniture_item.to_dict():
                 print(
                     f"Unexpected change detected for {furniture_item.name} in inventory.")
                 return
@@ -222,7 +222,7 @@ def cleanup_system() -> None:
     """
     Removes test data files after execution.
     """
-    for file_path in [USER_FILE, INVEN_FILE, ORDER_FILE]:
+    for file_path in [USER_FILE, INVEN_FILE, ORDER_FILE, ORDER_FILE + ".journal"]:
         if os.path.exists(file_path):
             os.remove(file_path)
     print("Test files cleaned up.")
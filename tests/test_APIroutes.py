@@ -142,5 +142,143 @@ def test_update_order_status():
     assert "Order status updated" in response.json()["message"]
 
 
+@pytest.fixture(scope="module")
+def api():
+    """
+    The API module, imported with a token signing key set.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("TOKEN_SECRET", "test-key-signing-the-access-tokens")
+        from app import APIroutes
+    return APIroutes
+
+
+@pytest.fixture
+def store(api, tmp_path, monkeypatch):
+    """
+    The API app backed by temporary storage, with a client holding 2 of the 5
+    units of a chair in the cart.
+    """
+    from app.auth import issue_token
+    from models.holds import HoldManager
+    from models.inventory import Inventory
+    from models.order import OrderManager
+    from models.user import Client, UserDB
+
+    inventory = Inventory(str(tmp_path / "inventory.pkl"))
+    inventory.add_item(
+        {
+            "type": "Chair",
+            "name": "Office Chair",
+            "description": "Ergonomic chair",
+            "price": 120.0,
+            "dimensions": "100x50x75 cm",
+            "serial_number": "CH001",
+            "quantity": 5,
+            "weight": 7.0,
+            "manufacturing_country": "Israel",
+            "has_wheels": True,
+            "how_many_legs": 4,
+        }
+    )
+    orders = OrderManager(str(tmp_path / "orders.pkl"), fsync=False)
+    # The previous instance is restored after the test
+    monkeypatch.setattr(UserDB, "_instance", None)
+    user_db = UserDB.configure(str(tmp_path / "users.json"))
+    monkeypatch.setattr(api, "USER_DB", user_db)
+    monkeypatch.setattr(api, "INVENTORY", inventory)
+    monkeypatch.setattr(api, "HOLDS", HoldManager(inventory))
+    monkeypatch.setattr(api, "ORDER_MANGER", orders)
+
+    client = Client(
+        user_id="1",
+        username="client_user",
+        email="client@example.com",
+        password="ClientPass123!",
+        address="123 Client St",
+    )
+    user_db.add_user(client)
+    client.shopping_cart.add_item(inventory.get_by_serial("CH001"), 2)
+    with api.app.app_context():
+        headers = {"Authorization": f"Bearer {issue_token(client)}"}
+    return api.app.test_client(), inventory, orders, headers
+
+
+def test_checkout_without_body(store):
+    """
+    Test a checkout request without a JSON body is served instead of failing
+    after the stock was reserved.
+    """
+    client, inventory, _, headers = store
+    response = client.post("/orders", headers=headers)
+    assert response.status_code == 201
+    assert inventory.get_by_serial("CH001").quantity == 3
+
+
+def test_checkout_failure_releases_stock(store, monkeypatch):
+    """
+    Test the stock reserved for a checkout is returned when creating the order
+    fails.
+    """
+    client, inventory, orders, headers = store
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("order storage unavailable")
+
+    monkeypatch.setattr(orders, "create_order", fail)
+    response = client.post(
+        "/orders", json={"payment_info": "card"}, headers=headers
+    )
+    assert response.status_code == 500
+    assert inventory.get_by_serial("CH001").quantity == 5
+
+
+def test_checkout_charges_current_prices(store):
+    """
+    Test a checkout charges the prices of the inventory at checkout.
+    """
+    client, inventory, orders, headers = store
+    inventory.reprice(percent=-50, name="Office Chair")
+    response = client.post(
+        "/orders", json={"payment_info": "card"}, headers=headers
+    )
+    assert response.status_code == 201
+    assert orders.orders.iloc[0]["total_price"] == 120.0
+
+
+def test_search_rejects_invalid_attributes(store):
+    """
+    Test searches with a malformed attributes filter are refused.
+    """
+    client, _, _, headers = store
+    response = client.get(
+        "/inventory", json={"attributes": {"has_wheels": True}}, headers=headers
+    )
+    assert response.status_code == 200
+    for attributes in (
+        {"has_wheels": {"x": 1}},
+        {"how_many_legs": [[4]]},
+        {"has_jacuzzi": True},
+        ["has_wheels"],
+    ):
+        response = client.get(
+            "/inventory", json={"attributes": attributes}, headers=headers
+        )
+        assert response.status_code == 400
+
+
+def test_cart_holds_refused_with_shared_storage(api, monkeypatch):
+    """
+    Test cart holds, tracked by a single process, can not be enabled together
+    with storage shared by worker processes.
+    """
+
+    monkeypatch.setitem(api.app.config, "CART_HOLDS", True)
+    assert api.cart_holds_enabled() is True
+    monkeypatch.setattr(api, "STORE_DB", "store.db")
+    with pytest.raises(RuntimeError):
+        api.cart_holds_enabled()
+
+
 if __name__ == "__main__":
     pytest.main()
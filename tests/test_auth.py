@@ -1,6 +1,15 @@
 import pytest
+from flask import Flask, jsonify
 
-from app.auth import authenticate_user
+from app.auth import (
+    MIN_TOKEN_KEY_BYTES,
+    TOKEN_KEY_ENV,
+    authenticate_user,
+    current_user,
+    issue_token,
+    load_token_key,
+    require_auth,
+)
 from models.user import UserDB, Client, Management
 
 
@@ -54,3 +63,67 @@ def test_authenticate_non_existent_user(setup_user_db: UserDB) -> None:
     """
     user = authenticate_user("client_user", "SomePassword")
     assert user is None, "Authentication should fail for an email not in the database"
+
+
+@pytest.fixture(scope="module")
+def token_app() -> Flask:
+    """
+    Minimal Flask app with one route protected by require_auth.
+    """
+    app = Flask(__name__)
+    app.config["TOKEN_KEY"] = "test_secret_key_for_access_tokens"
+
+    @app.route("/whoami")
+    @require_auth
+    def whoami():
+        return jsonify({"username": current_user().username})
+
+    return app
+
+
+def test_token_authenticates_request(setup_user_db: UserDB, token_app: Flask) -> None:
+    """
+    Test that a token issued on login resolves the user without the password.
+    """
+    user = authenticate_user("client_user", "ClientPass123!")
+    with token_app.app_context():
+        token = issue_token(user)
+
+    response = token_app.test_client().get(
+        "/whoami", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert response.json["username"] == "client_user"
+
+
+def test_invalid_token_rejected(setup_user_db: UserDB, token_app: Flask) -> None:
+    """
+    Test that requests with a tampered token or no credentials are rejected.
+    """
+    user = authenticate_user("client_user", "ClientPass123!")
+    with token_app.app_context():
+        token = issue_token(user)
+
+    client = token_app.test_client()
+    response = client.get("/whoami", headers={"Authorization": f"Bearer {token}x"})
+    assert response.status_code == 401
+    assert client.get("/whoami").status_code == 401
+
+
+def test_load_token_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test the signing key is read from the environment, and a missing or short
+    key is refused outside debug mode.
+    """
+    monkeypatch.delenv(TOKEN_KEY_ENV, raising=False)
+    with pytest.raises(RuntimeError):
+        load_token_key()
+    assert len(load_token_key(debug=True)) >= MIN_TOKEN_KEY_BYTES
+
+    monkeypatch.setenv(TOKEN_KEY_ENV, "short")
+    with pytest.raises(RuntimeError):
+        load_token_key(debug=True)
+
+    key = "k" * MIN_TOKEN_KEY_BYTES
+    monkeypatch.setenv(TOKEN_KEY_ENV, key)
+    assert load_token_key() == key
@@ -0,0 +1,56 @@
+import pytest
+from models.cache import QueryCache
+
+
+def test_cache_hit_and_miss() -> None:
+    """Test that a stored result is served for the same key and generation."""
+    cache = QueryCache()
+
+    assert cache.get(("Chair",), 0) is None
+    cache.put(("Chair",), (1, 2, 3), 0)
+    assert cache.get(("Chair",), 0) == (1, 2, 3)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_generation_invalidates() -> None:
+    """Test that a newer generation drops every cached entry."""
+    cache = QueryCache()
+    cache.put(("Chair",), (1, 2, 3), 0)
+
+    assert cache.get(("Chair",), 1) is None
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_cache_lru_eviction() -> None:
+    """Test that the least recently used entry is evicted first."""
+    cache = QueryCache(max_entries=2)
+    cache.put("a", (1,), 0)
+    cache.put("b", (2,), 0)
+    cache.get("a", 0)
+    cache.put("c", (3,), 0)
+
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == (1,)
+    assert cache.get("c", 0) == (3,)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_memory_bound() -> None:
+    """Test that the cache stays within its memory bound."""
+    cache = QueryCache(max_bytes=2000)
+    for i in range(20):
+        cache.put(i, tuple(range(50)), 0)
+
+    assert cache.stats()["bytes"] <= 2000
+    assert cache.stats()["evictions"] > 0
+    # A single result larger than the bound is not cached at all
+    cache.put("big", tuple(range(1000)), 0)
+    assert cache.get("big", 0) is None
+
+
+def test_cache_invalid_bounds() -> None:
+    """Test that non positive bounds are rejected."""
+    with pytest.raises(ValueError):
+        QueryCache(max_entries=0)
@@ -1,8 +1,11 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock
 from models.cart import ShoppingCart, PaymentGateway
 from models.cart import calc_discount
 from models.furniture import Chair, Table
+from models.inventory import Inventory
 
 
 class TestShoppingCart(unittest.TestCase):
@@ -38,8 +41,36 @@ class TestShoppingCart(unittest.TestCase):
         )
         self.payment_gateway = PaymentGateway()
         self.inventory = MagicMock()
+        self.inventory.get_by_serial.side_effect = {
+            "T123": self.item1,
+            "C123": self.item2,
+        }.get
         self.order_manager = MagicMock()
 
+    @staticmethod
+    def table_inventory(directory: str) -> Inventory:
+        """
+        Inventory stored in directory holding 10 units of the dining table.
+        """
+        inventory = Inventory(os.path.join(directory, "inventory.pkl"))
+        inventory.add_item(
+            {
+                "type": "Table",
+                "name": "Dining Table",
+                "description": "Wooden table",
+                "price": 100.0,
+                "dimensions": "100x50",
+                "serial_number": "T123",
+                "quantity": 10,
+                "weight": 20.0,
+                "manufacturing_country": "USA",
+                "expandable": False,
+                "how_many_seats": 4,
+                "can_fold": False,
+            }
+        )
+        return inventory
+
 
     def test_add_invalid_quantity(self) -> None:
         """
@@ -104,15 +135,47 @@ class TestShoppingCart(unittest.TestCase):
         self.cart.remove_item("Dining Table")
         self.assertEqual(len(self.cart.get_cart()), 3)
 
+    def test_add_same_item_merges_lines(self):
+        """
+        Tests that adding an item already in the cart increases its quantity.
+        """
+        self.cart.add_item(self.item1, 2)
+        self.cart.add_item(self.item1, 3)
+        self.assertEqual(len(self.cart.lines), 1)
+        self.assertEqual(self.cart.quantity_of("T123"), 5)
+        self.assertEqual(self.cart.calculate_total(), 500)
+
+    def test_set_quantity(self):
+        """
+        Tests changing and zeroing the quantity of a cart line.
+        """
+        self.cart.add_item(self.item1, 2)
+        self.cart.add_item(self.item2, 1)
+        self.assertTrue(self.cart.set_quantity(self.item1, 4))
+        self.assertEqual(self.cart.calculate_total(), 450)
+        self.cart.set_quantity(self.item1, 0)
+        self.assertNotIn("T123", self.cart.lines)
+        self.assertEqual(self.cart.calculate_total(), 50)
+        self.assertFalse(self.cart.set_quantity(self.item2, -1))
+
     def test_validate_cart_with_inventory(self):
         """
         Tests validating the cart with inventory availability.
         """
-        self.inventory.search_by.side_effect = lambda name: (
-            [self.item1] if name == "Dining Table" else [self.item2]
-        )
+        self.inventory.check_availability.return_value = {}
         self.cart.add_item(self.item1, 2)
         self.assertTrue(self.cart.validate_cart(self.inventory))
+        self.inventory.check_availability.assert_called_once_with({"T123": 2})
+
+    def test_validate_cart_with_shortfall(self):
+        """
+        Tests that validation fails when the inventory reports a shortfall.
+        """
+        self.inventory.check_availability.return_value = {
+            "T123": {"requested": 2, "available": 1}
+        }
+        self.cart.add_item(self.item1, 2)
+        self.assertFalse(self.cart.validate_cart(self.inventory))
 
     def test_calculate_total(self):
         """
@@ -130,6 +193,18 @@ class TestShoppingCart(unittest.TestCase):
         self.cart.add_item(self.item2, 3)
         self.assertEqual(self.cart.apply_discount(10), calc_discount(350, 10))
 
+    def test_total_is_exact(self):
+        """
+        Tests cart totals do not accumulate float rounding errors.
+        """
+        self.item2.price = 0.1
+        self.cart.add_item(self.item2, 3)
+        self.cart.add_item(self.item1, 1)
+        self.cart.remove_item("Dining Table")
+        self.assertEqual(self.cart.calculate_total(), 0.3)
+        self.assertEqual(self.cart.total_cents(), 30)
+        self.assertEqual(self.cart.lines["C123"].unit_cents, 10)
+
     def test_purchase_successful(self):
         """
         Tests a successful purchase process.
@@ -141,7 +216,10 @@ class TestShoppingCart(unittest.TestCase):
         )
         self.assertEqual(len(self.cart.get_cart()), 0)
         self.order_manager.create_order.assert_called()
-        self.inventory.update_quantity.assert_called()
+        self.inventory.reserve.assert_called_once_with({"T123": 2})
+        self.inventory.commit.assert_called_once_with(
+            self.inventory.reserve.return_value
+        )
 
     def test_purchase_fails_due_to_payment(self):
         """
@@ -154,6 +232,76 @@ class TestShoppingCart(unittest.TestCase):
         )
         self.assertNotEqual(len(self.cart.get_cart()), 0)
         self.order_manager.create_order.assert_not_called()
+        self.inventory.release.assert_called_once_with(
+            self.inventory.reserve.return_value
+        )
+
+    def test_concurrent_carts_deduct_current_stock(self):
+        """
+        Tests carts holding the same item both deduct from the inventory's
+        current stock, not from the quantity their item had when added.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            inventory = self.table_inventory(directory)
+            first, second = ShoppingCart("user1"), ShoppingCart("user2")
+            first.add_item(inventory.get_by_serial("T123"), 3)
+            second.add_item(inventory.get_by_serial("T123"), 4)
+
+            for cart in (first, second):
+                self.assertTrue(
+                    cart.purchase(
+                        self.payment_gateway, "card123", inventory, MagicMock()
+                    )
+                )
+            self.assertEqual(inventory.get_by_serial("T123").quantity, 3)
+
+            # Not enough stock left, nothing is charged or deducted
+            third = ShoppingCart("user3")
+            third.add_item(inventory.get_by_serial("T123"), 4)
+            order_manager = MagicMock()
+            self.assertFalse(
+                third.purchase(
+                    self.payment_gateway, "card123", inventory, order_manager
+                )
+            )
+            order_manager.create_order.assert_not_called()
+            self.assertEqual(inventory.get_by_serial("T123").quantity, 3)
+
+    def test_purchase_charges_current_prices(self):
+        """
+        Tests a purchase charges the inventory price at checkout, not the price
+        the item had when it was added to the cart.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            inventory = self.table_inventory(directory)
+            self.cart.add_item(inventory.get_by_serial("T123"), 2)
+            inventory.reprice(percent=-50, name="Dining Table")
+            self.payment_gateway.process_payment = MagicMock(return_value=True)
+
+            self.assertTrue(
+                self.cart.purchase(
+                    self.payment_gateway, "card123", inventory, self.order_manager
+                )
+            )
+            self.payment_gateway.process_payment.assert_called_once_with(
+                "card123", 100.0
+            )
+            self.order_manager.create_order.assert_called_once()
+            self.assertEqual(self.order_manager.create_order.call_args[0][2], 100.0)
+
+    def test_reprice(self):
+        """
+        Tests repricing the cart updates the lines and the total.
+        """
+        self.cart.add_item(self.item1, 2)
+        self.cart.add_item(self.item2, 1)
+        self.assertFalse(self.cart.reprice(self.inventory))
+
+        self.item1.price = 80.0
+        self.assertTrue(self.cart.reprice(self.inventory))
+        self.assertEqual(self.cart.lines["T123"].unit_cents, 8000)
+        self.assertEqual(list(self.cart.lines), ["T123", "C123"])
+        self.assertEqual(self.cart.total_cents(), 21000)
 
     def test_purchase_without_inventory_or_order_manager(self):
         """
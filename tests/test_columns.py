@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from models.columns import ColumnStore
+
+
+SCHEMA = {"serial": "object", "price": "float64", "flag": "boolean", "legs": "Int64"}
+
+
+def test_append_and_frame() -> None:
+    """Test rows are appended with missing values and read back typed."""
+    store = ColumnStore(SCHEMA)
+    for i in range(20):
+        store.append({"serial": f"S{i}", "price": float(i), "flag": i % 2 == 0})
+
+    frame = store.frame()
+    assert len(store) == len(frame) == 20
+    assert frame.dtypes.astype(str).to_dict() == SCHEMA
+    assert frame["serial"].iat[19] == "S19"
+    assert frame["flag"].tolist()[:3] == [True, False, True]
+    assert frame["legs"].isna().all()
+
+
+def test_frames_keep_their_rows() -> None:
+    """Test appends and deletes do not change frames built before them."""
+    store = ColumnStore(SCHEMA)
+    store.append({"serial": "A", "price": 1.0, "legs": 4})
+    before = store.frame()
+
+    store.append({"serial": "B", "price": 2.0, "legs": 3})
+    after = store.frame()
+    # Appended in place, without copying the stored rows
+    assert np.shares_memory(before["price"].to_numpy(), after["price"].to_numpy())
+    assert before["serial"].tolist() == ["A"]
+
+    store.delete(0)
+    assert store.frame()["serial"].tolist() == ["B"]
+    assert store.frame()["legs"].tolist() == [3]
+    assert after["serial"].tolist() == ["A", "B"]
+
+
+def test_load_and_replace() -> None:
+    """Test a store built from a table, and replacing a column."""
+    frame = pd.DataFrame(
+        {
+            "serial": ["A", "B"],
+            "price": [1.0, 2.0],
+            "flag": [True, None],
+            "legs": [4, None],
+        }
+    ).astype(SCHEMA)
+    store = ColumnStore(SCHEMA, frame)
+    assert store.frame().equals(frame)
+
+    old = store.frame()
+    store.replace("price", np.array([5.0, 6.0]))
+    assert store.frame()["price"].tolist() == [5.0, 6.0]
+    assert old["price"].tolist() == [1.0, 2.0]
+    # Writes to a column show in the frames sharing it
+    store.column("price")[0] = 7.0
+    assert store.frame()["price"].iat[0] == 7.0
@@ -0,0 +1,175 @@
+import random
+import threading
+import pytest
+from typing import Callable, List
+
+from models.cart import ShoppingCart
+from models.concurrency import RWLock
+from models.furniture import Chair
+from models.inventory import Inventory, InsufficientStockError
+from models.order import OrderManager
+from models.user import Client, UserDB
+
+THREADS = 16
+ROUNDS = 50
+
+
+def run_threads(target: Callable[[int], None], count: int = THREADS) -> None:
+    """Run target(thread_number) on several threads and re-raise any error."""
+    errors: List[BaseException] = []
+
+    def runner(number: int) -> None:
+        try:
+            target(number)
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=runner, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def chair_desc(serial: str, quantity: int = 20) -> dict:
+    return {
+        "type": "Chair",
+        "name": f"Chair {serial}",
+        "description": "Office chair",
+        "price": 100.0,
+        "dimensions": "50x50x100 cm",
+        "serial_number": serial,
+        "quantity": quantity,
+        "weight": 7.0,
+        "manufacturing_country": "Germany",
+        "has_wheels": True,
+        "how_many_legs": 4,
+    }
+
+
+def test_rwlock_readers_share_writers_exclude() -> None:
+    """Test readers hold the lock together while a writer holds it alone."""
+    lock = RWLock()
+    inside = threading.Barrier(2, timeout=5)
+
+    def reader(_: int) -> None:
+        with lock.read():
+            inside.wait()  # Both readers must be inside at the same time
+
+    run_threads(reader, 2)
+
+    active = []
+
+    def writer(_: int) -> None:
+        for _ in range(ROUNDS):
+            with lock.write():
+                active.append(1)
+                assert len(active) == 1
+                with lock.read():  # The writer may also read
+                    pass
+                active.pop()
+
+    run_threads(writer, 4)
+
+
+def test_rwlock_rejects_upgrade() -> None:
+    """Test a reader cannot upgrade to a writer, which would deadlock."""
+    lock = RWLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+
+
+def test_inventory_stress(tmp_path) -> None:
+    """Hammer the inventory with reservations, searches and additions."""
+    inventory = Inventory(str(tmp_path / "inventory.pkl"))
+    serials = [f"C{i}" for i in range(8)]
+    for serial in serials:
+        inventory.add_item(chair_desc(serial))
+
+    def worker(number: int) -> None:
+        rng = random.Random(number)
+        for round_number in range(ROUNDS):
+            lines = {serial: rng.randint(1, 3) for serial in rng.sample(serials, 2)}
+            try:
+                reservation_id = inventory.reserve(lines)
+            except InsufficientStockError:
+                pass
+            else:
+                assert inventory.release(reservation_id)
+            assert len(inventory.search_by(category="Chair", limit=5)) == 5
+            assert inventory.get_by_serial(rng.choice(serials)) is not None
+            if round_number % 5 == 0:
+                # The stock of a snapshot does not change under reservations
+                snapshot = inventory.snapshot()
+                stock = snapshot.frame["quantity"].tolist()
+                try:
+                    inventory.release(inventory.reserve({rng.choice(serials): 1}))
+                except InsufficientStockError:
+                    pass
+                assert snapshot.frame["quantity"].tolist() == stock
+            if round_number % 10 == 0:
+                assert inventory.add_item(chair_desc(f"N{number}-{round_number}"))
+
+    run_threads(worker)
+
+    assert [inventory.get_by_serial(s).quantity for s in serials] == [20] * 8
+    assert len(inventory.data) == 8 + THREADS * ROUNDS // 10
+    assert len(inventory.search_by(category="Chair")) == len(inventory.data)
+
+
+def test_order_manager_stress(tmp_path) -> None:
+    """Hammer the order manager with creations, lookups and status updates."""
+    order_manager = OrderManager(str(tmp_path / "orders.pkl"), fsync=False)
+    chair = Chair(**{k: v for k, v in chair_desc("C1").items() if k != "type"})
+
+    def worker(number: int) -> None:
+        cart = ShoppingCart(str(number))
+        cart.add_item(chair, 1)
+        for _ in range(ROUNDS):
+            order_manager.create_order(cart, "Credit Card", 100.0)
+            history = order_manager.get_order_history(number)
+            order = history[-1]
+            assert order_manager.get_order(order["order_id"], number) is not None
+            order_manager.update_order_status(order["order_id"], "Shipped")
+
+    run_threads(worker)
+
+    assert len(order_manager.orders) == THREADS * ROUNDS
+    for number in range(THREADS):
+        history = order_manager.get_order_history(number)
+        assert len(history) == ROUNDS
+        assert {order["status"] for order in history} == {"Shipped"}
+
+
+def test_user_db_stress(tmp_path) -> None:
+    """Hammer the user database with registrations and lookups."""
+    UserDB._instance = None
+    user_db = UserDB.get_instance()
+    user_db.file_path = str(tmp_path / "users.json")
+    user_db.user_data = {}
+    # Already hashed, so the stress test does not spend its time in bcrypt
+    password = "$2b$12$" + "a" * 53
+
+    def worker(number: int) -> None:
+        for i in range(ROUNDS // 5):
+            user_id = number * ROUNDS + i
+            user = Client(user_id, f"user{user_id}", f"{user_id}@x.com", password, "")
+            assert user_db.add_user(user)
+            assert user_db.get_by_username(f"user{user_id}") is user
+            assert user_db.get_by_email(f"{user_id}@x.com") is user
+            with user_db.user_lock(user_id):
+                user.shopping_cart.add_item(
+                    Chair(**{k: v for k, v in chair_desc("C1").items() if k != "type"}),
+                    1,
+                )
+                user_db.mark_dirty(user_id)
+
+    run_threads(worker)
+
+    assert len(user_db.user_data) == THREADS * ROUNDS // 5
+    user_db.flush()
+    assert user_db.is_dirty is False
+    UserDB._instance = None
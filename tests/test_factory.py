@@ -135,3 +135,35 @@ def test_create_furniture_invalid_type():
             "has_wheels": "INVALID_TYPE",
             "how_many_legs": 4
         })
+
+
+def test_register_compiles_validator():
+    """Test registering a type compiles a validator checking its own fields."""
+    from models.factory import FURNITURE_VALIDATORS
+
+    class Stool(Furniture):
+        __slots__ = ("how_many_legs",)
+
+        def __init__(self, how_many_legs: int = 3, **kwargs):
+            super().__init__(**kwargs)
+            self.how_many_legs = how_many_legs
+
+    FurnitureFactory.register_furniture("Stool", Stool)
+    assert "Stool" in FURNITURE_VALIDATORS
+    desc = {
+        "name": "Bar Stool",
+        "description": "A tall stool",
+        "price": 80.0,
+        "dimensions": "40x40x75 cm",
+        "serial_number": "ST001",
+        "quantity": 3,
+        "weight": 4.0,
+        "manufacturing_country": "Italy",
+    }
+    stool = FurnitureFactory.create_furniture({**desc, "type": "Stool"})
+    assert stool.how_many_legs == 3
+    with pytest.raises(TypeError, match="Invalid type for how_many_legs"):
+        FurnitureFactory.create_furniture(
+            {**desc, "type": "Stool", "how_many_legs": "three"}
+        )
+    del FURNITURE_CLASSES["Stool"], FURNITURE_VALIDATORS["Stool"]
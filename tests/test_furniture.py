@@ -1,3 +1,4 @@
+import pickle
 import pytest
 from models.furniture import Chair, Sofa, Table, Bed, Closet, Furniture
 from models.factory import FurnitureFactory
@@ -201,3 +202,82 @@ def test_furniture_factory_invalid_types():
 
     with pytest.raises(TypeError, match="Invalid type for price. Expected float."):
         FurnitureFactory.create_furniture(invalid_data)
+
+
+def make_chair(serial_number: str, **attributes) -> Chair:
+    return Chair(
+        name="Office Chair",
+        description="Sample description",
+        price=100.0,
+        dimensions="".join(["50x50x", "100 cm"]),
+        serial_number=serial_number,
+        quantity=5,
+        weight=7.0,
+        manufacturing_country="".join(["Ger", "many"]),
+        **attributes,
+    )
+
+
+def test_furniture_uses_slots():
+    """Ensure furniture objects have no attribute dict and share the default tax rate."""
+    first, second = make_chair("SC001"), make_chair("SC002")
+    assert not hasattr(first, "__dict__")
+    with pytest.raises(AttributeError):
+        first.color = "red"
+    # Equal low-cardinality strings are stored once
+    assert first.dimensions is second.dimensions
+    assert first.manufacturing_country is second.manufacturing_country
+
+    first.apply_tax(0.1)
+    assert first.tax_rate == 0.1
+    assert second.tax_rate == Furniture.TAX_RATE
+
+
+def test_furniture_missing_text_attributes():
+    """Ensure missing dimensions or country are kept instead of failing to intern."""
+    chair = Chair(
+        name="Office Chair",
+        description="Sample description",
+        price=100.0,
+        dimensions=None,
+        serial_number="SC001",
+        quantity=5,
+        weight=7.0,
+        manufacturing_country=None,
+        has_wheels=True,
+        how_many_legs=4,
+    )
+    assert chair.dimensions is None
+    record = {**chair.to_dict(), "dimensions": None}
+    del record["tax_rate"]
+    assert Chair.from_record(record).manufacturing_country is None
+
+
+def test_furniture_to_dict():
+    """Ensure to_dict returns the base and type-specific attributes."""
+    chair = make_chair("SC001", has_wheels=True)
+    assert chair.to_dict() == {
+        "name": "Office Chair",
+        "description": "Sample description",
+        "price": 100.0,
+        "dimensions": "50x50x100 cm",
+        "serial_number": "SC001",
+        "quantity": 5,
+        "weight": 7.0,
+        "manufacturing_country": "Germany",
+        "has_wheels": True,
+        "how_many_legs": 4,
+        "tax_rate": 0.17,
+    }
+
+
+def test_furniture_pickle():
+    """Ensure furniture objects pickled with or without slots are restored."""
+    chair = make_chair("SC001")
+    chair.tax_rate = 0.2
+    assert pickle.loads(pickle.dumps(chair)).to_dict() == chair.to_dict()
+
+    # Objects pickled before the slots carry their attributes as a dict
+    legacy = Chair.__new__(Chair)
+    legacy.__setstate__({**chair.to_dict(), "tax_rate": 0.17})
+    assert legacy.to_dict() == {**chair.to_dict(), "tax_rate": 0.17}
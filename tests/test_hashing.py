@@ -0,0 +1,96 @@
+import threading
+import pytest
+from models.hashing import PasswordHasher, HasherSaturatedError
+
+
+def test_hash_and_verify() -> None:
+    """Test that passwords hashed on the pool verify against their hash."""
+    hasher = PasswordHasher(max_workers=2, max_queue=2)
+    hashed = hasher.hash("Secret123!")
+
+    assert hashed.startswith("$2b$")
+    assert hasher.verify("Secret123!", hashed)
+    assert not hasher.verify("Wrong", hashed)
+    assert hasher.metrics()["completed"] == 3
+    hasher.shutdown()
+
+
+def test_saturated_pool_rejects() -> None:
+    """Test that a job beyond the workers and queue is rejected right away."""
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_job() -> None:
+        started.set()
+        release.wait()
+
+    worker = threading.Thread(target=hasher._run, args=(blocking_job,))
+    worker.start()
+    started.wait()
+
+    with pytest.raises(HasherSaturatedError):
+        hasher.hash("Secret123!")
+    assert hasher.metrics()["rejected"] == 1
+    assert hasher.metrics()["running"] == 1
+
+    release.set()
+    worker.join()
+    assert hasher.hash("Secret123!").startswith("$2b$")
+    hasher.shutdown()
+
+
+def test_timed_out_jobs_are_rejected() -> None:
+    """Test that callers waiting past the timeout are rejected, and a job still
+    waiting for a worker is cancelled."""
+    hasher = PasswordHasher(max_workers=1, max_queue=1, timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_job() -> None:
+        started.set()
+        release.wait()
+
+    def wait_for_job() -> None:
+        with pytest.raises(HasherSaturatedError):
+            hasher._run(blocking_job)
+
+    worker = threading.Thread(target=wait_for_job)
+    worker.start()
+    started.wait()
+
+    with pytest.raises(HasherSaturatedError):
+        hasher.hash("Secret123!")
+    worker.join()
+    assert hasher.metrics()["rejected"] == 2
+    assert hasher.metrics()["queue_depth"] == 0
+    assert hasher.metrics()["running"] == 1
+
+    release.set()
+    hasher.shutdown()
+    assert hasher.metrics()["running"] == 0
+    assert hasher.metrics()["completed"] == 1
+
+
+def test_queue_depth_metric() -> None:
+    """Test that jobs waiting for a worker are reported as queue depth."""
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_job() -> None:
+        started.set()
+        release.wait()
+
+    workers = [threading.Thread(target=hasher._run, args=(blocking_job,))]
+    workers[0].start()
+    started.wait()
+    workers.append(threading.Thread(target=hasher._run, args=(lambda: None,)))
+    workers[1].start()
+    while hasher.metrics()["queue_depth"] < 1:
+        pass
+
+    assert hasher.metrics()["queue_depth"] == 1
+    release.set()
+    for worker in workers:
+        worker.join()
+    assert hasher.metrics()["queue_depth"] == 0
+    assert hasher.metrics()["completed"] == 2
+    hasher.shutdown()
@@ -0,0 +1,102 @@
+import pytest
+from typing import List
+
+from models.holds import HoldManager
+from models.inventory import Inventory, InsufficientStockError
+
+
+class FakeClock:
+    """Manually advanced clock for expiry tests."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def inventory(tmp_path) -> Inventory:
+    """Inventory with two chairs of 5 units each."""
+    inventory = Inventory(str(tmp_path / "inventory.pkl"))
+    for serial in ("C1", "C2"):
+        inventory.add_item(
+            {
+                "type": "Chair",
+                "name": f"Chair {serial}",
+                "description": "Office chair",
+                "price": 100.0,
+                "dimensions": "50x50x100 cm",
+                "serial_number": serial,
+                "quantity": 5,
+                "weight": 7.0,
+                "manufacturing_country": "Germany",
+                "has_wheels": True,
+                "how_many_legs": 4,
+            }
+        )
+    return inventory
+
+
+def stock(inventory: Inventory, serials: List[str]) -> List[int]:
+    return [inventory.get_by_serial(serial).quantity for serial in serials]
+
+
+def test_hold_and_release(inventory: Inventory) -> None:
+    """Test holds deduct stock and releasing them returns it."""
+    holds = HoldManager(inventory)
+    holds.hold("1", "C1", 2)
+    holds.hold("1", "C2", 1)
+
+    assert stock(inventory, ["C1", "C2"]) == [3, 4]
+    assert holds.held("1") == {"C1": 2, "C2": 1}
+    with pytest.raises(InsufficientStockError):
+        holds.hold("2", "C1", 4)
+
+    assert holds.release("1", "C1") == 1
+    assert stock(inventory, ["C1", "C2"]) == [5, 4]
+    assert holds.held("1") == {"C2": 1}
+
+
+def test_sweep_releases_only_expired(inventory: Inventory) -> None:
+    """Test a sweep releases the expired holds and keeps the others."""
+    clock = FakeClock()
+    holds = HoldManager(inventory, ttl=60, clock=clock)
+    holds.hold("1", "C1", 2)
+    clock.now = 30
+    holds.hold("2", "C1", 1)
+
+    clock.now = 61
+    assert holds.sweep() == 1
+    assert stock(inventory, ["C1"]) == [4]
+    assert holds.held("1") == {}
+    assert holds.held("2") == {"C1": 1}
+
+    clock.now = 100
+    assert holds.sweep() == 1
+    assert stock(inventory, ["C1"]) == [5]
+    assert len(holds) == 0
+
+
+def test_taken_holds_do_not_expire(inventory: Inventory) -> None:
+    """Test holds taken at checkout are left to the caller to commit."""
+    clock = FakeClock()
+    holds = HoldManager(inventory, ttl=60, clock=clock)
+    holds.hold("1", "C1", 2)
+
+    reservation_ids, held = holds.take("1")
+    assert held == {"C1": 2}
+    clock.now = 120
+    assert holds.sweep() == 0
+    assert inventory.commit(reservation_ids[0]) is True
+    assert stock(inventory, ["C1"]) == [3]
+
+
+def test_saved_stock_includes_open_holds(inventory: Inventory) -> None:
+    """Test open holds are not lost from the stored stock if the server stops."""
+    holds = HoldManager(inventory)
+    holds.hold("1", "C1", 2)
+    inventory.update_data()
+
+    assert Inventory(inventory.file_path).get_by_serial("C1").quantity == 5
+    assert stock(inventory, ["C1"]) == [3]
@@ -0,0 +1,124 @@
+import numpy as np
+from typing import List
+
+from models.indexes import BitmapIndex, PriceIndex, TextIndex
+
+
+def rows(bitmap: np.ndarray) -> List[int]:
+    return np.flatnonzero(bitmap).tolist()
+
+
+def test_price_index_range() -> None:
+    """Test that range queries return serial numbers in price order."""
+    index = PriceIndex([(300.0, "C"), (100.0, "A"), (200.0, "B")])
+    index.add("D", 150.0)
+
+    assert len(index) == 4
+    assert index.range(100, 200) == ["A", "D", "B"]
+    assert index.range(310, 400) == []
+
+
+def test_price_index_remove_with_equal_prices() -> None:
+    """Test removing one item out of several sharing the same price."""
+    index = PriceIndex([(100.0, "A"), (100.0, "B"), (100.0, "C")])
+
+    assert index.remove("B", 100.0) is True
+    assert index.remove("B", 100.0) is False
+    assert index.range(100, 100) == ["A", "C"]
+
+
+def test_text_index_token_and_prefix_search() -> None:
+    """Test ranked token and prefix search over names and descriptions."""
+    index = TextIndex()
+    index.add("S1", "Leather Sofa", "Comfortable three seat sofa")
+    index.add("S2", "Fabric Couch", "Soft sofa bed")
+    index.add("C1", "Office Chair", "Leather chair with wheels")
+
+    # Name hits rank above description hits
+    assert index.search("sofa") == ["S1", "S2"]
+    assert index.search("leath") == ["S1", "C1"]
+    # Every query token has to match
+    assert index.search("leather sof") == ["S1"]
+    assert index.search("wooden") == []
+
+
+def test_text_index_remove() -> None:
+    """Test that removed items and their unique tokens leave the index."""
+    index = TextIndex()
+    index.add("T1", "Dining Table", "Solid oak")
+    index.add("T2", "Coffee Table", "Glass top")
+
+    assert index.remove("T1") is True
+    assert index.remove("T1") is False
+    assert index.search("table") == ["T2"]
+    assert index.search("oak") == []
+    assert len(index) == 1
+
+
+def test_bitmap_index_match() -> None:
+    """Test combining attribute predicates as bitmaps over the rows."""
+    index = BitmapIndex()
+    index.add({"has_wheels": True, "how_many_legs": 4})
+    index.add({"has_wheels": False, "how_many_legs": 4})
+    index.add({"has_wheels": True, "how_many_legs": 5})
+    assert index.add({"how_many_seats": 3, "can_turn_to_bed": None}) == 3
+
+    assert rows(index.match({"has_wheels": True})) == [0, 2]
+    assert rows(index.match({"has_wheels": True, "how_many_legs": 4})) == [0]
+    assert rows(index.match({"how_many_legs": [4, 5]})) == [0, 1, 2]
+    assert rows(index.match({"can_turn_to_bed": True})) == []
+    # Values are matched with their type
+    assert rows(index.match({"has_wheels": 1})) == []
+    assert rows(index.match({"how_many_legs": True})) == []
+    assert rows(index.match({"how_many_legs": np.int64(5)})) == [2]
+
+
+def test_bitmap_index_remove_shifts_rows() -> None:
+    """Test that removed rows leave every bitmap and the later rows move up."""
+    index = BitmapIndex()
+    index.add({"has_storage": True})
+    index.add({"has_storage": True, "has_mirrors": True})
+    index.add({"has_storage": False})
+
+    assert index.remove(0) is True
+    assert index.remove(2) is False
+    assert len(index) == 2
+    assert rows(index.match({"has_storage": True})) == [0]
+    assert rows(index.match({"has_mirrors": True})) == [0]
+    assert rows(index.match({"has_storage": False})) == [1]
+
+    index.remove(0)
+    assert "has_mirrors" not in index
+    assert rows(index.match({"has_storage": False})) == [0]
+
+
+def test_index_copies_are_independent() -> None:
+    """Test that changes to an index or to its copy do not show in the other."""
+    prices = PriceIndex([(100.0, "A"), (200.0, "B")])
+    prices_copy = prices.copy()
+    prices_copy.add("C", 150.0)
+    prices.remove("A", 100.0)
+    assert prices.range(0, 300) == ["B"]
+    assert prices_copy.range(0, 300) == ["A", "C", "B"]
+
+    text = TextIndex()
+    text.add("S1", "Leather Sofa", "Comfortable sofa")
+    text.add("C1", "Office Chair", "Leather chair")
+    text_copy = text.copy()
+    text_copy.add("S2", "Sofa Bed", "Soft sofa")
+    text_copy.remove("C1")
+    text.add("L1", "Leaf Lamp", "Leather shade")
+    assert text.search("sofa") == ["S1"]
+    assert text.search("lea") == ["L1", "S1", "C1"]
+    assert text_copy.search("sofa") == ["S1", "S2"]
+    assert text_copy.search("lea") == ["S1"]
+    assert text_copy.search("chair") == []
+
+    bitmaps = BitmapIndex()
+    bitmaps.add({"has_wheels": True})
+    bitmaps_copy = bitmaps.copy()
+    bitmaps_copy.add({"has_wheels": True})
+    bitmaps.remove(0)
+    bitmaps.add({"has_wheels": False})
+    assert rows(bitmaps.match({"has_wheels": True})) == []
+    assert rows(bitmaps_copy.match({"has_wheels": True})) == [0, 1]
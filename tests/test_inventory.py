@@ -1,9 +1,12 @@
 import os
+import threading
+import numpy as np
+import pandas as pd
 import pytest
-from typing import Generator, Tuple, Dict, Union
+from typing import Generator, Tuple, Dict, List, Union
 
 from models.factory import FurnitureFactory
-from models.inventory import Inventory
+from models.inventory import Inventory, InsufficientStockError
 
 
 @pytest.fixture
@@ -163,7 +166,7 @@ def test_search_invalid_price_range(setup_inventory: Tuple[Inventory, str]) -> N
 def test_add_item(setup_inventory: Tuple[Inventory, str]) -> None:
     """Test adding an item to the inventory and checking if it is added correctly."""
     inventory, _ = setup_inventory
-    initial_count = len(inventory.data["Chair"][0])
+    initial_count = len(inventory.search_by(category="Chair"))
 
     furniture_desc = {
         "type": "Chair",
@@ -180,33 +183,38 @@ def test_add_item(setup_inventory: Tuple[Inventory, str]) -> None:
     }
 
     assert inventory.add_item(furniture_desc) is True
-    assert len(inventory.data["Chair"][0]) == initial_count + 1
+    assert len(inventory.search_by(category="Chair")) == initial_count + 1
 
 
 def test_remove_item(setup_inventory: Tuple[Inventory, str]) -> None:
     """Test removing an item from the inventory and ensuring it no longer exists."""
     inventory, _ = setup_inventory
-    chair_obj = inventory.data["Chair"][0][0]
+    chair_obj = inventory.search_by(category="Chair")[0]
 
     assert inventory.remove_item(chair_obj) is True
-    assert chair_obj not in inventory.data["Chair"][0]
+    assert chair_obj.serial_number not in [
+        obj.serial_number for obj in inventory.search_by(category="Chair")
+    ]
 
 
 def test_update_quantity(setup_inventory: Tuple[Inventory, str]) -> None:
     """Test updating the quantity of an item in the inventory."""
     inventory, _ = setup_inventory
-    chair_list = inventory.data["Chair"][0]
-    chair_obj = inventory.data["Chair"][0][0]
+    chair_list = inventory.search_by(category="Chair")
+    chair_obj = chair_list[0]
 
     assert inventory.update_quantity(chair_obj, 99) is True
     assert chair_obj.quantity == 99
-    assert chair_list[1:] == inventory.data["Chair"][0][1:]
+    assert inventory.get_by_serial(chair_obj.serial_number).quantity == 99
+    assert [obj.to_dict() for obj in chair_list[1:]] == [
+        obj.to_dict() for obj in inventory.search_by(category="Chair")[1:]
+    ]
 
 
 def test_search_by_name(setup_inventory: Tuple[Inventory, str]) -> None:
     """Test searching for furniture by name and verifying the results."""
     inventory, _ = setup_inventory
-    first_chair_name = inventory.data["Chair"][0][0].name
+    first_chair_name = inventory.search_by(category="Chair")[0].name
 
     results = inventory.search_by(name=first_chair_name)
 
@@ -238,7 +246,7 @@ def test_search_by_price_range(setup_inventory: Tuple[Inventory, str]) -> None:
 def test_search_by_name_and_price(setup_inventory: Tuple[Inventory, str]) -> None:
     """Test searching for a furniture item by name and price range."""
     inventory, _ = setup_inventory
-    chair_name = inventory.data["Chair"][0][1].name  # Selecting second chair
+    chair_name = inventory.search_by(category="Chair")[1].name  # Selecting second chair
 
     results = inventory.search_by(name=chair_name, price_range=(100, 200))
 
@@ -264,7 +272,7 @@ def test_search_by_name_category_and_price(
 ) -> None:
     """Test searching for furniture by name, category, and price range."""
     inventory, _ = setup_inventory
-    sofa_name = inventory.data["Sofa"][0][2].name  # Selecting third sofa
+    sofa_name = inventory.search_by(category="Sofa")[2].name  # Selecting third sofa
 
     results = inventory.search_by(
         name=sofa_name, category="Sofa", price_range=(100, 300)
@@ -289,7 +297,7 @@ def test_update_data(setup_inventory: Tuple[Inventory, str]) -> None:
     # Reload inventory and verify that data persists
     new_inventory = Inventory(test_file)
     # Should still contain 5 chairs
-    assert len(new_inventory.data["Chair"][0]) == 5
+    assert len(new_inventory.search_by(category="Chair")) == 5
 
 
 def test_search_by_full_database(setup_inventory: Tuple[Inventory, str]) -> None:
@@ -300,11 +308,483 @@ def test_search_by_full_database(setup_inventory: Tuple[Inventory, str]) -> None
     result = inventory.search_by()
 
     # Extract expected results
-    expected_result = []
-    for category in ["Chair", "Sofa", "Table", "Bed", "Closet"]:
-        expected_result.extend(inventory.data[category][0])
+    expected_result = inventory.data["serial_number"].tolist()
 
     # Assert that all objects are returned in a single list
-    assert sorted(result, key=lambda x: x.name) == sorted(
-        expected_result, key=lambda x: x.name
+    assert sorted(obj.serial_number for obj in result) == sorted(
+        expected_result
     ), "search_by() did not return the full database correctly when no parameters were provided."
+
+
+def test_get_by_serial(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test retrieving furniture items through the serial number index."""
+    inventory, _ = setup_inventory
+    sofa_obj = inventory.get_by_serial("SNSofa3")
+
+    assert sofa_obj is not None
+    assert sofa_obj.name == "Sofa Model 3"
+    assert inventory.get_by_serial("SN999") is None
+
+    assert inventory.update_quantity(sofa_obj, 42) is True
+    assert inventory.get_by_serial("SNSofa3").quantity == 42
+
+    assert inventory.remove_item(sofa_obj) is True
+    assert inventory.get_by_serial("SNSofa3") is None
+
+
+def test_add_item_duplicate_serial(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test that adding an item with an existing serial number fails."""
+    inventory, _ = setup_inventory
+    furniture_desc = {
+        "type": "Chair",
+        "name": "Duplicate Chair",
+        "description": "Same serial as an existing chair",
+        "price": 120.0,
+        "dimensions": "100x50x75 cm",
+        "serial_number": "SNChair1",
+        "quantity": 3,
+        "weight": 20.0,
+        "manufacturing_country": "USA",
+        "has_wheels": False,
+        "how_many_legs": 4,
+    }
+
+    assert inventory.add_item(furniture_desc) is False
+    assert len(inventory.search_by(category="Chair")) == 5
+
+
+def test_columnar_storage(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test that the inventory is stored as one typed row per furniture item."""
+    inventory, _ = setup_inventory
+
+    assert len(inventory.data) == 25
+    assert str(inventory.data["price"].dtype) == "float64"
+    assert str(inventory.data["quantity"].dtype) == "int64"
+    assert str(inventory.data["has_wheels"].dtype) == "boolean"
+    assert inventory.data["has_wheels"].isna().sum() == 20
+
+
+def test_out_of_stock_item_is_returned(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test that an item whose stock dropped to zero can still be searched."""
+    inventory, _ = setup_inventory
+    bed_obj = inventory.get_by_serial("SNBed1")
+
+    assert inventory.update_quantity(bed_obj, 0) is True
+    results = inventory.search_by(name="Bed Model 1")
+    assert len(results) == 1
+    assert results[0].quantity == 0
+    assert results[0].has_storage is True
+
+
+def test_load_legacy_data() -> None:
+    """Test loading a pickle file saved with the old per-category list layout."""
+    legacy_file = "test_legacy_inventory.pkl"
+    chair = FurnitureFactory.create_furniture(
+        {
+            "type": "Chair",
+            "name": "Legacy Chair",
+            "description": "Stored in the old layout",
+            "price": 80.0,
+            "dimensions": "50x50x90 cm",
+            "serial_number": "LG001",
+            "quantity": 2,
+            "weight": 8.0,
+            "manufacturing_country": "USA",
+            "has_wheels": True,
+            "how_many_legs": 4,
+        }
+    )
+    legacy = pd.DataFrame(
+        {"Chair": [[chair]], "Sofa": [[]], "Table": [[]], "Bed": [[]], "Closet": [[]]}
+    )
+    legacy.to_pickle(legacy_file)
+    try:
+        inventory = Inventory(legacy_file)
+        loaded = inventory.get_by_serial("LG001")
+        assert loaded is not None
+        assert loaded.name == "Legacy Chair"
+        assert loaded.has_wheels is True
+    finally:
+        os.remove(legacy_file)
+
+
+def test_search_by_price_range_ordered_and_paged(
+    setup_inventory: Tuple[Inventory, str]
+) -> None:
+    """Test that price-range results are sorted by price and support limit/offset."""
+    inventory, _ = setup_inventory
+    results = inventory.search_by(price_range=(150, 300))
+    prices = [obj.price for obj in results]
+    assert prices == sorted(prices)
+
+    cheapest_sofas = inventory.search_by(
+        category="Sofa", price_range=(100, 300), limit=2
+    )
+    assert [obj.price for obj in cheapest_sofas] == [100.0, 150.0]
+
+    next_sofas = inventory.search_by(
+        category="Sofa", price_range=(100, 300), limit=2, offset=2
+    )
+    assert [obj.price for obj in next_sofas] == [200.0, 250.0]
+
+
+def test_price_index_follows_add_and_remove(
+    setup_inventory: Tuple[Inventory, str]
+) -> None:
+    """Test that the price index stays in sync with added and removed items."""
+    inventory, _ = setup_inventory
+    furniture_desc = {
+        "type": "Bed",
+        "name": "Budget Bed",
+        "description": "Cheapest bed in the store",
+        "price": 60.0,
+        "dimensions": "200x90x40 cm",
+        "serial_number": "BB001",
+        "quantity": 4,
+        "weight": 30.0,
+        "manufacturing_country": "Poland",
+        "has_storage": False,
+        "has_back": False,
+    }
+    assert inventory.add_item(furniture_desc) is True
+    cheapest = inventory.search_by(price_range=(0, 1000), limit=1)
+    assert cheapest[0].serial_number == "BB001"
+
+    assert inventory.remove_item(cheapest[0]) is True
+    assert inventory.search_by(price_range=(0, 99)) == []
+
+
+def test_search_by_text(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test free-text search through the inverted index, combined with other filters."""
+    inventory, _ = setup_inventory
+
+    results = inventory.search_by(text="sofa mod")
+    assert len(results) == 5
+    assert all(type(obj).__name__ == "Sofa" for obj in results)
+
+    results = inventory.search_by(text="stylish", category="Bed", price_range=(100, 150))
+    assert sorted(obj.serial_number for obj in results) == ["SNBed1", "SNBed2"]
+
+    chair_obj = inventory.get_by_serial("SNChair2")
+    assert inventory.remove_item(chair_obj) is True
+    results = inventory.search_by(text="chair")
+    assert "SNChair2" not in [obj.serial_number for obj in results]
+    assert inventory.search_by(text="recliner") == []
+
+
+def test_search_by_attributes(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test searching with type-specific attribute predicates."""
+    inventory, _ = setup_inventory
+
+    results = inventory.search_by(attributes={"has_wheels": True})
+    assert sorted(obj.serial_number for obj in results) == [
+        "SNChair1",
+        "SNChair3",
+        "SNChair5",
+    ]
+
+    # how_many_seats is shared by sofas and tables
+    results = inventory.search_by(attributes={"how_many_seats": 5})
+    assert sorted(obj.serial_number for obj in results) == ["SNSofa3", "SNTable2"]
+
+    results = inventory.search_by(
+        category="Table",
+        price_range=(100, 300),
+        attributes={"expandable": True, "how_many_seats": [4, 8]},
+    )
+    assert [obj.serial_number for obj in results] == ["SNTable1", "SNTable5"]
+
+    # Flags are not matched by numbers, and the limit applies to the matches
+    assert inventory.search_by(attributes={"has_wheels": 1}) == []
+    results = inventory.search_by(attributes={"has_wheels": True}, limit=2, offset=1)
+    assert [obj.serial_number for obj in results] == ["SNChair3", "SNChair5"]
+
+    # Non indexed columns are filtered directly
+    results = inventory.search_by(attributes={"manufacturing_country": "USA"})
+    assert len(results) == 25
+    assert inventory.search_by(attributes={"has_jacuzzi": True}) == []
+
+    # Removed items leave the bitmaps, the later rows move up
+    inventory.remove_item(inventory.get_by_serial("SNChair1"))
+    results = inventory.search_by(attributes={"has_wheels": True})
+    assert [obj.serial_number for obj in results] == ["SNChair3", "SNChair5"]
+
+
+def test_search_results_cache(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test that repeated searches hit the cache and changes invalidate it."""
+    inventory, _ = setup_inventory
+    stats = inventory.query_cache.stats()
+
+    first = inventory.search_by(category="Chair", price_range=(100, 200))
+    second = inventory.search_by(category="Chair", price_range=(100.0, 200.0))
+    assert [obj.to_dict() for obj in first] == [obj.to_dict() for obj in second]
+    assert inventory.query_cache.stats()["hits"] == stats["hits"] + 1
+
+    # Stock changes keep the cached positions, but never serve stale stock
+    assert inventory.update_quantity(first[0], 1) is True
+    third = inventory.search_by(category="Chair", price_range=(100, 200))
+    assert third[0].quantity == 1
+    assert inventory.query_cache.stats()["hits"] == stats["hits"] + 2
+
+    # Adding items changes row positions and invalidates the cache
+    inventory.add_item(
+        {
+            "type": "Chair",
+            "name": "New Chair",
+            "description": "Office chair",
+            "price": 150.0,
+            "dimensions": "50x50x100 cm",
+            "serial_number": "SNChairNew",
+            "quantity": 2,
+            "weight": 7.0,
+            "manufacturing_country": "Germany",
+            "has_wheels": True,
+            "how_many_legs": 4,
+        }
+    )
+    fourth = inventory.search_by(category="Chair", price_range=(100, 200))
+    assert "SNChairNew" in [obj.serial_number for obj in fourth]
+    assert inventory.query_cache.stats()["hits"] == stats["hits"] + 2
+
+
+def test_stock_searches_see_stock_changes(
+    setup_inventory: Tuple[Inventory, str]
+) -> None:
+    """Test searches filtering on the stock are not served from the cache."""
+    inventory, _ = setup_inventory
+
+    def serials() -> List[str]:
+        found = inventory.search_by(category="Chair", attributes={"quantity": 10})
+        return [obj.serial_number for obj in found]
+
+    assert serials() == ["SNChair1"]
+    assert inventory.update_quantity(inventory.get_by_serial("SNChair2"), 10)
+    assert serials() == ["SNChair1", "SNChair2"]
+    inventory.reserve({"SNChair1": 2})
+    assert serials() == ["SNChair2"]
+
+
+def test_snapshot_is_not_changed_by_writers(
+    setup_inventory: Tuple[Inventory, str]
+) -> None:
+    """Test readers holding a snapshot keep a consistent view of the catalog."""
+    inventory, _ = setup_inventory
+    snapshot = inventory.snapshot()
+    rows = len(snapshot.frame)
+    chair_obj = inventory.get_by_serial("SNChair1")
+    stock = chair_obj.quantity
+
+    inventory.update_quantity(chair_obj, stock + 10)
+    inventory.remove_item(inventory.get_by_serial("SNChair2"))
+
+    assert len(snapshot.frame) == rows
+    pos = snapshot.serial_index["SNChair1"]
+    assert snapshot.frame["quantity"].iat[pos] == stock
+    assert "SNChair2" in snapshot.serial_index
+    assert inventory.get_by_serial("SNChair1").quantity == stock + 10
+    assert inventory.get_by_serial("SNChair2") is None
+    assert inventory.snapshot().version > snapshot.version
+
+
+def test_add_item_appends_in_place(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test adding an item neither copies the table nor changes older snapshots."""
+    inventory, _ = setup_inventory
+    snapshot = inventory.snapshot()
+    desc = inventory.get_by_serial("SNChair1").to_dict()
+    del desc["tax_rate"]
+    inventory.add_item({**desc, "type": "Chair", "serial_number": "SNChairNew"})
+
+    latest = inventory.snapshot()
+    assert len(latest.frame) == len(snapshot.frame) + 1
+    assert np.shares_memory(
+        snapshot.frame["price"].to_numpy(), latest.frame["price"].to_numpy()
+    )
+    assert inventory.get_by_serial("SNChairNew").price == desc["price"]
+    assert inventory.check_availability({"SNChairNew": 1}) == {}
+    # The older snapshot does not see the new row
+    assert "SNChairNew" not in snapshot.frame["serial_number"].tolist()
+
+
+def test_batch_publishes_once(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test a batch of changes is published as a single version."""
+    inventory, _ = setup_inventory
+    version = inventory.snapshot().version
+    chairs = inventory.search_by(category="Chair")
+    stock = [chair.quantity for chair in chairs]
+
+    with inventory.batch():
+        for chair in chairs:
+            inventory.update_quantity(chair, chair.quantity + 5)
+        # Readers do not see the batch before it ends
+        assert inventory.snapshot().version == version
+        assert inventory.get_by_serial(chairs[0].serial_number).quantity == stock[0]
+
+    assert inventory.snapshot().version == version + 1
+    assert [obj.quantity for obj in inventory.search_by(category="Chair")] == [
+        q + 5 for q in stock
+    ]
+
+
+def test_reprice_preview_and_apply(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test bulk repricing previews, applies and saves the new prices at once."""
+    inventory, test_file = setup_inventory
+    preview = inventory.reprice(percent=-20, category="Sofa", dry_run=True)
+    assert [(c.serial_number, c.old_price, c.new_price) for c in preview[:2]] == [
+        ("SNSofa1", 100.0, 80.0),
+        ("SNSofa2", 150.0, 120.0),
+    ]
+    assert inventory.get_by_serial("SNSofa1").price == 100.0
+    assert inventory.is_dirty is False
+
+    snapshot = inventory.snapshot()
+    assert inventory.reprice(percent=-20, category="Sofa") == preview
+    assert snapshot.frame["price"].iat[snapshot.serial_index["SNSofa1"]] == 100.0
+    assert inventory.get_by_serial("SNSofa1").price == 80.0
+    assert inventory.get_by_serial("SNChair1").price == 100.0
+    # The price indexes follow the new prices
+    assert [obj.serial_number for obj in inventory.search_by(
+        category="Sofa", price_range=(80, 120)
+    )] == ["SNSofa1", "SNSofa2"]
+    # Saved in the same call
+    assert inventory.is_dirty is False
+    assert Inventory(test_file).get_by_serial("SNSofa5").price == 240.0
+
+
+def test_reprice_filters(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test repricing by country and price band, with an absolute change."""
+    inventory, _ = setup_inventory
+    assert inventory.reprice(amount=10, country="Italy") == []
+    changes = inventory.reprice(amount=-50.5, price_range=(260, 300))
+    assert {c.serial_number for c in changes} == {
+        f"SN{furniture_type}5"
+        for furniture_type in ["Chair", "Sofa", "Table", "Bed", "Closet"]
+    }
+    assert {c.new_price for c in changes} == {249.5}
+
+    with pytest.raises(ValueError):
+        inventory.reprice(amount=-100, category="Chair")
+    assert inventory.get_by_serial("SNChair1").price == 100.0
+
+    # A repeating percentage is applied exactly, 100.00 * 2/3
+    changes = inventory.reprice(percent=-100 / 3, category="Bed")
+    assert changes[0].new_price == 66.67
+
+    with inventory.batch():
+        inventory.remove_item(inventory.get_by_serial("SNChair1"))
+        # Planned on the working table, the snapshot is stale in a batch
+        assert len(inventory.reprice(percent=10, category="Chair")) == 4
+    assert inventory.get_by_serial("SNChair2").price == 165.0
+
+
+def test_flush_only_writes_changes(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test dirty tracking, flush skips the write when nothing changed."""
+    inventory, test_file = setup_inventory
+    assert inventory.is_dirty is False
+
+    os.remove(test_file)
+    assert inventory.flush() is True
+    assert not os.path.exists(test_file), "A clean inventory should not be written."
+
+    chair_obj = inventory.get_by_serial("SNChair1")
+    inventory.update_quantity(chair_obj, 3)
+    assert inventory.is_dirty is True
+    assert inventory.dirty_serials == {"SNChair1"}
+
+    assert inventory.flush() is True
+    assert os.path.exists(test_file)
+    assert inventory.is_dirty is False
+    assert Inventory(test_file).get_by_serial("SNChair1").quantity == 3
+
+
+def test_check_availability(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test bulk stock checks report only the lines that cannot be supplied."""
+    inventory, _ = setup_inventory
+
+    assert inventory.check_availability({"SNChair1": 10, "SNSofa2": 1}) == {}
+    shortfalls = inventory.check_availability(
+        [("SNChair1", 8), ("SNChair1", 3), ("SNSofa2", 1), ("SNMissing", 2)]
+    )
+    assert shortfalls == {
+        "SNChair1": {"requested": 11, "available": 10},
+        "SNMissing": {"requested": 2, "available": 0},
+    }
+
+
+def test_reserve_commit_and_release(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test reservations deduct stock at once and release returns it."""
+    inventory, _ = setup_inventory
+
+    reservation_id = inventory.reserve({"SNChair1": 4, "SNSofa1": 2})
+    assert inventory.get_by_serial("SNChair1").quantity == 6
+    assert inventory.get_by_serial("SNSofa1").quantity == 8
+    assert inventory.release(reservation_id) is True
+    assert inventory.get_by_serial("SNChair1").quantity == 10
+    assert inventory.release(reservation_id) is False
+
+    reservation_id = inventory.reserve([("SNChair1", 4)])
+    assert inventory.commit(reservation_id) is True
+    assert inventory.release(reservation_id) is False
+    assert inventory.get_by_serial("SNChair1").quantity == 6
+
+
+def test_reserve_is_all_or_nothing(setup_inventory: Tuple[Inventory, str]) -> None:
+    """Test a reservation with one short line deducts nothing and lists the conflict."""
+    inventory, _ = setup_inventory
+
+    with pytest.raises(InsufficientStockError) as error:
+        inventory.reserve({"SNChair1": 4, "SNSofa1": 50})
+    assert error.value.shortfalls == {"SNSofa1": {"requested": 50, "available": 10}}
+    assert inventory.get_by_serial("SNChair1").quantity == 10
+
+
+def test_reservations_change_stock_in_place(
+    setup_inventory: Tuple[Inventory, str]
+) -> None:
+    """Test reservations update the published stock without copying it, unless a
+    snapshot taken with snapshot() holds it."""
+    inventory, _ = setup_inventory
+    pos = inventory.data["serial_number"].tolist().index("SNChair1")
+
+    frame = inventory.data
+    inventory.reserve({"SNChair1": 2})
+    assert frame["quantity"].iat[pos] == 8
+    assert inventory.data is frame
+
+    snapshot = inventory.snapshot()
+    reservation_id = inventory.reserve({"SNChair1": 3})
+    assert snapshot.frame["quantity"].iat[pos] == 8
+    assert inventory.get_by_serial("SNChair1").quantity == 5
+    inventory.release(reservation_id)
+    assert snapshot.frame["quantity"].iat[pos] == 8
+    assert inventory.get_by_serial("SNChair1").quantity == 8
+
+    with inventory.batch():
+        inventory.reserve({"SNChair1": 1})
+        # Not published before the batch ends
+        assert inventory.get_by_serial("SNChair1").quantity == 8
+    assert inventory.get_by_serial("SNChair1").quantity == 7
+
+
+def test_concurrent_reservations_never_oversell(
+    setup_inventory: Tuple[Inventory, str]
+) -> None:
+    """Test concurrent reservations of the same item never exceed its stock."""
+    inventory, _ = setup_inventory
+    succeeded = []
+
+    def buy() -> None:
+        try:
+            inventory.reserve({"SNChair1": 1, "SNBed1": 1})
+            succeeded.append(1)
+        except InsufficientStockError:
+            pass
+
+    threads = [threading.Thread(target=buy) for _ in range(30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(succeeded) == 10
+    assert inventory.get_by_serial("SNChair1").quantity == 0
+    assert inventory.get_by_serial("SNBed1").quantity == 0
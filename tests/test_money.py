@@ -0,0 +1,61 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from models.money import (
+    percent_factor,
+    rate_factor,
+    scale,
+    to_amount,
+    to_cents,
+    to_cents_array,
+)
+
+
+@pytest.mark.parametrize(
+    "amount, cents", [(19.99, 1999), (0.1, 10), (1.005, 101), ("2.5", 250), (7, 700)]
+)
+def test_to_cents(amount, cents):
+    """Test amounts are converted to cents, half a cent rounds up."""
+    assert to_cents(amount) == cents
+
+
+def test_to_amount():
+    """Test cents are converted back to the nearest float amount."""
+    assert to_amount(1999) == 19.99
+    assert to_amount(30) == 0.3
+    assert to_amount(np.array([150, 10])).tolist() == [1.5, 0.1]
+
+
+def test_scale_rounds_half_up():
+    """Test scaling is exact, e.g. 1.50 plus 17% tax is 1.755 -> 1.76."""
+    assert percent_factor(-15) == Fraction("0.85")
+    assert rate_factor(0.17) == Fraction("1.17")
+    assert scale(150, rate_factor(0.17)) == 176
+    assert scale(1999, percent_factor(-33.3)) == 1333
+    assert scale(10, percent_factor(-100)) == 0
+
+
+def test_scale_arrays():
+    """Test arrays of cents are scaled like single amounts."""
+    prices = np.array([1.5, 19.99, 0.1, 250.0])
+    cents = to_cents_array(prices)
+    assert cents.dtype == np.int64
+    assert cents.tolist() == [150, 1999, 10, 25000]
+    factor = rate_factor(0.17)
+    assert scale(cents, factor).tolist() == [scale(int(c), factor) for c in cents]
+
+
+def test_scale_repeating_percentage():
+    """Test a percentage that is not a short decimal does not overflow arrays."""
+    factor = percent_factor(-100 / 3)
+    assert factor == Fraction(2, 3)
+    assert scale(10000, factor) == 6667
+    assert scale(np.array([10000, 1999], dtype=np.int64), factor).tolist() == [
+        6667,
+        1333,
+    ]
+    # Products beyond int64 are computed exactly
+    huge = np.array([2**60], dtype=np.int64)
+    assert scale(huge, Fraction(3, 2)).tolist() == [3 * 2**59]
@@ -4,7 +4,7 @@ import pandas as pd
 import json
 import os
 from models.order import OrderManager
-from models.cart import ShoppingCart
+from models.cart import ShoppingCart, CartLine
 from models.furniture import Furniture
 
 
@@ -30,8 +30,9 @@ class TestOrderManager(unittest.TestCase):
 
         # Remove any existing test orders file to prevent test data
         # accumulation
-        if os.path.exists(self.test_orders_file):
-            os.remove(self.test_orders_file)
+        for path in [self.test_orders_file, self.order_manager.journal_path]:
+            if os.path.exists(path):
+                os.remove(path)
 
         # Force a clean DataFrame to reset test state
         self.order_manager.orders = pd.DataFrame(
@@ -48,7 +49,7 @@ class TestOrderManager(unittest.TestCase):
 
         self.mock_cart = MagicMock(spec=ShoppingCart)
         self.mock_cart.user_id = 1
-        self.mock_cart.items = [
+        table, chair = (
             Furniture(
                 name="Table",
                 description="Wooden table",
@@ -69,7 +70,11 @@ class TestOrderManager(unittest.TestCase):
                 weight=7.0,
                 manufacturing_country="Germany",
             ),
-        ]
+        )
+        self.mock_cart.lines = {
+            table.serial_number: CartLine(table, 2, table.price_cents),
+            chair.serial_number: CartLine(chair, 2, chair.price_cents),
+        }
 
     def test_create_order(self):
         """
@@ -84,6 +89,7 @@ class TestOrderManager(unittest.TestCase):
         self.assertIsInstance(order["order_date"], str)
         items = json.loads(order["items"])
         self.assertEqual(len(items), 2)
+        self.assertEqual(items[0], {"name": "Table", "quantity": 2})
 
     def test_get_order(self):
         """
@@ -158,6 +164,114 @@ class TestOrderManager(unittest.TestCase):
 
         self.assertIn(order_id, new_order_manager.orders["order_id"].values)
 
+    def test_order_indexes(self):
+        """
+        Tests order lookups by order ID and client ID through the indexes.
+        """
+        self.order_manager.create_order(self.mock_cart, "Credit Card", 300.0)
+        self.mock_cart.user_id = 2
+        self.order_manager.create_order(self.mock_cart, "Cash", 150.0)
+        self.order_manager.create_order(self.mock_cart, "Cash", 50.0)
+        first_id = self.order_manager.orders.iloc[0]["order_id"]
+        last_id = self.order_manager.orders.iloc[2]["order_id"]
+
+        self.assertIsNone(self.order_manager.get_order(first_id, 2))
+        self.assertEqual(self.order_manager.get_order(last_id, 2)["total_price"], 50.0)
+        self.assertEqual(
+            [o["total_price"] for o in self.order_manager.get_order_history(2)],
+            [150.0, 50.0],
+        )
+
+        # Indexes are rebuilt from the stored snapshot and journal
+        new_order_manager = OrderManager(file_path=self.test_orders_file)
+        new_order_manager.update_order_status(last_id, "Shipped")
+        self.assertEqual(new_order_manager.get_order(last_id, 2)["status"], "Shipped")
+        self.assertEqual(len(new_order_manager.get_order_history(1)), 1)
+
+    def test_create_order_appends_to_journal(self):
+        """
+        Tests that new orders are journaled instead of rewriting the snapshot.
+        """
+        self.order_manager.create_order(self.mock_cart, "Credit Card", 300.0)
+        snapshot_size = os.path.getsize(self.test_orders_file)
+
+        self.order_manager.create_order(self.mock_cart, "Cash", 150.0)
+        self.assertEqual(os.path.getsize(self.test_orders_file), snapshot_size)
+        with open(self.order_manager.journal_path) as journal:
+            self.assertEqual(len(journal.readlines()), 1)
+
+        order_id = self.order_manager.orders.iloc[1]["order_id"]
+        self.order_manager.cancel_order(order_id)
+
+        new_order_manager = OrderManager(file_path=self.test_orders_file)
+        self.assertEqual(len(new_order_manager.orders), 2)
+        self.assertEqual(
+            new_order_manager.get_order(order_id, 1)["status"], "Cancelled"
+        )
+
+    def test_journal_replay_ignores_torn_record(self):
+        """
+        Tests that a record cut short by a crash is dropped on startup.
+        """
+        self.order_manager.create_order(self.mock_cart, "Credit Card", 300.0)
+        self.order_manager.create_order(self.mock_cart, "Cash", 150.0)
+        with open(self.order_manager.journal_path, "a") as journal:
+            journal.write('{"op": "insert", "record": {"order_')
+
+        new_order_manager = OrderManager(file_path=self.test_orders_file)
+        self.assertEqual(len(new_order_manager.orders), 2)
+        with open(self.order_manager.journal_path) as journal:
+            self.assertEqual(len(journal.readlines()), 1)
+
+    def test_journal_replay_after_crash_during_save(self):
+        """
+        Tests that orders already in the snapshot are not added again when the
+        journal was not emptied after saving it.
+        """
+        self.order_manager.create_order(self.mock_cart, "Credit Card", 300.0)
+        self.order_manager.create_order(self.mock_cart, "Cash", 150.0)
+        with open(self.order_manager.journal_path) as journal:
+            journaled = journal.read()
+
+        # Crash after the snapshot was written, before the journal was emptied
+        self.order_manager.save_orders()
+        with open(self.order_manager.journal_path, "w") as journal:
+            journal.write(journaled)
+
+        new_order_manager = OrderManager(file_path=self.test_orders_file)
+        self.assertEqual(len(new_order_manager.orders), 2)
+        self.assertEqual(len(new_order_manager.get_order_history(1)), 2)
+
+    def test_journal_compaction(self):
+        """
+        Tests that the journal is compacted into the snapshot once it is long enough.
+        """
+        order_manager = OrderManager(file_path=self.test_orders_file, compact_every=2)
+        order_manager.create_order(self.mock_cart, "Credit Card", 300.0)
+        with open(order_manager.journal_path) as journal:
+            self.assertEqual(len(journal.readlines()), 1)
+
+        order_manager.create_order(self.mock_cart, "Cash", 150.0)
+        self.assertEqual(os.path.getsize(order_manager.journal_path), 0)
+        self.assertEqual(len(pd.read_pickle(self.test_orders_file)), 2)
+
+    def test_flush_writes_replaced_orders(self):
+        """
+        Tests that flush only writes orders that are not already stored.
+        """
+        self.assertTrue(self.order_manager.is_dirty)
+        self.order_manager.flush()
+        self.assertFalse(self.order_manager.is_dirty)
+
+        self.order_manager.create_order(self.mock_cart, "Credit Card", 300.0)
+        order_id = self.order_manager.orders.iloc[0]["order_id"]
+        self.assertFalse(self.order_manager.is_dirty)
+        self.assertEqual(self.order_manager.dirty_orders, {order_id})
+
+        os.remove(self.test_orders_file)
+        self.order_manager.flush()
+        self.assertFalse(os.path.exists(self.test_orders_file))
+
     @classmethod
     def tearDownClass(cls):
         """
@@ -167,8 +281,9 @@ class TestOrderManager(unittest.TestCase):
             os.path.dirname(__file__), "..", "tests/test_orders.pkl"
         )
 
-        if os.path.exists(test_orders_file):
-            os.remove(test_orders_file)
+        for path in [test_orders_file, test_orders_file + ".journal"]:
+            if os.path.exists(path):
+                os.remove(path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,299 @@
+import json
+import multiprocessing
+import sqlite3
+import pytest
+
+from models.cart import ShoppingCart
+from models.furniture import Chair
+from models.inventory import Inventory, InsufficientStockError
+from models.inventory import sqlite_backend as inventory_sqlite
+from models.order import OrderManager
+from models.order import sqlite_backend as orders_sqlite
+from models.storage import JournaledPickleBackend
+from models.user import Client, Management, UserDB
+from models.user import sqlite_backend as users_sqlite
+
+
+CHAIR_ONLY = ("has_wheels", "how_many_legs")
+
+
+def chair_desc(serial: str, quantity: int = 5) -> dict:
+    return {
+        "type": "Chair",
+        "name": f"Chair {serial}",
+        "description": "Office chair",
+        "price": 100.0,
+        "dimensions": "50x50x100 cm",
+        "serial_number": serial,
+        "quantity": quantity,
+        "weight": 7.0,
+        "manufacturing_country": "Germany",
+        "has_wheels": True,
+        "how_many_legs": 4,
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return str(tmp_path / "store.db")
+
+
+def test_sqlite_uses_wal(db_path: str) -> None:
+    """Test the SQLite database runs in WAL mode with indexed lookup columns."""
+    backend = inventory_sqlite(db_path)
+    connection = backend.connection()
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {row[1] for row in connection.execute("PRAGMA index_list(inventory)")}
+    assert {"inventory_type", "inventory_price"} <= indexes
+
+
+def test_sqlite_inventory_round_trip(db_path: str) -> None:
+    """Test the inventory is stored in SQLite with its nullable attributes."""
+    inventory = Inventory(backend=inventory_sqlite(db_path))
+    inventory.add_item(chair_desc("C1"))
+    inventory.add_item(
+        {
+            **{k: v for k, v in chair_desc("B1").items() if k not in CHAIR_ONLY},
+            "type": "Bed",
+            "has_storage": False,
+            "has_back": True,
+        }
+    )
+    assert inventory.update_data() is True
+
+    loaded = Inventory(backend=inventory_sqlite(db_path))
+    chair = loaded.get_by_serial("C1")
+    assert isinstance(chair, Chair)
+    assert (chair.quantity, chair.has_wheels, chair.how_many_legs) == (5, True, 4)
+    bed = loaded.get_by_serial("B1")
+    assert (bed.has_storage, bed.has_back) == (False, True)
+    assert not hasattr(bed, "has_wheels")
+    assert len(loaded.search_by(price_range=(50, 150))) == 2
+
+
+def test_sqlite_inventory_writes_changed_rows(db_path: str) -> None:
+    """Test saving the inventory only touches the changed rows."""
+    inventory = Inventory(backend=inventory_sqlite(db_path))
+    for i in range(10):
+        inventory.add_item(chair_desc(f"C{i}"))
+    inventory.update_data()
+
+    connection = inventory.backend.connection()
+    inventory.update_quantity(inventory.get_by_serial("C3"), 1)
+    inventory.remove_item(inventory.get_by_serial("C4"))
+    before = connection.total_changes
+    assert inventory.flush() is True
+    # The two rows and their entries in the change log
+    assert connection.total_changes - before == 4
+
+    loaded = Inventory(backend=inventory_sqlite(db_path))
+    assert len(loaded.data) == 9
+    assert loaded.get_by_serial("C3").quantity == 1
+    assert loaded.get_by_serial("C4") is None
+
+
+def test_sqlite_orders_store_each_change(db_path: str) -> None:
+    """Test orders and status changes are written as single rows."""
+    order_manager = OrderManager(backend=orders_sqlite(db_path))
+    assert order_manager.journal_path is None
+    cart = ShoppingCart("7")
+    cart.add_item(
+        Chair(**{k: v for k, v in chair_desc("C1").items() if k != "type"}), 2
+    )
+    order_manager.create_order(cart, "Credit Card", 200.0)
+    order_id = order_manager.get_order_history(7)[0]["order_id"]
+    order_manager.update_order_status(order_id, "Shipped")
+
+    # Another connection, as another process would see it
+    with sqlite3.connect(db_path) as connection:
+        rows = connection.execute("SELECT order_id, status FROM orders").fetchall()
+    assert rows == [(order_id, "Shipped")]
+
+    loaded = OrderManager(backend=orders_sqlite(db_path))
+    order = loaded.get_order(order_id, 7)
+    assert order["status"] == "Shipped"
+    assert json.loads(order["items"]) == [{"name": "Chair C1", "quantity": 2}]
+
+
+def test_sqlite_users_round_trip(db_path: str) -> None:
+    """Test users and their shopping carts are stored in SQLite."""
+    user_db = UserDB.configure(backend=users_sqlite(db_path))
+    password = "$2b$12$" + "a" * 53
+    client = Client(1, "client1", "c@x.com", password, "Street 1")
+    client.shopping_cart.add_item(
+        Chair(**{k: v for k, v in chair_desc("C1").items() if k != "type"}), 3
+    )
+    assert user_db.add_user(client)
+    assert user_db.add_user(Management(2, "boss", "b@x.com", password, "", "CEO"))
+    assert user_db.delete_user(2)
+
+    user_db = UserDB.configure(backend=users_sqlite(db_path))
+    loaded = user_db.get_by_username("client1")
+    assert loaded is user_db.get_user(1)
+    assert loaded.shopping_cart.quantity_of("C1") == 3
+    assert user_db.get_by_username("boss") is None
+    UserDB._instance = None
+
+
+def test_sqlite_users_edit_rolls_back(db_path: str) -> None:
+    """Test an edit the database rejects leaves the user as it was."""
+    password = "$2b$12$" + "a" * 53
+    first = UserDB.configure(backend=users_sqlite(db_path))
+    assert first.add_user(Client(None, "client1", "c1@x.com", password, ""))
+    user = first.get_by_username("client1")
+    # Another process registers the email first
+    other = users_sqlite(db_path)
+    other.insert_next(
+        UserDB._user_record(Client(None, "client2", "c2@x.com", password, ""))
+    )
+
+    assert first.edit_user(user.user_id, email="c2@x.com", address="1 St") is False
+    assert user.email == "c1@x.com" and user.address == ""
+    assert first.get_by_email("c1@x.com") is user
+    assert first.get_by_email("c2@x.com") is None
+    assert first.is_dirty is False
+    first.flush()
+    UserDB._instance = None
+
+
+def test_journal_replays_records(tmp_path) -> None:
+    """Test the journal records are replayed in the order they were written."""
+    path = str(tmp_path / "orders.pkl")
+    records = [
+        {"op": "insert", "record": {"order_id": "1"}},
+        {"op": "update", "key": "1", "values": {"status": "Shipped"}},
+    ]
+    with open(path + ".journal", "w") as journal:
+        for record in records:
+            journal.write(json.dumps(record) + "\n")
+    backend = JournaledPickleBackend(path, "order_id")
+    assert list(backend.changes()) == records
+    assert backend.journal_records == 2
+
+
+def test_shared_inventory_refresh(db_path: str) -> None:
+    """Test an inventory loads the stock and items another process changed."""
+    first = Inventory(backend=inventory_sqlite(db_path))
+    first.add_item(chair_desc("C1"))
+    first.flush()
+    second = Inventory(backend=inventory_sqlite(db_path))
+    assert second.refresh() is False
+    layout = second.snapshot().layout
+
+    first.commit(first.reserve({"C1": 2}))
+    assert second.refresh() is True
+    assert second.get_by_serial("C1").quantity == 3
+    # Stock changes are applied in place, without reloading the table
+    assert second.snapshot().layout == layout
+
+    first.add_item(chair_desc("C2"))
+    first.flush()
+    assert second.refresh() is True
+    assert second.get_by_serial("C2") is not None
+    assert first.refresh() is False
+
+
+def test_shared_inventory_does_not_oversell(db_path: str) -> None:
+    """Test a process with stale stock can not sell units another one sold."""
+    first = Inventory(backend=inventory_sqlite(db_path))
+    first.add_item(chair_desc("C1", quantity=3))
+    first.flush()
+    second = Inventory(backend=inventory_sqlite(db_path))
+
+    first.reserve({"C1": 2})
+    with pytest.raises(InsufficientStockError) as error:
+        second.reserve({"C1": 2})
+    assert error.value.shortfalls == {"C1": {"requested": 2, "available": 1}}
+    # The failed attempt updated the stale stock
+    assert second.get_by_serial("C1").quantity == 1
+
+
+def test_shared_orders_refresh(db_path: str) -> None:
+    """Test an order manager loads the orders another process stored."""
+    first = OrderManager(backend=orders_sqlite(db_path))
+    second = OrderManager(backend=orders_sqlite(db_path))
+    cart = ShoppingCart("7")
+    cart.add_item(
+        Chair(**{k: v for k, v in chair_desc("C1").items() if k != "type"}), 1
+    )
+    first.create_order(cart, "Credit Card", 100.0)
+    assert second.refresh() is True
+    order_id = second.get_order_history(7)[0]["order_id"]
+
+    first.update_order_status(order_id, "Shipped")
+    assert second.refresh() is True
+    assert second.get_order(order_id, 7)["status"] == "Shipped"
+    assert second.refresh() is False
+
+
+def test_shared_users_refresh(db_path: str) -> None:
+    """Test a user database loads the users another process added or deleted."""
+    first = UserDB.configure(backend=users_sqlite(db_path))
+    second = UserDB.configure(backend=users_sqlite(db_path))
+    password = "$2b$12$" + "a" * 53
+    assert first.add_user(Client(1, "client1", "c@x.com", password, "Street 1"))
+    assert second.refresh() is True
+    assert second.get_by_email("c@x.com").username == "client1"
+
+    assert first.delete_user(1)
+    assert second.refresh() is True
+    assert second.get_by_username("client1") is None
+    assert second.refresh() is False
+    UserDB._instance = None
+
+
+def test_shared_users_allocate_ids(db_path: str) -> None:
+    """
+    Test user databases sharing storage allocate distinct IDs and reject a
+    username or email the other one registered.
+    """
+    first = UserDB.configure(backend=users_sqlite(db_path))
+    second = UserDB.configure(backend=users_sqlite(db_path))
+    password = "$2b$12$" + "a" * 53
+    client = Client(None, "client1", "c1@x.com", password, "Street 1")
+    assert first.add_user(client)
+    assert second.add_user(Client(None, "client2", "c2@x.com", password, ""))
+    assert client.user_id == 1
+    assert client.shopping_cart.user_id == "1"
+    assert second.get_by_username("client2").user_id == 2
+
+    # Neither database has seen the other's user yet
+    assert not second.add_user(Client(None, "client1", "new@x.com", password, ""))
+    assert not first.add_user(Client(None, "other", "c2@x.com", password, ""))
+    assert second.refresh() is True
+    assert second.get_by_username("client1").user_id == 1
+    UserDB._instance = None
+
+
+def reserve_units(db_path: str, rounds: int, sold) -> None:
+    """Worker process reserving one unit at a time until the stock runs out."""
+    inventory = Inventory(backend=inventory_sqlite(db_path))
+    for _ in range(rounds):
+        try:
+            inventory.reserve({"C1": 1})
+        except InsufficientStockError:
+            continue
+        with sold.get_lock():
+            sold.value += 1
+
+
+def test_processes_share_stock(db_path: str) -> None:
+    """Test worker processes sharing the database sell every unit once."""
+    inventory = Inventory(backend=inventory_sqlite(db_path))
+    inventory.add_item(chair_desc("C1", quantity=50))
+    inventory.flush()
+
+    context = multiprocessing.get_context("fork")
+    sold = context.Value("i", 0)
+    processes = [
+        context.Process(target=reserve_units, args=(db_path, 20, sold))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert sold.value == 50
+    inventory.refresh()
+    assert inventory.get_by_serial("C1").quantity == 0
@@ -209,6 +209,17 @@ def test_user_uniqueness(user_db: UserDB) -> None:
     assert result is False
 
 
+def test_new_user_ids(user_db: UserDB) -> None:
+    """Test users added without an ID get the next free one and taken emails are rejected."""
+    password = "$2b$12$" + "a" * 53
+    assert user_db.add_user(Client(5, "client5", "c5@example.com", password, ""))
+    client = Client(None, "client6", "c6@example.com", password, "")
+    assert user_db.add_user(client)
+    assert client.user_id == 6
+    assert client.shopping_cart.user_id == "6"
+    assert not user_db.add_user(Client(None, "other", "c6@example.com", password, ""))
+
+
 def test_invalid_password_hashing() -> None:
     """Test handling of incorrectly formatted password hashes."""
     invalid_user: User = User(
@@ -227,3 +238,116 @@ def test_invalid_role_edit(user_db: UserDB) -> None:
     """Test attempting to edit a non-existent manager's role."""
     result: bool = user_db.edit_user(999, role="CEO")
     assert result is False
+
+
+def test_flush_skips_clean_users(user_db: UserDB) -> None:
+    """Test that flush only writes the users file when a user changed."""
+    client: Client = Client(
+        user_id=1,
+        username="client1",
+        email="client@example.com",
+        password=User.hash_password("ClientPass123!"),
+        address="123 Client St",
+    )
+    user_db.add_user(client)
+    assert user_db.is_dirty is False
+
+    os.remove(TEST_DB_FILE)
+    user_db.flush()
+    assert not os.path.exists(TEST_DB_FILE), "Clean users should not be written."
+
+    user_db.mark_dirty(1)
+    assert user_db.dirty_users == {1}
+    user_db.flush()
+    assert os.path.exists(TEST_DB_FILE)
+    assert user_db.is_dirty is False
+
+
+def test_username_and_email_index(user_db: UserDB) -> None:
+    """Test user lookups by username and email stay in sync with edits and deletes."""
+    client: Client = Client(
+        user_id=1,
+        username="client1",
+        email="client@example.com",
+        password=User.hash_password("ClientPass123!"),
+        address="123 Client St",
+    )
+    user_db.add_user(client)
+    assert user_db.get_by_username("client1") is client
+    assert user_db.get_by_email("client@example.com") is client
+
+    user_db.edit_user(1, username="renamed", email="renamed@example.com")
+    assert user_db.get_by_username("client1") is None
+    assert user_db.get_by_username("renamed") is client
+    assert user_db.get_by_email("renamed@example.com") is client
+
+    # The old username is free again
+    other: Client = Client(
+        user_id=2,
+        username="client1",
+        email="other@example.com",
+        password=User.hash_password("OtherPass123!"),
+        address="1 Other St",
+    )
+    assert user_db.add_user(other) is True
+
+    user_db.delete_user(1)
+    assert user_db.get_by_username("renamed") is None
+    assert user_db.get_by_username("client1") is other
+
+
+def test_edit_user_checks_other_users(user_db: UserDB) -> None:
+    """Test edits to another user's username or email are rejected without changes."""
+    password = "$2b$12$" + "a" * 53
+    first = Client(1, "client1", "c1@example.com", password, "1 Street")
+    second = Client(2, "client2", "c2@example.com", password, "2 Street")
+    user_db.add_user(first)
+    user_db.add_user(second)
+
+    assert user_db.edit_user(2, email="c1@example.com", address="3 Street") is False
+    assert second.email == "c2@example.com" and second.address == "2 Street"
+    assert user_db.get_by_email("c1@example.com") is first
+    assert user_db.get_by_email("c2@example.com") is second
+    assert second.edit_info(username="client1") is False
+    assert user_db.get_by_username("client1") is first
+
+    # A user may keep its own username and email
+    assert user_db.edit_user(1, username="client1", email="c1@example.com") is True
+    assert user_db.get_by_username("client1") is first
+    assert user_db.taken_field("client1", "c1@example.com", user_id=1) is None
+    assert user_db.taken_field("client3", "c1@example.com") == "email"
+
+
+def test_shopping_cart_round_trip(user_db: UserDB) -> None:
+    """Test that cart lines and their quantities survive a save and reload."""
+    client: Client = Client(
+        user_id=1,
+        username="client1",
+        email="client@example.com",
+        password=User.hash_password("ClientPass123!"),
+        address="123 Client St",
+    )
+    chair = FurnitureFactory.create_furniture(
+        {
+            "type": "Chair",
+            "name": "Office Chair",
+            "description": "Comfortable",
+            "price": 100.0,
+            "dimensions": "50x50x100 cm",
+            "serial_number": "C001",
+            "quantity": 10,
+            "weight": 15.0,
+            "manufacturing_country": "Germany",
+            "has_wheels": True,
+            "how_many_legs": 4,
+        }
+    )
+    client.shopping_cart.add_item(chair, 3)
+    user_db.file_path = os.path.abspath(TEST_DB_FILE)
+    user_db.add_user(client)
+
+    user_db.user_data = {}
+    user_db.load_users()
+    cart = user_db.get_by_username("client1").shopping_cart
+    assert cart.quantity_of("C001") == 3
+    assert cart.calculate_total() == 300.0